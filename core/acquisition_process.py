@@ -0,0 +1,231 @@
+"""Acquisition in a child process, feeding a SharedSampleRing.
+
+The UI process keeps a RemoteConnectionManager, which looks like a
+ConnectionManager (same signals, start / stop / send_command), while the
+real one runs with its own interpreter and GIL in the child.  Samples
+travel only through shared memory; the pipe carries commands, replies and
+connection events.
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future
+
+from core.connection_manager import ConnectionManager
+from core.shared_ring import SharedSampleRing
+from core.signals import Signal
+
+logger = logging.getLogger(__name__)
+
+_SIGNALS = ("connected", "disconnected", "connecting", "device_found",
+            "response_received", "reconnected")
+
+
+class RemoteConnectionManager:
+    """UI-side proxy for a ConnectionManager running in a child process.
+
+    Signals are emitted on a reader thread, like the real manager emits on
+    its asyncio thread, so ui.qt_bridge works unchanged.  send_command()
+    returns a concurrent Future of the reply line, or None when the device
+    isn't connected.
+    """
+
+    def __init__(self, ring: SharedSampleRing, client_factory=None,
+                 broker: dict | None = None):
+        for name in _SIGNALS:
+            setattr(self, name, Signal())
+        self.reconnects          = 0
+        self.last_reconnect_time = None
+        self.last_gap            = None
+
+        self._ring      = ring
+        self._factory   = client_factory
+        self._broker    = broker
+        self._connected = False
+        self._process   = None
+        self._conn      = None
+        self._send_lock = threading.Lock()
+        self._pending   = {}   # request id -> Future
+        self._next_id   = 0
+        self.reconnected.connect(self._record_reconnect)
+        self.connected.connect(lambda: self._set_connected(True))
+        self.disconnected.connect(lambda: self._set_connected(False))
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def start(self, loop, ip: str, port: int | None = None):
+        """loop is unused: the connection's event loop is in the child."""
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(
+            target=_child_main, name="acquisition", daemon=True,
+            args=(self._ring.name, child_conn, ip, port, self._factory,
+                  self._broker, logging.getLogger().level))
+        self._process.start()
+        child_conn.close()
+        threading.Thread(target=self._read_events, daemon=True,
+                         name="acquisition-events").start()
+        logger.info("Acquisition process %d started", self._process.pid)
+
+    def stop(self):
+        if not self._process:
+            return
+        try:
+            self._send(("stop",))
+        except OSError:
+            pass
+        self._process.join(timeout=3)
+        if self._process.is_alive():
+            self._process.terminate()
+
+    def send_command(self, cmd: str) -> Future | None:
+        if not self._connected:
+            return None
+        fut = Future()
+        with self._send_lock:
+            req_id         = self._next_id
+            self._next_id += 1
+            self._pending[req_id] = fut
+            self._conn.send(("cmd", req_id, cmd))
+        return fut
+
+    def _send(self, msg: tuple):
+        with self._send_lock:
+            self._conn.send(msg)
+
+    def _set_connected(self, connected: bool):
+        self._connected = connected
+
+    def _record_reconnect(self, seconds: float, gap: float):
+        self.reconnects         += 1
+        self.last_reconnect_time = seconds
+        self.last_gap            = gap
+
+    def _read_events(self):
+        while True:
+            try:
+                msg = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            if msg[0] == "signal":
+                getattr(self, msg[1]).emit(*msg[2])
+            elif msg[0] == "reply":
+                _, req_id, reply, error = msg
+                fut = self._pending.pop(req_id, None)
+                if fut is None:
+                    continue
+                if error is not None:
+                    fut.set_exception(error)
+                else:
+                    fut.set_result(reply)
+
+        logger.warning("Acquisition process exited")
+        self._connected = False
+        for fut in self._pending.values():
+            fut.set_exception(ConnectionError("acquisition process exited"))
+        self._pending.clear()
+        self.disconnected.emit()
+
+
+class RingTap:
+    """Hands new samples of a shared ring to block_cb, on its own thread
+    and with its own cursor, while enabled() is true.  This is how a UI
+    process feeds consumers such as the capture recorder."""
+
+    def __init__(self, ring_name: str, block_cb, enabled=lambda: True,
+                 interval: float = 0.01):
+        self._ring     = SharedSampleRing.attach(ring_name)
+        self._block_cb = block_cb
+        self._enabled  = enabled
+        self._interval = interval
+        self._stop_evt = threading.Event()
+        self._thread   = threading.Thread(target=self._run, daemon=True,
+                                          name="ring-tap")
+        self._thread.start()
+
+    def stop(self):
+        self._stop_evt.set()
+        self._thread.join(timeout=2)
+        self._ring.close()
+
+    def _run(self):
+        while not self._stop_evt.wait(self._interval):
+            if not self._enabled():
+                self._ring.latest(0)   # skip ahead without copying
+                continue
+            block, _ = self._ring.read_new()
+            if len(block):
+                self._block_cb(block[:, 0], block[:, 1])
+
+
+# ── child process ─────────────────────────────────────────────────────────────
+
+def _child_main(ring_name, conn, ip, port, client_factory, broker, level):
+    logging.basicConfig(level=level or logging.INFO)
+    ring = SharedSampleRing.attach(ring_name)
+    try:
+        asyncio.run(_serve(ring, conn, ip, port, client_factory, broker))
+    finally:
+        ring.close()
+
+
+async def _serve(ring, conn, ip, port, client_factory, broker_args):
+    from core.broker import Broker
+
+    loop     = asyncio.get_running_loop()
+    stop_evt = asyncio.Event()
+    broker   = None
+
+    def on_block(ch1, ch2):
+        ring.write(ch1, ch2)
+        if broker:
+            broker.on_block(ch1, ch2)
+
+    def send(msg):
+        try:
+            conn.send(msg)
+        except OSError:
+            stop_evt.set()   # the UI is gone
+
+    conn_mgr = ConnectionManager(block_cb=on_block,
+                                 client_factory=client_factory)
+    for name in _SIGNALS:
+        getattr(conn_mgr, name).connect(
+            lambda *args, name=name: send(("signal", name, args)))
+    if broker_args:
+        broker = Broker(conn_mgr, **broker_args)
+        await broker.start()
+
+    def reply(req_id, fut):
+        error = fut.exception()
+        send(("reply", req_id, None if error else fut.result(), error))
+
+    def on_message():
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            stop_evt.set()
+            return
+        if msg[0] == "stop":
+            stop_evt.set()
+        elif msg[0] == "cmd":
+            _, req_id, cmd = msg
+            fut = conn_mgr.send_command(cmd)
+            if fut is None:
+                send(("reply", req_id, None,
+                      ConnectionError("not connected")))
+            else:
+                fut.add_done_callback(lambda f, i=req_id: reply(i, f))
+
+    loop.add_reader(conn.fileno(), on_message)
+    conn_mgr.start(loop, ip=ip, port=port)
+    await stop_evt.wait()
+
+    loop.remove_reader(conn.fileno())
+    conn_mgr.stop()
+    await asyncio.sleep(0.1)   # let the client close cleanly
+    if broker:
+        await broker.close()
@@ -0,0 +1,12 @@
+ADC_COUNTS  = 16384
+ADC_VREF    = 5.0
+
+
+def raw_to_volts(raw):
+    """Convert 14-bit offset-binary ADC code(s) to volts."""
+    return (raw - ADC_COUNTS / 2) / (ADC_COUNTS / 2) * ADC_VREF
+
+
+def volts_to_raw(volts: float) -> float:
+    """Inverse of raw_to_volts (fractional code, not clipped)."""
+    return volts / ADC_VREF * (ADC_COUNTS / 2) + ADC_COUNTS / 2
@@ -0,0 +1,87 @@
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class LatestWorker:
+    """Background thread that only ever works on the newest request.
+
+    submit() never blocks: a request that arrives while another is being
+    processed replaces whatever was still waiting, so a slow job drops
+    requests instead of building a backlog.  Subclasses implement
+    _process(*args); its return value becomes latest(), unless it is None.
+    """
+
+    def __init__(self, name: str):
+        self._latest  = None
+        self._request = None
+        self._running = True
+        self._wake    = threading.Condition()
+        self._thread  = threading.Thread(target=self._run, daemon=True,
+                                         name=name)
+        self._thread.start()
+
+    def submit(self, *args):
+        with self._wake:
+            self._request = args
+            self._wake.notify()
+
+    def latest(self):
+        return self._latest
+
+    def stop(self):
+        with self._wake:
+            self._running = False
+            self._wake.notify()
+        self._thread.join(timeout=2)
+
+    def _process(self, *args):
+        raise NotImplementedError
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while self._running and self._request is None:
+                    self._wake.wait()
+                if not self._running:
+                    return
+                request, self._request = self._request, None
+            try:
+                result = self._process(*request)
+            except Exception as e:
+                logger.error("%s error: %s", self._thread.name, e)
+                continue
+            if result is not None:
+                self._latest = result
+
+
+class RingWorker(LatestWorker):
+    """LatestWorker whose requests name a range of a SampleRing.
+
+    The GUI hands over absolute sample indices rather than samples; the
+    worker copies them out itself into a channel-major buffer it reuses.
+    """
+
+    def __init__(self, sample_ring, name: str):
+        self._ring = sample_ring
+        self._buf  = np.empty((sample_ring.channels, 0),
+                              dtype=sample_ring.dtype)
+        super().__init__(name)
+
+    @property
+    def ring(self):
+        return self._ring
+
+    def _read(self, start: int, stop: int) -> np.ndarray | None:
+        """(channels, stop - start) codes, or None if already overwritten."""
+        n = stop - start
+        if self._buf.shape[1] < n:
+            self._buf = np.empty((self._ring.channels, n),
+                                 dtype=self._buf.dtype)
+        record = self._buf[:, :n]
+        if self._ring.read_range(start, stop, out=record.T) is None:
+            return None
+        return record
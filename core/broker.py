@@ -0,0 +1,251 @@
+"""Local fan-out of one device connection to any number of subscribers.
+
+Subscribers connect to the broker exactly as they would to the device: it
+speaks the same wire protocol, so the GUI, a CommandClient script or the
+benchmark can point --ip/--port at it unchanged.  Every decoded block is
+re-encoded once and queued to each subscriber; commands they send are
+forwarded through the one CommandClient, whose pipeline serialises them
+and matches each reply back to the subscriber that asked.
+
+Lines starting with `broker` are answered by the broker itself:
+    broker policy drop-oldest|drop-newest|disconnect
+    broker buffer <bytes>
+    broker stats
+"""
+import asyncio
+import logging
+import os
+from collections import deque
+
+import numpy as np
+
+from core.command_client import encode_frames
+
+logger = logging.getLogger(__name__)
+
+POLICIES       = ("drop-oldest", "drop-newest", "disconnect")
+DEFAULT_BUFFER = 32 << 20   # bytes queued per subscriber
+MIN_BUFFER     = 1 << 16
+WRITE_HIGH     = 1 << 20    # transport buffer before pause_writing()
+
+
+def _is_tcp(address: str) -> bool:
+    _, sep, port = address.rpartition(":")
+    return bool(sep) and port.isdigit()
+
+
+async def start_local_server(protocol_factory, address: str):
+    """asyncio server on a unix socket path, or on HOST:PORT."""
+    loop = asyncio.get_running_loop()
+    if _is_tcp(address):
+        host, _, port = address.rpartition(":")
+        return await loop.create_server(protocol_factory, host or None,
+                                        int(port))
+    if os.path.exists(address):
+        os.unlink(address)   # stale socket from a previous run
+    return await loop.create_unix_server(protocol_factory, address)
+
+
+async def close_local_server(server, address: str):
+    if server is None:
+        return
+    server.close()
+    await server.wait_closed()
+    if not _is_tcp(address) and os.path.exists(address):
+        os.unlink(address)
+
+
+class _Subscriber(asyncio.Protocol):
+    """One local client: its own bounded block queue and drop policy.
+
+    Blocks go straight to the transport while it accepts them; once the
+    kernel and the transport's buffer are full (pause_writing) they wait
+    in the queue, and the policy decides what happens when the queue
+    would exceed `buffer` bytes.  Replies are never dropped.
+    """
+
+    def __init__(self, broker: "Broker"):
+        self.policy     = broker.policy
+        self.buffer     = broker.buffer
+        self.dropped    = 0       # blocks
+        self.sent       = 0       # bytes
+        self.peer       = None
+        self._broker    = broker
+        self._transport = None
+        self._queue     = deque() # [data, droppable]
+        self._queued    = 0
+        self._paused    = False
+        self._rx        = bytearray()
+        self._replies   = deque() # futures, answered strictly in order
+
+    # ── asyncio callbacks ─────────────────────────────────────────────────────
+
+    def connection_made(self, transport):
+        self._transport = transport
+        self.peer       = transport.get_extra_info("peername") or "unix"
+        transport.set_write_buffer_limits(high=WRITE_HIGH)
+        self._broker._subscribers.add(self)
+        logger.info("Subscriber %s connected", self.peer)
+
+    def connection_lost(self, exc):
+        self._broker._subscribers.discard(self)
+        logger.info("Subscriber %s gone (%d blocks dropped)",
+                    self.peer, self.dropped)
+
+    def data_received(self, data: bytes):
+        self._rx.extend(data)
+        while (nl := self._rx.find(b"\n")) != -1:
+            line = self._rx[:nl].decode(errors="replace").strip()
+            del self._rx[:nl + 1]
+            if line:
+                self._broker._on_command(self, line)
+
+    def pause_writing(self):
+        self._paused = True
+
+    def resume_writing(self):
+        self._paused = False
+        self._drain()
+
+    # ── output ────────────────────────────────────────────────────────────────
+
+    def send_block(self, data: bytes):
+        if not self._paused and not self._queue:
+            self._write(data)
+            return
+        if self._queued + len(data) > self.buffer:
+            if self.policy == "disconnect":
+                logger.warning("Subscriber %s too slow, disconnecting",
+                               self.peer)
+                self._transport.abort()
+                return
+            if self.policy == "drop-newest":
+                self._count_drop()
+                return
+            self._drop_oldest(len(data))
+        self._queue.append([data, True])
+        self._queued += len(data)
+
+    def send_line(self, line: str):
+        data = (line + "\n").encode()
+        if not self._paused and not self._queue:
+            self._write(data)
+        else:
+            self._queue.append([data, False])
+            self._queued += len(data)
+
+    def _drop_oldest(self, needed: int):
+        keep = deque()
+        while self._queue and self._queued + needed > self.buffer:
+            data, droppable = self._queue.popleft()
+            if droppable:
+                self._queued -= len(data)
+                self._count_drop()
+            else:
+                keep.append([data, droppable])
+        self._queue.extendleft(reversed(keep))
+
+    def _count_drop(self):
+        self.dropped         += 1
+        self._broker.dropped += 1
+
+    def _drain(self):
+        while self._queue and not self._paused:
+            data, _ = self._queue.popleft()
+            self._queued -= len(data)
+            self._write(data)
+
+    def _write(self, data: bytes):
+        if not self._transport.is_closing():
+            self._transport.write(data)
+            self.sent += len(data)
+
+
+class Broker:
+    """Serves the stream of a ConnectionManager on a local socket.
+
+    address is a unix socket path or HOST:PORT.  on_block is meant to be
+    (part of) the manager's block_cb and must run on the broker's loop.
+    """
+
+    def __init__(self, conn_mgr, address: str, policy: str = "drop-oldest",
+                 buffer: int = DEFAULT_BUFFER):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown drop policy: {policy}")
+        self.address      = address
+        self.policy       = policy
+        self.buffer       = buffer
+        self.dropped      = 0   # blocks, over every subscriber so far
+        self._conn_mgr    = conn_mgr
+        self._subscribers = set()
+        self._server      = None
+        conn_mgr.response_received.connect(self._on_device_text)
+
+    async def start(self):
+        self._server = await start_local_server(lambda: _Subscriber(self),
+                                                self.address)
+        logger.info("Broker serving on %s (%s, %d MiB per subscriber)",
+                    self.address, self.policy, self.buffer >> 20)
+
+    async def close(self):
+        for sub in list(self._subscribers):
+            sub._transport.close()
+        await close_local_server(self._server, self.address)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def on_block(self, ch1: np.ndarray, ch2: np.ndarray):
+        if not self._subscribers:
+            return
+        data = encode_frames(ch1, ch2)   # once, shared by every subscriber
+        for sub in list(self._subscribers):
+            sub.send_block(data)
+
+    def _on_device_text(self, line: str):
+        # replies reach their requester via _on_command; anything else
+        # the device says unprompted is everyone's business
+        if not line.startswith(("OK", "ERR")):
+            for sub in list(self._subscribers):
+                sub.send_line(line)
+
+    def _on_command(self, sub: _Subscriber, line: str):
+        # subscribers match replies to commands in order, like the device
+        # itself, so a quick local answer waits behind slower device ones
+        parts = line.split()
+        if parts[0] == "broker":
+            fut = asyncio.get_running_loop().create_future()
+            fut.set_result(self._local_command(sub, parts[1:]))
+        else:
+            reply = self._conn_mgr.send_command(line)
+            if reply is None:
+                fut = asyncio.get_running_loop().create_future()
+                fut.set_result("ERR device not connected")
+            else:
+                fut = asyncio.wrap_future(reply)
+        sub._replies.append(fut)
+        fut.add_done_callback(lambda _: self._send_replies(sub))
+
+    def _send_replies(self, sub: _Subscriber):
+        while sub._replies and sub._replies[0].done():
+            fut = sub._replies.popleft()
+            if fut.cancelled():
+                sub.send_line("ERR cancelled")
+            elif fut.exception():
+                sub.send_line(f"ERR {fut.exception()}")
+            else:
+                sub.send_line(fut.result())
+
+    def _local_command(self, sub: _Subscriber, args: list[str]) -> str:
+        if args[:1] == ["policy"] and len(args) == 2 and args[1] in POLICIES:
+            sub.policy = args[1]
+            return "OK"
+        if args[:1] == ["buffer"] and len(args) == 2 and args[1].isdigit():
+            sub.buffer = max(int(args[1]), MIN_BUFFER)
+            return "OK"
+        if args == ["stats"]:
+            return (f"OK subscribers={self.subscribers} sent={sub.sent} "
+                    f"dropped={sub.dropped} queued={sub._queued}")
+        return ("ERR usage: broker policy " + "|".join(POLICIES) +
+                " | broker buffer <bytes> | broker stats")
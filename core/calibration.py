@@ -0,0 +1,141 @@
+import json
+
+import numpy as np
+
+from core.adc import ADC_COUNTS, raw_to_volts
+
+_CODES = np.arange(ADC_COUNTS)
+
+MIN_SWING = 100   # ADC codes RMS the estimation input needs, at least
+
+
+class ChannelCalibration:
+    """Error model of one ADC channel, compiled into a code → volts LUT.
+
+    offset       input-referred offset error (V), subtracted
+    gain_error   fractional gain error, e.g. 0.01 when the channel reads 1 %
+                 high
+    attenuation  front-end divider (1 or 100), multiplied back in
+    inl          optional [[code, error_V], …] points; interpolated over all
+                 codes and subtracted before offset/gain correction
+    """
+
+    def __init__(self, offset: float = 0.0, gain_error: float = 0.0,
+                 attenuation: int = 1, inl: list | None = None):
+        self.offset      = offset
+        self.gain_error  = gain_error
+        self.attenuation = attenuation
+        self.inl         = inl
+
+    def lut(self) -> np.ndarray:
+        """float32 volts for every ADC code; convert blocks with lut[codes]."""
+        volts = raw_to_volts(_CODES)
+        if self.inl:
+            points = np.asarray(self.inl, dtype=np.float64)
+            order  = np.argsort(points[:, 0])
+            volts  = volts - np.interp(_CODES, points[order, 0],
+                                       points[order, 1])
+        volts = (volts - self.offset) / (1.0 + self.gain_error)
+        return (volts * self.attenuation).astype(np.float32)
+
+    def to_dict(self) -> dict:
+        return {"offset": self.offset, "gain_error": self.gain_error,
+                "attenuation": self.attenuation, "inl": self.inl}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "ChannelCalibration":
+        return cls(offset=d.get("offset", 0.0),
+                   gain_error=d.get("gain_error", 0.0),
+                   attenuation=d.get("attenuation", 1),
+                   inl=d.get("inl"))
+
+
+class InterleaveCorrection:
+    """Gain/offset mismatch of ADC B against ADC A in interleaved mode.
+
+    ADC B reads gain * a + offset (codes) where ADC A reads a.  Left in,
+    the mismatch alternates every sample and shows up as spurs at
+    fs / 2 - fin and fs / 2.  lut() maps ADC B codes back onto ADC A's
+    scale, so CH1's calibration then holds for the merged stream.
+    """
+
+    def __init__(self, gain: float = 1.0, offset: float = 0.0):
+        self.gain   = gain
+        self.offset = offset
+
+    def lut(self) -> np.ndarray:
+        """uint16 ADC B code → ADC A code; apply with np.take."""
+        codes = np.rint((_CODES - self.offset) / self.gain)
+        return np.clip(codes, 0, ADC_COUNTS - 1).astype(np.uint16)
+
+    @classmethod
+    def estimate(cls, codes: np.ndarray) -> "InterleaveCorrection":
+        """Fit from an uncorrected interleaved record of a known input.
+
+        The input should be a sine well below Nyquist covering much of
+        the range, over several periods.  Trimmed to whole periods, both
+        ADCs see the same amplitude distribution, so any difference in
+        mean and RMS is theirs.  Timing skew isn't estimated.
+        """
+        a = codes[0::2].astype(np.float64)
+        b = codes[1::2].astype(np.float64)
+        n = min(len(a), len(b))
+        a, b = a[:n], b[:n]
+        if n == 0 or a.std() < MIN_SWING:
+            raise ValueError("input too small to estimate the mismatch")
+        mid = (a.max() + a.min()) / 2
+        up  = np.flatnonzero((a[:-1] < mid) & (a[1:] >= mid))
+        if len(up) < 3:
+            raise ValueError("need several periods of the input")
+        a, b = a[up[0]:up[-1]], b[up[0]:up[-1]]
+        gain = b.std() / a.std()
+        return cls(gain, b.mean() - gain * a.mean())
+
+    def to_dict(self) -> dict:
+        return {"gain": self.gain, "offset": self.offset}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "InterleaveCorrection":
+        return cls(gain=d.get("gain", 1.0), offset=d.get("offset", 0.0))
+
+
+class Calibration:
+    """Per-channel calibration for CH1 / CH2, plus the interleaved-mode
+    ADC mismatch once it has been estimated, stored as JSON."""
+
+    def __init__(self, channels: list[ChannelCalibration] | None = None,
+                 interleave: InterleaveCorrection | None = None):
+        self.channels   = channels or [ChannelCalibration(),
+                                       ChannelCalibration()]
+        self.interleave = interleave
+
+    @classmethod
+    def load(cls, path: str) -> "Calibration":
+        with open(path) as f:
+            data = json.load(f)
+        interleave = data.get("interleave")
+        return cls([ChannelCalibration.from_dict(c)
+                    for c in data["channels"]],
+                   InterleaveCorrection.from_dict(interleave)
+                   if interleave else None)
+
+    def save(self, path: str):
+        data = {"channels": [c.to_dict() for c in self.channels]}
+        if self.interleave is not None:
+            data["interleave"] = self.interleave.to_dict()
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+def display_lut(cal: ChannelCalibration, gain: float = 1.0,
+                offset: float = 0.0) -> np.ndarray:
+    """Calibrated LUT with the display gain/offset folded in."""
+    lut = cal.lut()
+    lut *= gain
+    lut += offset
+    return lut
+
+
+def volts_to_code(lut: np.ndarray, volts: float) -> int:
+    """Lowest code whose LUT value reaches `volts` (LUT must be rising)."""
+    return int(np.searchsorted(lut, volts))
@@ -1,5 +1,11 @@
 import asyncio
 import logging
+import time
+from collections import deque
+
+import numpy as np
+
+from core import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -7,75 +13,332 @@ FRAME_SYNC = bytes([0xAD, 0xC1])
 FRAME_LEN  = 6
 ADC_MASK   = 0x3FFF
 
+RECV_BUF_SIZE = 1 << 22   # receive buffer, filled in place by the kernel
+MIN_READ      = 1 << 12
+MAX_READ      = 1 << 20
+IDLE_TIMEOUT  = 2.0       # s without any bytes before the link is declared dead
+
+COMMAND_TIMEOUT = 2.0     # s to wait for a command's OK / ERR
+MAX_IN_FLIGHT   = 8       # commands sent but not yet answered
+
+# Frames viewed as three big-endian words: sync, CH1, CH2
+_FRAME_DTYPE = np.dtype('>u2')
+_SYNC_WORD   = int.from_bytes(FRAME_SYNC, 'big')
+
+_RX_BYTES    = metrics.counter("rx_bytes_total", "Bytes received")
+_FRAMES      = metrics.counter("frames_total", "Sample frames decoded")
+_SYNC_LOSSES = metrics.counter("sync_losses_total",
+                               "Times bytes were skipped to find a sync word")
+_SKIPPED     = metrics.counter("skipped_bytes_total",
+                               "Bytes skipped while resyncing")
+_TEXT_LINES  = metrics.counter("text_lines_total", "Text lines received")
+_COMMANDS    = metrics.counter("commands_total", "Command lines sent")
+_READ_SIZE   = metrics.histogram("read_bytes", "Bytes per socket read",
+                                 metrics.SIZE_BUCKETS)
+_BLOCK_TIME  = metrics.histogram("block_callback_seconds",
+                                 "Time spent in block_cb per decoded run")
+
+
+def encode_frames(ch1: np.ndarray, ch2: np.ndarray) -> bytes:
+    """Pack sample arrays into wire frames, byte-exact with the firmware."""
+    words = np.empty((len(ch1), 3), dtype=_FRAME_DTYPE)
+    words[:, 0] = _SYNC_WORD
+    words[:, 1] = np.asarray(ch1) & ADC_MASK
+    words[:, 2] = np.asarray(ch2) & ADC_MASK
+    return words.tobytes()
+
+
+def _coalesce_key(cmd: str):
+    """Commands with the same key replace each other while still queued.
+
+    `afe <param> [<ch>] <value>` is keyed on everything but the value, so
+    only the newest setting per parameter and channel goes out.  Anything
+    else gets a unique key and is always sent.
+    """
+    parts = cmd.split()
+    if len(parts) >= 3 and parts[0] == "afe":
+        return tuple(parts[:-1])
+    return object()
+
+
+def _is_reply(line: str) -> bool:
+    return line.startswith("OK") or line.startswith("ERR")
+
+
+def _expire(fut: asyncio.Future, cmd: str):
+    if not fut.done():
+        logger.warning("No reply to %r", cmd)
+        fut.set_exception(TimeoutError(f"no reply to {cmd!r}"))
+
+
+def _ignore_result(fut: asyncio.Future):
+    if not fut.cancelled():
+        fut.exception()   # mark retrieved, nobody is waiting on it
+
+
+class _FrameProtocol(asyncio.BufferedProtocol):
+    """Zero-copy receive side of a CommandClient connection.
+
+    The kernel reads straight into a preallocated bytearray through
+    get_buffer(); frames are decoded in place and only the unconsumed tail
+    (at most one partial frame or text line) is ever moved, when the free
+    space at the end runs low.  The size offered per read follows the
+    observed rate: it doubles whenever a read fills it and halves when
+    reads come back mostly empty.
+    """
+
+    def __init__(self, client: "CommandClient"):
+        self._client    = client
+        self._buf       = bytearray(RECV_BUF_SIZE)
+        self._view      = memoryview(self._buf)
+        self._start     = 0   # first unconsumed byte
+        self._end       = 0   # end of received data
+        self._read_size = MIN_READ
+        self.transport  = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        if len(self._buf) - self._end < self._read_size:
+            self._compact()
+        return self._view[self._end:self._end + self._read_size]
+
+    def buffer_updated(self, nbytes: int):
+        self._end += nbytes
+        self._client.last_rx = time.monotonic()
+        _RX_BYTES.inc(nbytes)
+        if metrics.enabled:
+            _READ_SIZE.observe(nbytes)
+        if nbytes >= self._read_size:
+            self._read_size = min(self._read_size * 2, MAX_READ)
+        elif nbytes < self._read_size // 4 and self._read_size > MIN_READ:
+            self._read_size //= 2
+
+        self._start = self._client._consume(self._buf, self._start, self._end)
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def _compact(self):
+        pending = self._end - self._start
+        if pending > len(self._buf) - MAX_READ:
+            # no sync word or newline in megabytes: nothing here is usable
+            logger.warning("Dropping %d unparseable bytes", pending)
+            self._start = self._end = 0
+            return
+        # same-size slice assignment, so the exported view stays valid
+        self._buf[:pending] = self._buf[self._start:self._end]
+        self._start, self._end = 0, pending
+
+    def eof_received(self):
+        return False   # close the transport
+
+    def connection_lost(self, exc):
+        if exc:
+            logger.error("Receive error: %s", exc)
+        self._client._mark_closed()
+
 
 class CommandClient:
-    def __init__(self, host: str, port: int, sample_cb=None, text_cb=None):
-        self.host       = host
-        self.port       = port
-        self.sample_cb  = sample_cb
-        self.text_cb    = text_cb
-        self.writer     = None
-        self.connected  = False
-        self._recv_task = None
+    def __init__(self, host: str, port: int, sample_cb=None, text_cb=None,
+                 block_cb=None, idle_timeout: float = IDLE_TIMEOUT,
+                 heartbeat: str | None = None):
+        """idle_timeout: the stream never pauses, so this long without a
+        byte means the link is dead even if the socket is still open.
+        heartbeat: optional command sent after idle_timeout / 2 of silence,
+        to provoke a reply before giving up.
+        """
+        self.host         = host
+        self.port         = port
+        self.sample_cb    = sample_cb
+        self.block_cb     = block_cb    # (ch1: ndarray, ch2: ndarray) per run
+        self.text_cb      = text_cb
+        self.idle_timeout = idle_timeout
+        self.heartbeat    = heartbeat
+        self.connected    = False
+        self.last_rx      = None        # time.monotonic() of the last read
+        self._closed      = None
+        self._transport   = None
+        self._recv_task   = None        # sources without a socket use this
+        self._watchdog    = None
+
+        # command pipeline: the firmware answers in order, so replies are
+        # matched to commands first-in first-out
+        self._queued     = {}      # key -> [cmd, [futures], timeout], unsent
+        self._in_flight  = deque() # [futures, deadline] per sent command
+        self._flush_soon = False
 
     async def connect(self):
-        reader, writer = await asyncio.open_connection(self.host, self.port)
-        self.writer    = writer
-        self.connected = True
+        loop = asyncio.get_running_loop()
+        self._closed = asyncio.Event()
+        self._transport, _ = await loop.create_connection(
+            lambda: _FrameProtocol(self), self.host, self.port)
+        self._mark_open()
         logger.info("Connected to %s:%d", self.host, self.port)
-        self._recv_task = asyncio.create_task(self._receive_loop(reader))
+        if self.idle_timeout:
+            self._watchdog = asyncio.create_task(self._watch_idle())
 
     async def disconnect(self):
-        self.connected = False
-        if self._recv_task:
-            self._recv_task.cancel()
-            try:
-                await self._recv_task
-            except asyncio.CancelledError:
-                pass
-        if self.writer:
-            self.writer.close()
-            try:
-                await self.writer.wait_closed()
-            except Exception:
-                pass
+        for task in (self._recv_task, self._watchdog):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        if self._transport:
+            self._transport.close()
+        self._mark_closed()
         logger.info("Disconnected")
 
-    async def send_command(self, cmd: str):
-        if not self.connected or not self.writer:
+    async def wait_closed(self):
+        """Return as soon as the connection is gone, for whatever reason."""
+        if self._closed:
+            await self._closed.wait()
+
+    def _mark_open(self):
+        if self._closed is None:
+            self._closed = asyncio.Event()
+        self.connected = True
+        self.last_rx   = time.monotonic()
+
+    def _mark_closed(self):
+        self.connected = False
+        if self._closed:
+            self._closed.set()
+        self._fail_pending(ConnectionError("connection closed"))
+
+    async def _watch_idle(self):
+        probed = False
+        while self.connected:
+            await asyncio.sleep(self.idle_timeout / 4)
+            idle = time.monotonic() - self.last_rx
+            if idle >= self.idle_timeout:
+                logger.warning("No data for %.1fs, dropping link", idle)
+                self._transport.abort()
+                self._mark_closed()
+                return
+            if self.heartbeat and idle >= self.idle_timeout / 2:
+                if not probed:
+                    self.request(self.heartbeat).add_done_callback(
+                        _ignore_result)
+                    probed = True
+            else:
+                probed = False
+
+    # ── commands ──────────────────────────────────────────────────────────────
+
+    async def send_command(self, cmd: str,
+                           timeout: float = COMMAND_TIMEOUT) -> str:
+        """Send cmd and return the device's OK / ERR reply line."""
+        return await self.request(cmd, timeout)
+
+    def request(self, cmd: str,
+                timeout: float = COMMAND_TIMEOUT) -> asyncio.Future:
+        """Queue cmd; the future resolves to its reply line.
+
+        Everything requested in the same event-loop iteration goes out in a
+        single write.  A queued `afe` setting that is superseded before it
+        is sent is dropped, and its future resolves with the reply to the
+        newer value.  Fails with TimeoutError after `timeout` seconds and
+        with ConnectionError if the link goes down first.  A timed-out
+        command keeps its place in the reply order until its late reply
+        arrives, so the replies after it still reach their own commands.
+        """
+        loop = asyncio.get_running_loop()
+        fut  = loop.create_future()
+        if not self.connected:
+            fut.set_exception(ConnectionError("not connected"))
+            return fut
+
+        key = _coalesce_key(cmd)
+        if key in self._queued:
+            entry    = self._queued[key]
+            entry[0] = cmd
+            entry[1].append(fut)
+            entry[2] = max(entry[2], timeout)
+        else:
+            self._queued[key] = [cmd, [fut], timeout]
+
+        timer = loop.call_later(timeout, _expire, fut, cmd)
+        fut.add_done_callback(lambda _: timer.cancel())
+        if not self._flush_soon:
+            self._flush_soon = True
+            loop.call_soon(self._flush)
+        return fut
+
+    def _flush(self):
+        self._flush_soon = False
+        now = time.monotonic()
+        if (len(self._in_flight) >= MAX_IN_FLIGHT and
+                self._in_flight[0][1] < now):
+            # the pipeline is full behind an answer long overdue.  Dropping
+            # its slot would pair every later reply with the wrong command,
+            # so resync the only safe way: drop the link and reconnect
+            logger.warning("Device stopped answering commands, dropping link")
+            if self._transport:
+                self._transport.abort()
+            self._mark_closed()
+            return
+
+        lines = []
+        while self._queued and len(self._in_flight) < MAX_IN_FLIGHT:
+            cmd, futures, timeout = self._queued.pop(next(iter(self._queued)))
+            self._in_flight.append([futures, now + timeout])
+            lines.append(cmd)
+        if not lines:
             return
+        _COMMANDS.inc(len(lines))
         try:
-            self.writer.write(cmd.encode() + b'\n')
-            await self.writer.drain()
+            self._write(("\n".join(lines) + "\n").encode())
         except Exception as e:
             logger.error("Send error: %s", e)
-            self.connected = False
+            self._mark_closed()
 
-    async def _receive_loop(self, reader: asyncio.StreamReader):
-        buf = bytearray()
-        try:
-            while True:
-                chunk = await reader.read(256)
-                if not chunk:
-                    break
-                buf.extend(chunk)
-                buf = self._parse_frames(buf)
-        except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            logger.error("Receive error: %s", e)
-        finally:
-            self.connected = False
+    def _write(self, data: bytes):
+        if not self._transport or self._transport.is_closing():
+            raise ConnectionError("transport closed")
+        self._transport.write(data)
+
+    def _on_reply(self, line: str):
+        # a command that timed out still owns its slot, so a late reply
+        # lines up with the right command instead of shifting the rest
+        if not self._in_flight:
+            return
+        futures, _ = self._in_flight.popleft()
+        for fut in futures:
+            if not fut.done():
+                fut.set_result(line)
+        if self._queued and not self._flush_soon:
+            self._flush()
+
+    def _fail_pending(self, exc: Exception):
+        pending = [f for _, futs, _ in self._queued.values() for f in futs]
+        pending += [f for futs, _ in self._in_flight for f in futs]
+        self._queued.clear()
+        self._in_flight.clear()
+        for fut in pending:
+            if not fut.done():
+                fut.set_exception(exc)
 
     def _parse_frames(self, buf: bytearray) -> bytearray:
-        while True:
-            sync_idx = buf.find(FRAME_SYNC)
-            nl_idx   = buf.find(b'\n')
+        pos = self._consume(buf, 0, len(buf))
+        del buf[:pos]
+        return buf
+
+    def _consume(self, buf: bytearray, pos: int, end: int) -> int:
+        """Decode everything complete in buf[pos:end], return the new start."""
+        while pos < end:
+            sync_idx = buf.find(FRAME_SYNC, pos, end)
+            nl_idx   = buf.find(b'\n', pos, end)
 
             # Text line arrives before the next binary frame (or no frame yet)
             if nl_idx != -1 and (sync_idx == -1 or nl_idx < sync_idx):
-                line = buf[:nl_idx].decode(errors='replace').strip()
-                del buf[:nl_idx + 1]
+                line = buf[pos:nl_idx].decode(errors='replace').strip()
+                pos  = nl_idx + 1
+                _TEXT_LINES.inc()
+                if _is_reply(line):
+                    self._on_reply(line)
                 if line and self.text_cb:
                     try:
                         self.text_cb(line)
@@ -88,19 +351,50 @@ class CommandClient:
                 break
 
             # Discard leading bytes that aren't part of a frame
-            if sync_idx > 0:
-                del buf[:sync_idx]
+            if sync_idx != pos:
+                _SYNC_LOSSES.inc()
+                _SKIPPED.inc(sync_idx - pos)
+            pos = sync_idx
 
-            if len(buf) < FRAME_LEN:
+            count = (end - pos) // FRAME_LEN
+            if count == 0:
                 break
 
-            ch1 = ((buf[2] << 8) | buf[3]) & ADC_MASK
-            ch2 = ((buf[4] << 8) | buf[5]) & ADC_MASK
-            if self.sample_cb:
+            pos += self._decode_run(buf, pos, count) * FRAME_LEN
+
+        return pos
+
+    def _decode_run(self, buf: bytearray, pos: int, count: int) -> int:
+        """Decode the run of back-to-back frames at pos, return its length.
+
+        buf[pos:] starts with FRAME_SYNC, so at least one frame is decoded.
+        The run stops at the first frame whose sync word is wrong; the caller
+        resyncs from there exactly like the one-frame-at-a-time parser did.
+        """
+        words = np.frombuffer(buf, dtype=_FRAME_DTYPE,
+                              count=count * 3, offset=pos).reshape(count, 3)
+        bad = np.flatnonzero(words[:, 0] != _SYNC_WORD)
+        if bad.size:
+            count = int(bad[0])
+            words = words[:count]
+
+        ch1 = (words[:, 1] & ADC_MASK).astype(np.uint16)
+        ch2 = (words[:, 2] & ADC_MASK).astype(np.uint16)
+        del words   # release the export on buf before the caller resizes it
+        _FRAMES.inc(count)
+
+        if self.block_cb:
+            t0 = time.perf_counter() if metrics.enabled else None
+            try:
+                self.block_cb(ch1, ch2)
+            except Exception as e:
+                logger.error("block_cb error: %s", e)
+            if t0 is not None:
+                _BLOCK_TIME.observe(time.perf_counter() - t0)
+        elif self.sample_cb:
+            for a, b in zip(ch1.tolist(), ch2.tolist()):
                 try:
-                    self.sample_cb(ch1, ch2)
+                    self.sample_cb(a, b)
                 except Exception as e:
                     logger.error("sample_cb error: %s", e)
-            del buf[:FRAME_LEN]
-
-        return buf
+        return count
@@ -1,31 +1,63 @@
 import asyncio
 import logging
+import random
+import time
 
-from PyQt6.QtCore import QObject, pyqtSignal as Signal
-
+from core import metrics
 from core.command_client import CommandClient
+from core.signals import Signal
 
 logger = logging.getLogger(__name__)
 
+_CONNECTS       = metrics.counter("connects_total", "Successful connects")
+_DISCONNECTS    = metrics.counter("disconnects_total",
+                                  "Connection losses and failed attempts")
+_RECONNECT_TIME = metrics.histogram("reconnect_seconds",
+                                    "Link loss noticed until connected again")
+
+
+class ConnectionManager:
+    """Keeps a sample source connected, reconnecting with backoff.
 
-class ConnectionManager(QObject):
-    PORT        = 8888
-    RETRY_DELAY = 5
+    Its signals are plain core.signals.Signal objects, emitted on the
+    asyncio loop's thread, so it runs without Qt.
+    """
 
-    connected         = Signal()
-    disconnected      = Signal()
-    connecting        = Signal()
-    device_found      = Signal(str)
-    response_received = Signal(str)   # firmware text reply (OK / ERR / …)
+    PORT            = 8888
+    RETRY_MIN       = 0.05    # first reconnect delay (s), doubled per failure
+    RETRY_MAX       = 5.0
+    CONNECT_TIMEOUT = 3.0
+
+    def __init__(self, sample_cb=None, block_cb=None, client_factory=None):
+        """client_factory(sample_cb=, block_cb=, text_cb=) builds the sample
+        source for each connection attempt; the default is a TCP
+        CommandClient to the address given to start().
+        """
+        self.connected         = Signal()
+        self.disconnected      = Signal()
+        self.connecting        = Signal()
+        self.device_found      = Signal()   # (addr: str)
+        self.response_received = Signal()   # (line: str) firmware OK / ERR / …
+        self.reconnected       = Signal()   # (reconnect time, data gap) in s
 
-    def __init__(self, sample_cb=None):
-        super().__init__()
         self._client    = None
         self._ip        = None
         self._port      = self.PORT
         self._running   = False
         self._sample_cb = sample_cb
+        self._block_cb  = block_cb
+        self._factory   = client_factory
         self._loop      = None
+        self._stop_evt  = None
+
+        # link metrics
+        self.reconnects          = 0
+        self.last_reconnect_time = None   # link loss noticed → connected (s)
+        self.last_gap            = None   # last byte before loss → connected
+
+    @property
+    def is_connected(self) -> bool:
+        return bool(self._client and self._client.connected)
 
     def start(self, loop: asyncio.AbstractEventLoop, ip: str,
               port: int | None = None):
@@ -36,36 +68,77 @@ class ConnectionManager(QObject):
         asyncio.run_coroutine_threadsafe(self.connect_loop(), loop)
 
     async def connect_loop(self):
-        self._running = True
+        self._running  = True
+        self._stop_evt = asyncio.Event()
+        failures = 0
+        lost_at  = last_rx = None   # set once an established link drops
         while self._running:
             self.connecting.emit()
             try:
-                self._client = CommandClient(
-                    self._ip, self._port,
-                    sample_cb=self._sample_cb,
-                    text_cb=self.response_received.emit)
-                await self._client.connect()
+                self._client = self._make_client()
+                await asyncio.wait_for(self._client.connect(),
+                                       self.CONNECT_TIMEOUT)
+                failures = 0
+                if lost_at is not None:
+                    self._record_reconnect(lost_at, last_rx)
+                _CONNECTS.inc()
                 self.connected.emit()
                 await self._wait_for_disconnect()
+                lost_at = time.monotonic()
+                last_rx = self._client.last_rx
             except Exception as e:
                 logger.error("Connection error: %s", e)
 
+            _DISCONNECTS.inc()
             self.disconnected.emit()
             if self._running:
-                logger.info("Retrying in %ds…", self.RETRY_DELAY)
-                await asyncio.sleep(self.RETRY_DELAY)
+                delay = self._backoff(failures)
+                failures += 1
+                logger.info("Retrying in %.2fs…", delay)
+                try:
+                    await asyncio.wait_for(self._stop_evt.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _backoff(self, failures: int) -> float:
+        """Jittered exponential delay, so a flapping link isn't hammered."""
+        delay = min(self.RETRY_MAX, self.RETRY_MIN * 2 ** failures)
+        return delay * random.uniform(0.5, 1.5)
+
+    def _record_reconnect(self, lost_at: float, last_rx: float | None):
+        now = time.monotonic()
+        self.reconnects         += 1
+        self.last_reconnect_time = now - lost_at
+        self.last_gap            = now - (last_rx or lost_at)
+        _RECONNECT_TIME.observe(self.last_reconnect_time)
+        logger.info("Reconnected in %.0f ms (%.0f ms without data)",
+                    self.last_reconnect_time * 1e3, self.last_gap * 1e3)
+        self.reconnected.emit(self.last_reconnect_time, self.last_gap)
+
+    def _make_client(self):
+        callbacks = dict(sample_cb=self._sample_cb,
+                         block_cb=self._block_cb,
+                         text_cb=self.response_received.emit)
+        if self._factory:
+            return self._factory(**callbacks)
+        return CommandClient(self._ip, self._port, **callbacks)
 
     async def _wait_for_disconnect(self):
-        while self._running and self._client and self._client.connected:
-            await asyncio.sleep(0.5)
+        await self._client.wait_closed()
 
     def stop(self):
         self._running = False
+        if self._loop and self._stop_evt:
+            self._loop.call_soon_threadsafe(self._stop_evt.set)
         if self._loop and self._client:
             asyncio.run_coroutine_threadsafe(
                 self._client.disconnect(), self._loop)
 
     def send_command(self, cmd: str):
+        """Thread-safe; returns a concurrent Future of the reply line, or
+        None when there is no connection.
+        """
         if self._loop and self._client and self._client.connected:
-            asyncio.run_coroutine_threadsafe(
+            return asyncio.run_coroutine_threadsafe(
                 self._client.send_command(cmd), self._loop)
+        return None
@@ -0,0 +1,225 @@
+"""Headless acquisition: samples to a capture file and/or a local socket,
+`afe` commands from a script, periodic throughput stats.  No Qt."""
+import asyncio
+import logging
+import signal
+import time
+
+import numpy as np
+
+from core import metrics
+from core.broker import Broker, close_local_server, start_local_server
+from core.recorder import CAPTURE_DTYPE, CaptureRecorder
+
+logger = logging.getLogger(__name__)
+
+STATS_INTERVAL = 5.0
+STREAM_BACKLOG = 16 << 20   # bytes queued per stream client before dropping
+
+
+def load_commands(path: str) -> list[str]:
+    """Command script: one command per line, `#` comments, blank lines
+    ignored.  `sleep <seconds>` pauses between commands."""
+    with open(path) as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return [line for line in lines if line]
+
+
+class SampleStream:
+    """Local socket that streams samples to any number of readers.
+
+    Each block goes out as interleaved little-endian uint16 CH1/CH2 pairs,
+    the same layout as a capture's .bin file.  A reader that falls more
+    than STREAM_BACKLOG bytes behind misses blocks (counted in `dropped`)
+    rather than slowing acquisition down.
+    """
+
+    def __init__(self, address: str):
+        self.address  = address
+        self.dropped  = 0
+        self._clients = set()
+        self._server  = None
+
+    async def start(self):
+        self._server = await start_local_server(
+            lambda: _StreamProtocol(self._clients), self.address)
+        logger.info("Streaming samples on %s", self.address)
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    def write(self, ch1: np.ndarray, ch2: np.ndarray):
+        if not self._clients:
+            return
+        data = np.column_stack((ch1, ch2)).astype(CAPTURE_DTYPE).tobytes()
+        for transport in list(self._clients):
+            if transport.get_write_buffer_size() > STREAM_BACKLOG:
+                self.dropped += 1
+            else:
+                transport.write(data)
+
+    async def close(self):
+        for transport in list(self._clients):
+            transport.close()
+        await close_local_server(self._server, self.address)
+
+
+class _StreamProtocol(asyncio.Protocol):
+    def __init__(self, clients: set):
+        self._clients   = clients
+        self._transport = None
+
+    def connection_made(self, transport):
+        self._transport = transport
+        self._clients.add(transport)
+        logger.info("Stream reader connected")
+
+    def connection_lost(self, exc):
+        self._clients.discard(self._transport)
+        logger.info("Stream reader gone")
+
+
+class HeadlessDaemon:
+    """Runs a ConnectionManager on the current event loop without a GUI.
+
+    on_block is the manager's block_cb.  The command script is (re)sent on
+    every connect, so a device that rebooted gets its settings back.
+    """
+
+    def __init__(self, output: str | None = None, stream: str | None = None,
+                 commands: list[str] | None = None,
+                 stats_interval: float = STATS_INTERVAL,
+                 broker: dict | None = None):
+        """broker: Broker keyword arguments (address=, policy=, buffer=) to
+        also fan the device out to local subscribers."""
+        self.samples        = 0
+        self.output         = output
+        self.commands       = commands or []
+        self.stats_interval = stats_interval
+        self.recorder       = CaptureRecorder() if output else None
+        self.stream         = SampleStream(stream) if stream else None
+        self.broker         = None
+        self._broker_args   = broker
+        self._stop_evt      = None
+
+    def on_block(self, ch1: np.ndarray, ch2: np.ndarray):
+        self.samples += len(ch1)
+        if self.recorder:
+            self.recorder.write(ch1, ch2)
+        if self.stream:
+            self.stream.write(ch1, ch2)
+        if self.broker:
+            self.broker.on_block(ch1, ch2)
+
+    def stop(self):
+        if self._stop_evt:
+            self._stop_evt.set()
+
+    async def run(self, conn_mgr, ip: str, port: int | None = None,
+                  duration: float | None = None):
+        loop = asyncio.get_running_loop()
+        self._stop_evt = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass   # not on this platform / not the main thread
+
+        if self.stream:
+            await self.stream.start()
+        if self._broker_args:
+            self.broker = Broker(conn_mgr, **self._broker_args)
+            await self.broker.start()
+        if self.recorder:
+            self.recorder.start(self.output, {"commands": self.commands})
+        self._register_metrics()
+
+        conn_mgr.connected.connect(
+            lambda: loop.create_task(self._send_commands(conn_mgr)))
+        conn_mgr.response_received.connect(
+            lambda line: logger.debug("Device: %s", line))
+        conn_mgr.start(loop, ip=ip, port=port)
+
+        t_start = time.monotonic()
+        try:
+            await self._report_stats(conn_mgr, t_start, duration)
+        finally:
+            conn_mgr.stop()
+            await asyncio.sleep(0)   # let the disconnect get under way
+            if self.recorder:
+                header = self.recorder.stop()
+                if header:
+                    logger.info("Saved %d samples (%d blocks dropped)",
+                                header["samples"], header["dropped_blocks"])
+            if self.stream:
+                await self.stream.close()
+            if self.broker:
+                await self.broker.close()
+
+    def _register_metrics(self):
+        metrics.gauge("samples", "Samples acquired", lambda: self.samples)
+        if self.recorder:
+            metrics.gauge("recorder_dropped_blocks",
+                          "Blocks the recorder dropped",
+                          lambda: self.recorder.dropped_blocks)
+        if self.stream:
+            metrics.gauge("stream_dropped_blocks",
+                          "Blocks stream readers missed",
+                          lambda: self.stream.dropped)
+        if self.broker:
+            metrics.gauge("broker_subscribers", "Broker subscribers",
+                          lambda: self.broker.subscribers)
+            metrics.gauge("broker_dropped_blocks",
+                          "Blocks dropped to broker subscribers",
+                          lambda: self.broker.dropped)
+
+    async def _send_commands(self, conn_mgr):
+        for cmd in self.commands:
+            parts = cmd.split()
+            if not parts:
+                continue   # a blank --command
+            if parts[0] == "sleep" and len(parts) == 2:
+                await asyncio.sleep(float(parts[1]))
+                continue
+            fut = conn_mgr.send_command(cmd)
+            if fut is None:
+                logger.warning("Not connected, script stopped at %r", cmd)
+                return
+            try:
+                reply = await asyncio.wrap_future(fut)
+            except Exception as e:
+                logger.error("%s: %s", cmd, e)
+                continue
+            log = logger.error if reply.startswith("ERR") else logger.info
+            log("%s -> %s", cmd, reply)
+
+    async def _report_stats(self, conn_mgr, t_start: float,
+                            duration: float | None):
+        last_t, last_n = t_start, 0
+        while not self._stop_evt.is_set():
+            timeout = self.stats_interval
+            if duration is not None:
+                timeout = min(timeout, t_start + duration - time.monotonic())
+                if timeout <= 0:
+                    return
+            try:
+                await asyncio.wait_for(self._stop_evt.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            now, n = time.monotonic(), self.samples
+            rate   = (n - last_n) / (now - last_t)
+            stats  = [f"{n} samples", f"{rate / 1e6:.2f} MS/s",
+                      f"{conn_mgr.reconnects} reconnects"]
+            if self.recorder:
+                stats.append(f"{self.recorder.dropped_blocks} blocks "
+                             "dropped to disk")
+            if self.stream:
+                stats.append(f"{self.stream.clients} readers, "
+                             f"{self.stream.dropped} stream drops")
+            if self.broker:
+                stats.append(f"{self.broker.subscribers} subscribers, "
+                             f"{self.broker.dropped} blocks dropped to them")
+            logger.info("Stats: %s", ", ".join(stats))
+            last_t, last_n = now, n
@@ -0,0 +1,26 @@
+import numpy as np
+
+
+def minmax_decimate(data: np.ndarray, bins: int) -> tuple[np.ndarray, np.ndarray]:
+    """Peak-detect decimation of a record down to 2 * bins points.
+
+    Works along the last axis, so data is (n,) or channel-major
+    (channels, n); keep rows contiguous, reduceat is several times faster
+    on them.  Every bin contributes its minimum and its maximum, so a
+    one-sample glitch anywhere in the record survives and nothing aliases.
+    Returns (x, y) where x is the sample index each point stands for;
+    records already short enough are returned undecimated.
+    """
+    n = data.shape[-1]
+    if n <= 2 * bins:
+        return np.arange(n), data
+
+    edges = np.linspace(0, n, bins + 1).astype(np.intp)[:-1]
+    mins  = np.minimum.reduceat(data, edges, axis=-1)
+    maxs  = np.maximum.reduceat(data, edges, axis=-1)
+
+    y = np.empty(data.shape[:-1] + (2 * bins,), dtype=data.dtype)
+    y[..., 0::2] = mins
+    y[..., 1::2] = maxs
+    x = np.repeat(edges, 2)
+    return x, y
@@ -0,0 +1,53 @@
+"""Interleaved mode: both ADCs sample CH1 half a clock apart."""
+import numpy as np
+
+from core.ring_buffer import SampleRing
+
+
+class InterleavedRing(SampleRing):
+    """Read-only view of a two-channel SampleRing as one channel at twice
+    the rate.
+
+    Each frame carries (ADC A, ADC B) in sampling order, so the ring's
+    C-ordered (capacity, 2) storage read straight through is already the
+    merged stream: reshaped to (2 × capacity, 1) it's a view, not a copy.
+    View index i is ring sample i // 2, ADC i % 2.  Copies out map the
+    ADC B samples through `correction` (InterleaveCorrection.lut()), so
+    every consumer method returns corrected codes on ADC A's scale.  The
+    view has its own read cursor, starting at "now".
+    """
+
+    def __init__(self, ring: SampleRing, correction: np.ndarray | None = None):
+        # storage is the ring's, so SampleRing.__init__ isn't called
+        if ring.channels != 2:
+            raise ValueError("interleaving needs a two-channel ring")
+        self.capacity   = 2 * ring.capacity
+        self.channels   = 1
+        self.overruns   = 0
+        self.correction = correction
+        self._ring      = ring
+        self._read_pos  = self._write_pos
+
+    @property
+    def _data(self) -> np.ndarray:
+        # not kept: a shared ring's block can't be closed while exported
+        return self._ring._data.reshape(-1, 1)
+
+    @property
+    def _write_pos(self) -> int:
+        return 2 * self._ring.write_pos
+
+    @property
+    def _write_end(self) -> int:
+        return 2 * self._ring._write_end
+
+    def write(self, *columns):
+        raise TypeError("write the underlying two-channel ring")
+
+    def _copy(self, start: int, end: int,
+              out: np.ndarray | None = None) -> np.ndarray:
+        out = super()._copy(start, end, out)
+        if self.correction is not None:
+            b = out[1 - start % 2::2, 0]
+            np.take(self.correction, b, out=b)
+        return out
@@ -0,0 +1,252 @@
+"""Math channel: CH1/CH2 arithmetic, a streaming filter and averaging.
+
+The math channel is computed over the whole incoming stream, not just
+the records on screen, so filters see contiguous data and keep their
+state from block to block.  Results go into a float32 ring indexed by the
+same absolute sample numbers as the SampleRing, from which triggered
+records are fetched exactly like raw ones.
+"""
+import importlib.util
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# IIR filters need SciPy, FIR filters don't.  It's only looked up here and
+# imported once an IIR filter is actually designed, so a scope that never
+# uses one doesn't pay for it at startup.
+_HAVE_SCIPY = importlib.util.find_spec("scipy") is not None
+if not _HAVE_SCIPY:
+    logger.info("SciPy not installed: math channel IIR filters unavailable")
+
+OPERATIONS   = ("CH1", "CH2", "CH1+CH2", "CH1-CH2", "CH1*CH2")
+FILTERS      = ("None", "Low-pass", "High-pass", "Band-pass", "Moving average")
+FILTER_KINDS = ("FIR", "IIR") if _HAVE_SCIPY else ("FIR",)
+FIR_TAPS     = 101
+IIR_ORDER    = 4
+REDESIGN     = 0.01   # relative sample-rate change that redesigns a filter
+
+_OPS = {
+    "CH1":     lambda a, b: a,
+    "CH2":     lambda a, b: b,
+    "CH1+CH2": np.add,
+    "CH1-CH2": np.subtract,
+    "CH1*CH2": np.multiply,
+}
+_BTYPES = {"Low-pass": "lowpass", "High-pass": "highpass",
+           "Band-pass": "bandpass"}
+
+
+@lru_cache(maxsize=32)
+def fir_taps(band: str, f1: float, f2: float, taps: int) -> np.ndarray:
+    """Blackman-windowed-sinc taps; f1/f2 in cycles per sample (< 0.5).
+
+    High-pass is the spectral inverse of the low-pass, band-pass the
+    difference of two low-passes.  taps is forced odd so the filter has a
+    whole-sample delay of taps // 2.
+    """
+    taps |= 1
+    n    = np.arange(taps) - taps // 2
+    win  = np.blackman(taps)
+
+    def lowpass(fc):
+        h = np.sinc(2 * fc * n) * win
+        return h / h.sum()
+
+    if band == "Low-pass":
+        h = lowpass(f1)
+    elif band == "High-pass":
+        h = -lowpass(f1)
+        h[taps // 2] += 1
+    else:
+        h = lowpass(f2) - lowpass(f1)
+    h = h.astype(np.float32)
+    h.flags.writeable = False
+    return h
+
+
+@lru_cache(maxsize=32)
+def iir_sos(band: str, f1: float, f2: float, order: int) -> np.ndarray:
+    """Butterworth second-order sections; f1/f2 in cycles per sample."""
+    wn = (2 * f1, 2 * f2) if band == "Band-pass" else 2 * f1
+    from scipy.signal import butter
+    return butter(order, wn, btype=_BTYPES[band], output="sos")
+
+
+class _Fir:
+    def __init__(self, taps: np.ndarray):
+        self.delay = len(taps) // 2
+        self._taps = taps
+        self._tail = np.zeros(len(taps) - 1, dtype=np.float32)
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        xx         = np.concatenate((self._tail, x))
+        self._tail = xx[len(xx) - len(self._tail):]
+        return np.convolve(xx, self._taps, mode="valid")
+
+
+class _MovingAverage:
+    """Boxcar of n samples from a running sum: O(1) per sample for any n."""
+
+    def __init__(self, n: int):
+        self.delay = (n - 1) // 2
+        self._n    = n
+        self._tail = np.zeros(n - 1, dtype=np.float32)
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        xx         = np.concatenate((self._tail, x))
+        self._tail = xx[len(xx) - len(self._tail):]
+        c = np.cumsum(xx, dtype=np.float64)
+        y = c[self._n - 1:].copy()
+        y[1:] -= c[:len(c) - self._n]
+        return (y / self._n).astype(np.float32)
+
+
+class _Iir:
+    """sosfilt with its zi state carried between blocks.  The phase delay
+    depends on frequency, so none is compensated."""
+
+    delay = 0
+
+    def __init__(self, sos: np.ndarray):
+        from scipy import signal
+        self._signal = signal
+        self._sos    = sos
+        self._zi     = None
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        if self._zi is None:   # start settled on the first sample
+            self._zi = self._signal.sosfilt_zi(self._sos) * x[0]
+        y, self._zi = self._signal.sosfilt(self._sos, x, zi=self._zi)
+        return y.astype(np.float32)
+
+
+class MathChannel:
+    """One math channel's stream state.
+
+    settings: op (one of OPERATIONS), filter (FILTERS), kind (FILTER_KINDS),
+    f1 / f2 cutoffs in Hz, taps (FIR length or moving-average width),
+    average (records averaged, 1 for none).  luts are the calibrated code
+    → volts tables, so results are in volts.  Filters need the sample rate;
+    they're designed once for it and redesigned only if it drifts by more
+    than REDESIGN.
+    """
+
+    def __init__(self, settings: dict, luts, capacity: int,
+                 rate: float | None):
+        self.settings = settings
+        self.rate     = rate
+        self._luts    = luts
+        self._op      = _OPS[settings["op"]]
+        self._filter  = None
+        self._delay   = 0
+        # designed filters wait for the rate; until then there's no output
+        self._needs_rate = settings["filter"] not in ("None", "Moving average")
+        if not self._needs_rate or rate:
+            self._filter = self._design(rate)
+            self._delay  = getattr(self._filter, "delay", 0)
+        self._ring    = np.full(capacity, np.nan, dtype=np.float32)
+        self._next_in = None   # absolute index of the next input sample
+        self._written = None   # absolute index one past the last output
+        self._avg     = None
+        self._avg_n   = 0
+
+    def _design(self, rate: float | None):
+        s, band = self.settings, self.settings["filter"]
+        if band == "None":
+            return None
+        if band == "Moving average":
+            return _MovingAverage(max(1, int(s["taps"])))
+        if not rate:
+            raise ValueError("filter needs the sample rate")
+        f1 = min(s["f1"] / rate, 0.499)
+        f2 = min(max(s["f2"] / rate, f1 + 1e-4), 0.499)
+        f1, f2 = round(f1, 6), round(f2, 6)   # cache key tolerates jitter
+        if s["kind"] == "IIR":
+            if not _HAVE_SCIPY:
+                raise ValueError("IIR filters need SciPy")
+            return _Iir(iir_sos(band, f1, f2, IIR_ORDER))
+        return _Fir(fir_taps(band, f1, f2, int(s["taps"])))
+
+    def update_rate(self, rate: float | None):
+        """Redesign the filter if the sample rate moved by > REDESIGN."""
+        if not self._needs_rate or not rate:
+            return
+        if self.rate and abs(rate / self.rate - 1) <= REDESIGN:
+            return
+        self.rate    = rate
+        self._filter = self._design(rate)
+        self._delay  = self._filter.delay
+
+    # ── stream ────────────────────────────────────────────────────────────────
+
+    def feed(self, block: np.ndarray, start: int):
+        """Run a (n, channels) block of codes through the math channel."""
+        if not len(block):
+            return
+        if self._next_in is not None and start != self._next_in:
+            # the ring lapped us: the filter restarts on fresh data
+            if self._filter is not None:
+                self._filter = self._design(self.rate)
+            self._written = None
+        self._next_in = start + len(block)
+        if self._needs_rate and self._filter is None:
+            # unfiltered samples must not pass for filtered ones: NaN keeps
+            # the trace blank and the output in step with the input
+            self._write(start, np.full(len(block), np.nan, dtype=np.float32))
+            return
+
+        v = self._op(self._luts[0][block[:, 0]], self._luts[1][block[:, 1]])
+        if self._filter is not None:
+            v = self._filter(v)
+        # filter outputs lag their inputs by `delay`; store them where the
+        # input was, so the math trace lines up with the channels
+        end = self._next_in - self._delay
+        self._write(end - len(v), v)
+
+    def _write(self, pos: int, v: np.ndarray):
+        cap = len(self._ring)
+        if len(v) > cap:
+            pos, v = pos + len(v) - cap, v[-cap:]
+        i     = pos % cap
+        first = min(len(v), cap - i)
+        self._ring[i:i + first] = v[:first]
+        self._ring[:len(v) - first] = v[first:]
+        self._written = pos + len(v)
+
+    def record(self, start: int, stop: int) -> np.ndarray | None:
+        """Math samples [start, stop); ones not computed yet are NaN."""
+        if self._written is None:
+            return None
+        cap = len(self._ring)
+        if start < self._written - cap:
+            return None
+        out   = np.full(stop - start, np.nan, dtype=np.float32)
+        avail = min(stop, self._written) - start
+        if avail > 0:
+            i     = start % cap
+            first = min(avail, cap - i)
+            out[:first] = self._ring[i:i + first]
+            out[first:avail] = self._ring[:avail - first]
+        return out
+
+    def average(self, record: np.ndarray) -> np.ndarray:
+        """Average triggered records: a plain mean for the first `average`
+        of them, then an exponential one with the same weight."""
+        n = self.settings["average"]
+        if n <= 1:
+            return record
+        if self._avg is None or self._avg.shape != record.shape:
+            self._avg   = record.copy()
+            self._avg_n = 1
+            return self._avg.copy()
+        self._avg_n = min(self._avg_n + 1, n)
+        # NaN tails (not filtered yet) neither poison nor hold it back
+        valid = ~np.isnan(record)
+        fresh = valid & np.isnan(self._avg)
+        self._avg[fresh] = record[fresh]
+        valid &= ~fresh
+        self._avg[valid] += (record[valid] - self._avg[valid]) / self._avg_n
+        return self._avg.copy()
@@ -0,0 +1,176 @@
+import math
+import time
+
+import numpy as np
+
+from core.background import RingWorker
+
+MEASUREMENTS = ("vpp", "vmin", "vmax", "mean", "rms",
+                "freq", "period", "duty", "rise", "fall")
+REF_LOW  = 0.1   # rise/fall reference levels, as fractions of Vpp
+REF_HIGH = 0.9
+
+
+def _transitions(codes: np.ndarray, lo: int, hi: int):
+    """Rising and falling passes through the [lo, hi] code band.
+
+    Returns (rises, rise_len, falls, fall_len): the index where each edge
+    reaches the far side of the band and how many samples it took to cross
+    it from the last sample on the near side.  The band doubles as
+    hysteresis, so noise around one level can't fake an edge.
+    """
+    events = (codes >= hi).astype(np.int8) - (codes <= lo).astype(np.int8)
+    # only samples outside the band can change state; an edge is where the
+    # side changes between two consecutive out-of-band samples
+    where  = np.flatnonzero(events)
+    side   = events[where]
+    change = np.flatnonzero(side[1:] != side[:-1]) + 1
+    to     = where[change]
+    span   = to - where[change - 1]
+    up     = side[change] == 1
+    return to[up], span[up], to[~up], span[~up]
+
+
+def measure(codes: np.ndarray, lut: np.ndarray,
+            rate: float | None = None) -> dict:
+    """Standard scope measurements of one channel's record.
+
+    codes are raw ADC codes and lut the channel's code → volts table, so
+    amplitude statistics come from a code histogram and edges are found by
+    comparing codes, without converting the record to volts.  Times are in
+    seconds given the sample rate, in samples otherwise.  Values that the
+    record can't support (no edges, fewer than two periods) are None.
+    """
+    n = len(codes)
+    result = dict.fromkeys(MEASUREMENTS)
+    if n == 0:
+        return result
+
+    hist  = np.bincount(codes, minlength=len(lut))
+    used  = np.flatnonzero(hist)
+    lut64 = lut.astype(np.float64)
+    vmin  = float(lut64[used].min())
+    vmax  = float(lut64[used].max())
+    result.update(vmin=vmin, vmax=vmax, vpp=vmax - vmin,
+                  mean=float(hist @ lut64) / n,
+                  rms=math.sqrt(float(hist @ (lut64 * lut64)) / n))
+    if vmax <= vmin:
+        return result
+
+    dt  = 1.0 / rate if rate else 1.0
+    vpp = vmax - vmin
+    lo, mid, hi = np.searchsorted(
+        lut, [vmin + REF_LOW * vpp, vmin + 0.5 * vpp, vmin + REF_HIGH * vpp])
+    rises, rise_len, falls, fall_len = _transitions(codes, lo, hi)
+    if rises.size:
+        result["rise"] = float(rise_len.mean()) * dt
+    if falls.size:
+        result["fall"] = float(fall_len.mean()) * dt
+
+    edges = rises if rises.size >= falls.size else falls
+    if edges.size >= 2:
+        first, last = int(edges[0]), int(edges[-1])
+        period = (last - first) / (edges.size - 1)
+        high   = np.count_nonzero(codes[first:last] >= mid)
+        result.update(period=period * dt, freq=1.0 / (period * dt),
+                      duty=float(high) / (last - first))
+    return result
+
+
+class RunningStats:
+    """Count, mean, min, max and standard deviation of a measurement over
+    successive records (Welford's update, O(1) per value)."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean  = 0.0
+        self.min   = math.inf
+        self.max   = -math.inf
+        self._m2   = 0.0
+
+    def update(self, value: float | None):
+        if value is None:
+            return
+        self.count += 1
+        delta       = value - self.mean
+        self.mean  += delta / self.count
+        self._m2   += delta * (value - self.mean)
+        self.min    = min(self.min, value)
+        self.max    = max(self.max, value)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self._m2 / self.count) if self.count else 0.0
+
+    def summary(self) -> dict | None:
+        if not self.count:
+            return None
+        return {"count": self.count, "mean": self.mean, "min": self.min,
+                "max": self.max, "std": self.std}
+
+
+class RateMeter:
+    """Sample rate from a monotonically growing sample counter."""
+
+    def __init__(self, window: float = 0.5, smoothing: float = 0.3):
+        self.rate       = None
+        self._window    = window
+        self._smoothing = smoothing
+        self._t0        = None
+        self._count0    = 0
+
+    def update(self, count: int, now: float | None = None) -> float | None:
+        now = time.monotonic() if now is None else now
+        if self._t0 is None or count < self._count0:
+            self._t0, self._count0 = now, count
+            return self.rate
+        dt = now - self._t0
+        if dt >= self._window:
+            rate = (count - self._count0) / dt
+            self.rate = rate if self.rate is None else (
+                self.rate + self._smoothing * (rate - self.rate))
+            self._t0, self._count0 = now, count
+        return self.rate
+
+
+class MeasurementWorker(RingWorker):
+    """Measures triggered records on a background thread.
+
+    submit(start, stop, luts, rate) with the record's ring range and the
+    calibrated LUT per channel.  latest() returns (results, stats) for the
+    most recent finished record, one dict per channel, or None.
+    """
+
+    def __init__(self, sample_ring):
+        super().__init__(sample_ring, "measurements")
+        self._stats = [{name: RunningStats() for name in MEASUREMENTS}
+                       for _ in range(sample_ring.channels)]
+        self._reset = False
+
+    def reset_stats(self):
+        self._reset = True
+
+    def _process(self, start: int, stop: int, luts: list,
+                 rate: float | None):
+        if self._reset:
+            self._reset = False
+            for channel in self._stats:
+                for stats in channel.values():
+                    stats.reset()
+
+        record = self._read(start, stop)
+        if record is None:
+            return None   # overwritten before we got to it
+
+        results, stats = [], []
+        for ch, lut in enumerate(luts):
+            values = measure(record[ch], lut, rate)
+            for name, value in values.items():
+                self._stats[ch][name].update(value)
+            results.append(values)
+            stats.append({name: s.summary()
+                          for name, s in self._stats[ch].items()})
+        return results, stats
@@ -0,0 +1,218 @@
+"""Process-wide counters and histograms for finding out why the scope
+stutters.
+
+Metrics are module-level objects bumped by whichever thread owns them,
+without locks: every metric has a single writer, and a reader that sees a
+value a moment stale doesn't care.  Counting is an attribute add, cheap
+enough to stay on unconditionally; anything that costs more (perf_counter
+calls, histogram observations in hot paths) is done only when `enabled`.
+Gauges are callbacks read at snapshot time, so existing counters such as
+SampleRing.overruns are exported without touching their hot paths.
+"""
+import json
+import logging
+import math
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "scope_"
+
+# seconds, for latencies and durations: 100 µs … 10 s
+TIME_BUCKETS = tuple(10.0 ** (e / 2) for e in range(-8, 3))
+# sizes in samples or bytes: 1 … 16 M
+SIZE_BUCKETS = tuple(float(4 ** e) for e in range(13))
+
+enabled  = False
+_metrics = {}   # name -> Counter | Histogram | Gauge, in registration order
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+class Counter:
+    __slots__ = ("name", "help", "value")
+
+    def __init__(self, name: str, help: str):
+        self.name  = name
+        self.help  = help
+        self.value = 0
+
+    def inc(self, n: int = 1):
+        self.value += n
+
+
+class Gauge:
+    __slots__ = ("name", "help", "fn")
+
+    def __init__(self, name: str, help: str, fn):
+        self.name = name
+        self.help = help
+        self.fn   = fn
+
+    @property
+    def value(self) -> float:
+        try:
+            return float(self.fn())
+        except Exception:
+            return math.nan
+
+
+class Histogram:
+    """Fixed buckets; counts[i] holds observations <= bounds[i], the last
+    one everything larger."""
+
+    __slots__ = ("name", "help", "bounds", "counts", "sum")
+
+    def __init__(self, name: str, help: str, bounds: tuple = TIME_BUCKETS):
+        self.name   = name
+        self.help   = help
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum    = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def quantile(self, q: float, since: list | None = None) -> float | None:
+        """Upper bound of the bucket holding quantile q, over everything
+        observed since the `counts` copy `since` (or ever)."""
+        counts = self.counts
+        if since is not None:
+            counts = [a - b for a, b in zip(counts, since)]
+        total = sum(counts)
+        if not total:
+            return None
+        seen = 0
+        for bound, n in zip(self.bounds + (math.inf,), counts):
+            seen += n
+            if seen >= q * total:
+                return bound
+        return math.inf
+
+
+def _format(value) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _register(metric):
+    _metrics[metric.name] = metric
+    return metric
+
+
+def counter(name: str, help: str) -> Counter:
+    return _metrics.get(name) or _register(Counter(name, help))
+
+
+def histogram(name: str, help: str, bounds: tuple = TIME_BUCKETS) -> Histogram:
+    return _metrics.get(name) or _register(Histogram(name, help, bounds))
+
+
+def gauge(name: str, help: str, fn) -> Gauge:
+    """Register (or re-point) a gauge read from fn() at snapshot time."""
+    return _register(Gauge(name, help, fn))
+
+
+def snapshot() -> dict:
+    snap = {}
+    for name, m in _metrics.items():
+        if isinstance(m, Histogram):
+            snap[name] = {"buckets": list(m.counts), "sum": m.sum}
+        else:
+            snap[name] = m.value
+    return snap
+
+
+def prometheus_text() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for name, m in _metrics.items():
+        full = PREFIX + name
+        kind = {Counter: "counter", Gauge: "gauge",
+                Histogram: "histogram"}[type(m)]
+        lines.append(f"# HELP {full} {m.help}")
+        lines.append(f"# TYPE {full} {kind}")
+        if isinstance(m, Histogram):
+            total = 0
+            for bound, n in zip(m.bounds + (math.inf,), m.counts):
+                total += n
+                le = _format(bound)
+                lines.append(f'{full}_bucket{{le="{le}"}} {total}')
+            lines.append(f"{full}_sum {_format(m.sum)}")
+            lines.append(f"{full}_count {total}")
+        else:
+            lines.append(f"{full} {_format(m.value)}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MetricsExporter:
+    """Appends a JSON snapshot to `path` every `interval` seconds and/or
+    serves prometheus_text() over HTTP on `address` (HOST:PORT)."""
+
+    def __init__(self, path: str | None = None, address: str | None = None,
+                 interval: float = 5.0):
+        self.path      = path
+        self.interval  = interval
+        self._server   = None
+        self._stop_evt = threading.Event()
+        self._thread   = None
+        if address:
+            host, _, port = address.rpartition(":")
+            self._server = ThreadingHTTPServer((host or "", int(port)),
+                                               _MetricsHandler)
+            threading.Thread(target=self._server.serve_forever, daemon=True,
+                             name="metrics-http").start()
+            logger.info("Serving metrics on http://%s/metrics", address)
+        if path:
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name="metrics-file")
+            self._thread.start()
+
+    def stop(self):
+        self._stop_evt.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _run(self):
+        while not self._stop_evt.wait(self.interval):
+            self._write()
+        self._write()
+
+    def _write(self):
+        try:
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"time": time.time(), **snapshot()}) + "\n")
+        except OSError as e:
+            logger.error("Metrics snapshot failed: %s", e)
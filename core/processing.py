@@ -0,0 +1,388 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from core import metrics
+from core.calibration import volts_to_code
+from core.decimate import minmax_decimate
+from core.measurements import RateMeter
+from core.persistence import PERSIST_SAMPLES, PersistenceMap
+from core.trigger import TriggerEngine
+from core.xy import XY_SAMPLES, XY_TRACE, XYMap
+
+logger = logging.getLogger(__name__)
+
+FRAME_PERIOD = 0.020   # s, the display's 50 FPS
+MIN_BINS     = 100
+
+_TICK_TIME   = metrics.histogram("processing_tick_seconds",
+                                 "Processing thread time per tick")
+_DRAIN_DEPTH = metrics.histogram("drain_samples",
+                                 "Samples drained from the ring per tick",
+                                 metrics.SIZE_BUCKETS)
+
+
+class Frame:
+    """One ready-to-draw screen: x in samples relative to the trigger, y as
+    (channels, points) display volts, the math channel's points if it's
+    on, and with persistence on a (channels, cols, rows) intensity image.
+    In XY mode `xy` is the (bins, bins) density image and, for short
+    records, `xy_trace` the record's (channels, span) display volts."""
+
+    def __init__(self, seq: int, x: np.ndarray, y: np.ndarray,
+                 trigger: int, made: float, image: np.ndarray | None = None,
+                 math: np.ndarray | None = None,
+                 xy: np.ndarray | None = None,
+                 xy_trace: np.ndarray | None = None):
+        self.seq      = seq
+        self.x        = x
+        self.y        = y
+        self.trigger  = trigger   # absolute sample index, -1 for none yet
+        self.made     = made      # time.monotonic() when published
+        self.image    = image
+        self.math     = math
+        self.xy       = xy
+        self.xy_trace = xy_trace
+
+
+class FrameProcessor:
+    """The stage between the sample ring and the screen, on its own thread.
+
+    Every FRAME_PERIOD it drains the ring, runs the trigger, copies out the
+    triggered record, decimates it and converts the result through the
+    display LUTs, then leaves the Frame in a one-deep slot for take().
+    NumPy releases the GIL for all the heavy lifting, so the GUI thread
+    stays responsive and only has to call setData.
+
+    The GUI changes settings with configure(); they're applied at the start
+    of the next tick.  With a SegmentStore in `segments`, every accepted
+    trigger is also copied into it until it's full; the trigger is held
+    off for one record so segments don't overlap, and Single acts like
+    Normal so the store keeps rearming.  With `persistence` set to
+    (y_range, decay seconds), every triggered record, not just the shown
+    one, is folded into a PersistenceMap published with each frame.
+    `math` = (MathChannel settings, calibrated LUTs) streams every drained
+    block through a math channel; its records are averaged, decimated and
+    scaled by `math_scale` = (gain, offset) like the channels.  With `xy`
+    set to (x_range, y_range, decay seconds), every drained block, not
+    just triggered records, is binned into an XYMap and frames are
+    published each tick even without a trigger.  `interleave` swaps the
+    source for an InterleavedRing over the same storage (or back with
+    None); luts must then hold CH1's alone, and math and XY, which need
+    CH2, are off.  A frame replaced before
+    the GUI took it counts as `dropped`, a tick that overran its period as
+    `late`.
+    """
+
+    def __init__(self, sample_ring, on_record=None,
+                 period: float = FRAME_PERIOD, hysteresis: float = 0):
+        self.frames    = 0
+        self.dropped   = 0
+        self.late      = 0
+        self.rate      = None   # measured input sample rate
+        self.on_record = on_record   # (ring, start, stop, rate) per record
+
+        self._ring     = sample_ring
+        self._raw_ring = sample_ring   # the ring when not interleaved
+        self._period   = period
+        self._trigger  = TriggerEngine()
+        self._trigger.hysteresis = hysteresis
+        self._rate     = RateMeter()
+        self._span_buf = np.empty((sample_ring.channels, 0),
+                                  dtype=sample_ring.dtype)
+        self._settings = {"luts": None, "trigger_level": 0.0,
+                          "trigger_mode": "Auto", "trigger_slope": "Rising",
+                          "span": 1000, "bins": 1000,
+                          "ac": (False,) * sample_ring.channels,
+                          "segments": None, "persistence": None,
+                          "math": None, "math_scale": (1.0, 0.0),
+                          "xy": None, "interleave": None,
+                          "running": True}
+        self._pending  = {}
+        self._arm      = False
+        self._codes    = None   # (x, y codes, mean codes, trigger) of the
+                                # last record, re-rendered on LUT changes
+        self._redraw   = False
+        self._math     = None   # MathChannel while the math channel is on
+        self._math_y   = None   # its last decimated record, volts
+        self._persist  = None   # PersistenceMap while persistence is on
+        self._persist_buf = None   # (k, channels, span) records per tick
+        self._xy       = None   # XYMap while XY mode is on
+        self._xy_codes = None   # last record's codes, if short enough to
+                                # draw as an XY line
+        self._last_tick   = time.monotonic()
+        self._last_xy     = self._last_tick
+        self._slot     = None
+        self._lock     = threading.Lock()
+        self._stop_evt = threading.Event()
+        self._thread   = None
+
+    # ── GUI side ──────────────────────────────────────────────────────────────
+
+    def configure(self, **settings):
+        unknown = settings.keys() - self._settings.keys()
+        if unknown:
+            raise KeyError(f"unknown settings: {sorted(unknown)}")
+        with self._lock:
+            self._pending.update(settings)
+
+    def arm(self):
+        self._arm = True
+
+    @property
+    def source(self):
+        """The ring records come from: the sample ring or, interleaved,
+        the view over it.  Ranges and rates refer to this ring."""
+        return self._ring
+
+    def take(self) -> Frame | None:
+        """The newest unseen frame, or None."""
+        with self._lock:
+            frame, self._slot = self._slot, None
+        return frame
+
+    def start(self):
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="processing")
+        self._thread.start()
+
+    def stop(self):
+        self._stop_evt.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    # ── processing thread ─────────────────────────────────────────────────────
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stop_evt.is_set():
+            t0 = time.perf_counter()
+            try:
+                self._apply_settings()
+                self._tick()
+            except Exception as e:
+                logger.error("Processing error: %s", e)
+            if metrics.enabled:
+                _TICK_TIME.observe(time.perf_counter() - t0)
+
+            next_tick += self._period
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                self.late += 1
+                next_tick = time.monotonic()   # don't try to catch up
+            else:
+                self._stop_evt.wait(delay)
+
+    def _apply_settings(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        s = self._settings
+        changed = {k for k, v in pending.items() if s[k] is not v}
+        s.update(pending)
+
+        trigger = self._trigger
+        if "interleave" in changed:
+            self._switch_source(s["interleave"])
+        if changed & {"span", "interleave"}:
+            span = s["span"]
+            channels = self._ring.channels
+            if (self._span_buf.shape[0] != channels or
+                    self._span_buf.shape[1] < span):
+                self._span_buf = np.empty((channels, span),
+                                          dtype=self._span_buf.dtype)
+            trigger.pre  = span // 2
+            trigger.post = span - span // 2
+            self._arm    = True
+        if changed & {"trigger_mode", "segments"}:
+            segmented    = s["segments"] is not None
+            single       = s["trigger_mode"] == "Single"
+            trigger.mode = "Normal" if segmented and single \
+                else s["trigger_mode"]
+            self._arm    = True
+        if changed & {"span", "segments"}:
+            trigger.holdoff = trigger.post if s["segments"] else 0
+        trigger.slope = s["trigger_slope"]
+        if self._arm:
+            self._arm = False
+            trigger.arm()
+        if changed & {"luts", "ac", "math_scale"}:
+            self._redraw = True
+        if changed & {"math", "interleave"}:
+            self._math   = None
+            self._math_y = None
+            if s["math"] is not None and s["interleave"] is None:
+                # imported on first use, like the Math panel it serves
+                from core.math_channels import MathChannel
+                settings, luts = s["math"]
+                self._math = MathChannel(settings, luts, self._ring.capacity,
+                                         self.rate)
+        if changed & {"persistence", "luts", "span", "bins", "interleave"}:
+            self._setup_persistence()
+        if changed & {"xy", "luts", "interleave"}:
+            self._setup_xy()
+
+    def _switch_source(self, view):
+        """Change between the two-channel ring and an interleaved view;
+        sample numbers change with it, so the stream state restarts."""
+        self._ring = view if view is not None else self._raw_ring
+        self._ring.skip()
+        self._trigger.restart()
+        self._rate   = RateMeter()
+        self._codes  = None
+        self._redraw = False
+
+    def _setup_persistence(self):
+        s = self._settings
+        if s["persistence"] is None or s["luts"] is None:
+            self._persist = self._persist_buf = None
+            return
+        span  = s["span"]
+        k     = max(1, PERSIST_SAMPLES // span)
+        shape = (k, self._ring.channels, span)
+        if self._persist_buf is None or self._persist_buf.shape != shape:
+            self._persist_buf = np.empty(shape, dtype=self._ring.dtype)
+        self._persist = PersistenceMap(span, max(s["bins"], MIN_BINS),
+                                       s["luts"], s["persistence"][0])
+        self._redraw  = True
+
+    def _setup_xy(self):
+        s = self._settings
+        self._xy_codes = None
+        if (s["xy"] is None or s["luts"] is None or
+                s["interleave"] is not None):
+            self._xy = None
+            return
+        x_range, y_range, _ = s["xy"]
+        self._xy      = XYMap(s["luts"], x_range, y_range)
+        self._last_xy = time.monotonic()
+        self._redraw  = True
+
+    def _tick(self):
+        s    = self._settings
+        rate = self.rate = self._rate.update(self._ring.write_pos)
+        if not s["running"] or s["luts"] is None:
+            # paused: keep up with the producer so resuming isn't an overrun
+            self._ring.skip()
+            return
+
+        # trigger on CH1 at the level the red line shows on screen
+        trigger       = self._trigger
+        trigger.level = volts_to_code(s["luts"][0], s["trigger_level"])
+        block, start  = self._ring.read_new()
+        if self._math is not None:
+            self._math.update_rate(rate)
+            self._math.feed(block, start)
+        if self._xy is not None:
+            self._feed_xy(block)
+        trig          = trigger.feed(block, start)
+        if metrics.enabled:
+            _DRAIN_DEPTH.observe(len(block))
+        store         = s["segments"]
+        if store is not None:
+            for t in trigger.last_triggers:
+                if store.full:
+                    break
+                store.capture(self._ring, int(t), rate)
+        if trig is not None:
+            first  = trig - trigger.pre
+            record = self._span_buf[:, :s["span"]]
+            if self._ring.read_range(first, trig + trigger.post,
+                                     out=record.T) is not None:
+                self._decimate(record, trig)
+                if self._math is not None:
+                    self._decimate_math(first, trig + trigger.post)
+                if self.on_record:
+                    self.on_record(self._ring, first, trig + trigger.post,
+                                   rate)
+
+        if self._persist is not None:
+            self._accumulate(trig)
+
+        if self._redraw and (self._codes is not None or self._xy is not None):
+            self._redraw = False
+            self._publish(self._render())
+
+    def _accumulate(self, trig: int | None):
+        now             = time.monotonic()
+        dt              = now - self._last_tick
+        self._last_tick = now
+        self._persist.decay(dt, self._settings["persistence"][1])
+
+        triggers = self._trigger.last_triggers
+        if not triggers.size and trig is not None:
+            triggers = (trig,)   # Auto free-running
+        buf, pre = self._persist_buf, self._trigger.pre
+        n = 0
+        for t in triggers[-len(buf):]:
+            first = int(t) - pre
+            if self._ring.read_range(first, first + buf.shape[2],
+                                     out=buf[n].T) is not None:
+                n += 1
+        self._persist.add(buf[:n])
+        self._redraw = True
+
+    def _feed_xy(self, block: np.ndarray):
+        now           = time.monotonic()
+        dt            = now - self._last_xy
+        self._last_xy = now
+        self._xy.decay(dt, self._settings["xy"][2])
+        self._xy.add(block[-XY_SAMPLES:])
+        self._redraw = True
+
+    def _decimate(self, record: np.ndarray, trig: int):
+        x, y = minmax_decimate(record, max(self._settings["bins"], MIN_BINS))
+        mean = record.mean(axis=1) if any(self._settings["ac"]) else None
+        self._codes  = (x - self._trigger.pre,
+                        y.copy() if y is record else y, mean, trig)
+        if self._xy is not None:
+            self._xy_codes = (record.copy() if record.shape[1] <= XY_TRACE
+                              else None)
+        self._redraw = True
+
+    def _decimate_math(self, start: int, stop: int):
+        record = self._math.record(start, stop)
+        if record is None:
+            self._math_y = None
+            return
+        record = self._math.average(record)
+        _, self._math_y = minmax_decimate(record,
+                                          max(self._settings["bins"], MIN_BINS))
+
+    def _render(self) -> Frame:
+        luts = self._settings["luts"]
+        if self._codes is not None:
+            x, codes, mean, trig = self._codes
+            y = np.empty(codes.shape, dtype=np.float32)
+            for ch, lut in enumerate(luts):
+                np.take(lut, codes[ch], out=y[ch])
+                if self._settings["ac"][ch]:
+                    m = mean[ch] if mean is not None else codes[ch].mean()
+                    y[ch] -= np.interp(m, np.arange(len(lut)), lut)
+        else:   # XY mode before the first trigger
+            x    = np.empty(0, dtype=np.int64)
+            y    = np.empty((self._ring.channels, 0), dtype=np.float32)
+            trig = -1
+        image = self._persist.image() if self._persist is not None else None
+        math  = None
+        if self._math_y is not None:
+            gain, offset = self._settings["math_scale"]
+            math = self._math_y * gain + offset
+        xy = trace = None
+        if self._xy is not None:
+            xy = self._xy.image()
+            if self._xy_codes is not None:
+                # XY is DC-coupled, like the density image under it
+                trace = np.stack([lut[codes] for lut, codes
+                                  in zip(luts, self._xy_codes)])
+        return Frame(self.frames, x, y, trig, time.monotonic(), image, math,
+                     xy, trace)
+
+    def _publish(self, frame: Frame):
+        with self._lock:
+            if self._slot is not None:
+                self.dropped += 1
+            self._slot = frame
+        self.frames += 1
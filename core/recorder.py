@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_VERSION = 1
+CAPTURE_DTYPE   = np.dtype('<u2')   # raw 14-bit codes, (n, 2) interleaved
+CHUNK_SAMPLES   = 1 << 22           # playback reads at most this much at once
+# one record per block as it arrived: index of its first sample, then
+# time.monotonic() and time.time() on arrival
+BLOCK_TIME_DTYPE = np.dtype([("sample", "<i8"), ("monotonic", "<f8"),
+                             ("wall", "<f8")])
+
+
+def _capture_paths(path: str) -> tuple[str, str]:
+    base = os.path.splitext(path)[0]
+    return base + ".json", base + ".bin"
+
+
+def _times_path(data_path: str) -> str:
+    return os.path.splitext(data_path)[0] + ".times"
+
+
+class CaptureRecorder:
+    """Streams decoded sample blocks to disk from a background thread.
+
+    `write` is meant to be used as (part of) a block_cb: it only queues the
+    block, so the asyncio receive thread never waits on the disk.  The
+    writer thread drains whatever has piled up and appends it to
+    <name>.bin in one write.  <name>.json holds the header (sample rate,
+    AFE settings, timestamps) and is rewritten when recording stops.
+    <name>.times gets a BLOCK_TIME_DTYPE record per block written, so
+    playback can tell when each stretch of samples arrived and where
+    dropped blocks left gaps.
+
+    If the disk can't keep up, whole blocks are dropped and counted in
+    `dropped_blocks` rather than stalling acquisition.  The data file is
+    opened and closed by the writer thread alone; `_lock` only orders
+    write() against stop(), so no block is queued after the end marker.
+    """
+
+    def __init__(self, max_pending: int = 1024):
+        self.dropped_blocks = 0
+        self._max_pending   = max_pending
+        self._active        = False
+        self._queue         = None
+        self._thread        = None
+        self._header        = None
+        self._header_path   = None
+        self._lock          = threading.Lock()
+
+    @property
+    def recording(self) -> bool:
+        return self._active
+
+    def start(self, path: str, metadata: dict | None = None) -> str:
+        """Begin a capture; returns the header path."""
+        if self._active:
+            self.stop()
+        header_path, data_path = _capture_paths(path)
+        os.makedirs(os.path.dirname(os.path.abspath(header_path)),
+                    exist_ok=True)
+
+        self._header = {
+            "version":     CAPTURE_VERSION,
+            "data_file":   os.path.basename(data_path),
+            "times_file":  os.path.basename(_times_path(data_path)),
+            "times_dtype": BLOCK_TIME_DTYPE.descr,
+            "dtype":       CAPTURE_DTYPE.str,
+            "channels":    2,
+            "adc_bits":    14,
+            "sample_rate": None,
+            "samples":     0,
+            "start_time":  datetime.now().isoformat(),
+            "stop_time":   None,
+            "metadata":    metadata or {},
+        }
+        self._header_path = header_path
+        self._write_header()
+
+        self.dropped_blocks = 0
+        self._queue  = queue.Queue(maxsize=self._max_pending)
+        self._thread = threading.Thread(
+            target=self._writer, args=(data_path, self._queue), daemon=True)
+        self._thread.start()
+        with self._lock:
+            self._active = True
+        logger.info("Recording to %s", data_path)
+        return header_path
+
+    def write(self, ch1: np.ndarray, ch2: np.ndarray):
+        with self._lock:
+            if not self._active:
+                return
+            try:
+                self._queue.put_nowait((time.monotonic(), time.time(),
+                                        ch1, ch2))
+            except queue.Full:
+                self.dropped_blocks += 1
+
+    def stop(self) -> dict | None:
+        """Finish the capture and return its header."""
+        with self._lock:
+            if not self._active:
+                return None
+            self._active = False
+        self._queue.put(None)   # may wait for the writer; write() won't
+        self._thread.join()
+        self._header["stop_time"] = datetime.now().isoformat()
+        self._header["dropped_blocks"] = self.dropped_blocks
+        self._write_header()
+        logger.info("Recorded %d samples", self._header["samples"])
+        return self._header
+
+    def _write_header(self):
+        with open(self._header_path, "w") as f:
+            json.dump(self._header, f, indent=2)
+
+    def _writer(self, data_path: str, q: queue.Queue):
+        t_first = t_last = None
+        first_len = total = 0
+        with open(data_path, "wb") as f, \
+                open(_times_path(data_path), "wb") as tf:
+            done = False
+            while not done:
+                batch = [q.get()]
+                while True:
+                    try:
+                        batch.append(q.get_nowait())
+                    except queue.Empty:
+                        break
+                if batch[-1] is None:
+                    batch.pop()
+                    done = True
+                if not batch:
+                    continue
+
+                n     = sum(len(ch1) for _, _, ch1, _ in batch)
+                out   = np.empty((n, 2), dtype=CAPTURE_DTYPE)
+                times = np.empty(len(batch), dtype=BLOCK_TIME_DTYPE)
+                i     = 0
+                for k, (mono, wall, ch1, ch2) in enumerate(batch):
+                    times[k] = (total + i, mono, wall)
+                    out[i:i + len(ch1), 0] = ch1
+                    out[i:i + len(ch1), 1] = ch2
+                    i += len(ch1)
+                try:
+                    f.write(out.data)
+                except OSError as e:
+                    logger.error("Capture write error: %s", e)
+                    self.dropped_blocks += len(batch)
+                    continue
+                try:
+                    tf.write(times.data)
+                except OSError as e:
+                    logger.error("Capture timestamp write error: %s", e)
+
+                if t_first is None:
+                    t_first, first_len = batch[0][0], len(batch[0][2])
+                t_last = batch[-1][0]
+                total += n
+
+        self._header["samples"] = total
+        if t_first is not None and t_last > t_first:
+            # blocks are stamped on arrival, so the first one has no interval
+            self._header["sample_rate"] = (total - first_len) / (t_last - t_first)
+
+
+class Capture:
+    """A recorded capture, memory-mapped for playback."""
+
+    def __init__(self, path: str):
+        header_path, _ = _capture_paths(path)
+        with open(header_path) as f:
+            self.header = json.load(f)
+        data_path = os.path.join(os.path.dirname(header_path),
+                                 self.header["data_file"])
+        dtype    = np.dtype(self.header["dtype"])
+        channels = self.header["channels"]
+        # trust the file size over the header: a crashed recording still
+        # plays back up to its last complete sample
+        n = os.path.getsize(data_path) // (dtype.itemsize * channels)
+        self.data = (np.memmap(data_path, dtype=dtype, mode='r',
+                               shape=(n, channels))
+                     if n else np.empty((0, channels), dtype=dtype))
+        self.block_times = self._load_times(os.path.dirname(header_path), n)
+
+    def _load_times(self, folder: str, n: int) -> np.ndarray:
+        """Per-block (sample, monotonic, wall) arrival times, BLOCK_TIME_DTYPE;
+        empty for captures recorded before they were kept."""
+        name = self.header.get("times_file")
+        path = name and os.path.join(folder, name)
+        if not path or not os.path.exists(path):
+            return np.empty(0, dtype=BLOCK_TIME_DTYPE)
+        dtype = np.dtype([tuple(f) for f in self.header["times_dtype"]])
+        count = os.path.getsize(path) // dtype.itemsize
+        times = np.fromfile(path, dtype=dtype, count=count)
+        return times[times["sample"] < n]   # same cut as the data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def sample_rate(self) -> float | None:
+        return self.header.get("sample_rate")
+
+    def minmax(self, start: int, stop: int,
+               bins: int) -> tuple[np.ndarray, np.ndarray]:
+        """Peak-detect [start, stop) down to 2 * bins points per channel.
+
+        Same output as core.decimate.minmax_decimate, but the file is read
+        in CHUNK_SAMPLES pieces so zooming out over a multi-gigabyte capture
+        never pulls it all into memory.
+        """
+        start = max(0, int(start))
+        stop  = min(len(self.data), int(stop))
+        if stop - start <= 2 * bins:
+            return (np.arange(start, stop),
+                    np.ascontiguousarray(self.data[start:stop].T))
+
+        edges = np.linspace(start, stop, bins + 1).astype(np.intp)
+        y     = np.empty((self.data.shape[1], 2 * bins), dtype=self.data.dtype)
+        b0 = 0
+        while b0 < bins:
+            # as many whole bins as fit in one chunk (at least one)
+            b1 = int(np.searchsorted(edges, edges[b0] + CHUNK_SAMPLES,
+                                     side='right')) - 1
+            b1 = min(max(b1, b0 + 1), bins)
+            block = np.ascontiguousarray(self.data[edges[b0]:edges[b1]].T)
+            local = edges[b0:b1] - edges[b0]
+            y[:, 2 * b0:2 * b1:2] = np.minimum.reduceat(block, local, axis=-1)
+            y[:, 2 * b0 + 1:2 * b1:2] = np.maximum.reduceat(block, local,
+                                                            axis=-1)
+            b0 = b1
+        return np.repeat(edges[:-1], 2), y
@@ -0,0 +1,134 @@
+import numpy as np
+
+
+class SampleRing:
+    """Single-producer / single-consumer ring of ADC sample blocks.
+
+    Storage is one preallocated (capacity, channels) array.  The producer
+    (asyncio receive thread) copies whole blocks in and only then publishes
+    the new write position; the consumer (GUI thread) copies out by absolute
+    sample index.  Both positions are plain ints, so under the GIL neither
+    side ever takes a lock.
+
+    NumPy copies release the GIL, so the producer can overwrite slots while
+    the consumer is copying them.  It guards against that like a seqlock:
+    before copying a block in, it publishes how far it is about to write
+    (`_write_end`), and after copying out the consumer rechecks that mark.
+    Any prefix of its copy that was, or was being, overwritten is dropped.
+    Samples overwritten before the consumer got to them are never returned
+    and are counted in `overruns`.
+    """
+
+    def __init__(self, capacity: int, channels: int = 2, dtype=np.uint16):
+        self.capacity   = int(capacity)
+        self.channels   = channels
+        self.overruns   = 0
+        self._data      = np.zeros((self.capacity, channels), dtype=dtype)
+        self._write_pos = 0   # total samples ever written (producer side)
+        self._write_end = 0   # end of the block being written, set first
+        self._read_pos  = 0   # consumer cursor
+
+    @property
+    def write_pos(self) -> int:
+        return self._write_pos
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    # ── producer ──────────────────────────────────────────────────────────────
+
+    def write(self, *columns):
+        """Append one block, given as one 1-D array per channel."""
+        n = len(columns[0])
+        if n == 0:
+            return
+        pos = self._write_pos
+        if n > self.capacity:
+            # only the tail can survive anyway
+            pos    += n - self.capacity
+            columns = [c[-self.capacity:] for c in columns]
+            n       = self.capacity
+
+        self._write_end = pos + n
+        i     = pos % self.capacity
+        first = min(n, self.capacity - i)
+        data  = self._data
+        for ch, col in enumerate(columns):
+            data[i:i + first, ch] = col[:first]
+            if first < n:
+                data[:n - first, ch] = col[first:]
+        self._write_pos = pos + n
+
+    # ── consumer ──────────────────────────────────────────────────────────────
+
+    def latest(self, n: int, out: np.ndarray | None = None) -> np.ndarray:
+        """Copy the newest (up to) n samples and mark everything as read."""
+        end   = self._write_pos
+        start = max(0, end - min(n, self.capacity))
+        block = self._copy(start, end, out)
+        torn  = self._advance(start, end)
+        return block[torn:]
+
+    def skip(self):
+        """Move the consumer cursor to now; unread samples are dropped
+        without counting as overruns."""
+        self._read_pos = self._write_pos
+
+    def read_new(self, out: np.ndarray | None = None) -> tuple[np.ndarray, int]:
+        """Copy every sample written since the last read.
+
+        Returns (block, start) where start is the absolute index of block[0].
+        If the producer lapped the consumer, or more is unread than fits in
+        `out`, the oldest unread samples are skipped and counted as
+        overruns.
+        """
+        end   = self._write_pos
+        start = max(self._read_pos, end - self.capacity)
+        if out is not None and end - start > len(out):
+            self.overruns += end - len(out) - start
+            start = end - len(out)
+        block = self._copy(start, end, out)
+        torn  = self._advance(start, end)
+        return block[torn:], start + torn
+
+    def read_range(self, start: int, stop: int,
+                   out: np.ndarray | None = None) -> np.ndarray | None:
+        """Copy samples [start, stop) by absolute index, without moving the
+        consumer cursor.  Returns None unless the whole range is still held.
+        """
+        if start < 0 or stop > self._write_pos or \
+                start < self._write_pos - self.capacity:
+            return None
+        block = self._copy(start, stop, out)
+        if start < self._write_end - self.capacity:
+            return None   # overwritten while copying
+        return block
+
+    def _advance(self, start: int, end: int) -> int:
+        """Move the cursor past a copy of [start, end); returns how many
+        samples at its head were overwritten meanwhile (torn)."""
+        # unread samples the producer had already overwritten …
+        lost = end - self.capacity - self._read_pos
+        # … and anything it overwrote, or began to, while we were copying
+        torn = min(max(self._write_end - self.capacity - start, 0),
+                   end - start)
+        if lost > 0:
+            self.overruns += lost
+        self.overruns += torn
+        self._read_pos = end
+        return torn
+
+    def _copy(self, start: int, end: int,
+              out: np.ndarray | None = None) -> np.ndarray:
+        n = end - start
+        if out is None:
+            out = np.empty((n, self.channels), dtype=self._data.dtype)
+        else:
+            out = out[:n]
+        i     = start % self.capacity
+        first = min(n, self.capacity - i)
+        out[:first] = self._data[i:i + first]
+        if first < n:
+            out[first:] = self._data[:n - first]
+        return out
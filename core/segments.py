@@ -0,0 +1,91 @@
+"""Segmented memory: fixed-length records around successive triggers."""
+import time
+
+import numpy as np
+
+from core.decimate import minmax_decimate
+
+MAX_SEGMENTS   = 10000
+SEGMENT_MEMORY = 512 << 20   # bytes a segmented acquisition may take
+
+
+class SegmentStore:
+    """Preallocated memory for a segmented acquisition.
+
+    Up to `segments` records of `length` samples per channel live in one
+    (segments, channels, length) block, with each segment's absolute
+    trigger index and wall-clock trigger time.  capture() copies a segment
+    from the ring straight into its slot, so acquiring allocates nothing.
+
+    Written only by the processing thread; other threads may read any
+    segment below `count`, which is bumped after the copy.
+    """
+
+    def __init__(self, segments: int, length: int, pre: int,
+                 channels: int = 2, dtype=np.uint16):
+        self.segments = segments
+        self.length   = length
+        self.pre      = pre
+        self.data     = np.empty((segments, channels, length), dtype=dtype)
+        self.triggers = np.zeros(segments, dtype=np.int64)
+        self.times    = np.zeros(segments)
+        self.count    = 0
+        self.missed   = 0   # triggers overwritten before they were copied
+
+    @classmethod
+    def fit(cls, segments: int, length: int, pre: int, channels: int = 2,
+            dtype=np.uint16) -> "SegmentStore":
+        """As many of `segments` as SEGMENT_MEMORY allows, at least one."""
+        size     = length * channels * np.dtype(dtype).itemsize
+        segments = max(1, min(segments, SEGMENT_MEMORY // size))
+        return cls(segments, length, pre, channels, dtype)
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.segments
+
+    def capture(self, ring, trig: int, rate: float | None = None) -> bool:
+        """Copy the segment around absolute trigger index `trig`."""
+        if self.full:
+            return False
+        i     = self.count
+        first = trig - self.pre
+        if ring.read_range(first, first + self.length,
+                           out=self.data[i].T) is None:
+            self.missed += 1
+            return False
+        now = time.time()
+        if rate:
+            now -= (ring.write_pos - trig) / rate
+        self.triggers[i] = trig
+        self.times[i]    = now
+        self.count       = i + 1
+        return True
+
+    def offsets(self, rate: float | None = None) -> np.ndarray:
+        """Trigger times relative to the first segment, in seconds; sample
+        accurate when the rate is known."""
+        if rate:
+            return (self.triggers[:self.count] - self.triggers[0]) / rate
+        return self.times[:self.count] - self.times[0]
+
+    def render(self, luts, bins: int,
+               index: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Display points for one segment, or every captured one overlaid
+        when index is None.
+
+        Returns (x, y) like a Frame: x in samples relative to the trigger,
+        y as (channels, points) volts.  Overlaid segments are separated by
+        NaN, for a single curve per channel drawn with connect="finite".
+        """
+        codes = (self.data[:self.count] if index is None
+                 else self.data[index:index + 1])
+        x, y  = minmax_decimate(codes, bins)
+        k, n  = len(codes), y.shape[-1]
+
+        xs = np.full((k, n + 1), np.nan)
+        xs[:, :n] = x - self.pre
+        ys = np.full((len(luts), k, n + 1), np.nan, dtype=np.float32)
+        for ch, lut in enumerate(luts):
+            ys[ch, :, :n] = lut[y[:, ch]]
+        return xs.ravel(), ys.reshape(len(luts), -1)
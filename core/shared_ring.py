@@ -0,0 +1,82 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core.ring_buffer import SampleRing
+
+_HEADER_WORDS = 8   # int64: write_pos, capacity, channels, itemsize,
+                    # write_end, reserved
+_HEADER_BYTES = _HEADER_WORDS * 8
+
+
+class SharedSampleRing(SampleRing):
+    """SampleRing whose storage lives in multiprocessing.shared_memory.
+
+    One process creates it and is the producer; any number of others
+    attach() by name and read with the usual consumer methods, each with
+    its own cursor.  Samples are never pickled or copied between
+    processes.  The header's two int64 positions form the seqlock of
+    SampleRing: the producer publishes the end of the block it's about to
+    write, copies it in, and only then bumps the write position.  Readers
+    recheck the first after copying and drop whatever was overwritten
+    meanwhile, exactly as within one process.
+    """
+
+    def __init__(self, capacity: int = 0, channels: int = 2, dtype=np.uint16,
+                 name: str | None = None, create: bool = True):
+        # storage comes from the shared block, so SampleRing.__init__ (which
+        # allocates its own) is deliberately not called
+        dtype = np.dtype(dtype)
+        if create:
+            size     = _HEADER_BYTES + int(capacity) * channels * dtype.itemsize
+            self.shm = shared_memory.SharedMemory(name=name, create=True,
+                                                  size=size)
+            header   = np.ndarray(_HEADER_WORDS, np.int64, self.shm.buf)
+            header[:] = (0, capacity, channels, dtype.itemsize, 0, 0, 0, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            header   = np.ndarray(_HEADER_WORDS, np.int64, self.shm.buf)
+            capacity, channels = int(header[1]), int(header[2])
+
+        self.capacity  = int(capacity)
+        self.channels  = channels
+        self.overruns  = 0
+        self._owner    = create
+        self._header   = header
+        self._data     = np.ndarray((self.capacity, channels), dtype,
+                                    self.shm.buf, offset=_HEADER_BYTES)
+        self._read_pos = 0
+
+    @classmethod
+    def attach(cls, name: str, dtype=np.uint16) -> "SharedSampleRing":
+        ring = cls(name=name, dtype=dtype, create=False)
+        ring._read_pos = ring.write_pos   # start from "now"
+        return ring
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def _write_pos(self) -> int:
+        return int(self._header[0])
+
+    @_write_pos.setter
+    def _write_pos(self, pos: int):
+        self._header[0] = pos
+
+    @property
+    def _write_end(self) -> int:
+        return int(self._header[4])
+
+    @_write_end.setter
+    def _write_end(self, pos: int):
+        self._header[4] = pos
+
+    def close(self):
+        """Unmap; the creating process also frees the block."""
+        # drop our views first, SharedMemory refuses to close while exported
+        self._header = self._data = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
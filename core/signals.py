@@ -0,0 +1,32 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Signal:
+    """Minimal Qt-free stand-in for pyqtSignal: connect() callables,
+    emit() calls them in order, synchronously, on the emitting thread.
+
+    A slot that raises is logged and skipped so one bad listener can't
+    stop the others.  UI code that needs the call on the GUI thread goes
+    through ui.qt_bridge instead of connecting widgets directly.
+    """
+
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def disconnect(self, slot=None):
+        if slot is None:
+            self._slots.clear()
+        else:
+            self._slots.remove(slot)
+
+    def emit(self, *args):
+        for slot in list(self._slots):
+            try:
+                slot(*args)
+            except Exception as e:
+                logger.error("Slot %r failed: %s", slot, e)
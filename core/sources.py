@@ -0,0 +1,182 @@
+import asyncio
+import logging
+
+import numpy as np
+
+from core.adc import ADC_COUNTS
+from core.command_client import CommandClient, encode_frames
+from core.recorder import Capture
+
+logger = logging.getLogger(__name__)
+
+WAVEFORMS  = ("sine", "square", "noise")
+ADC_MID    = ADC_COUNTS // 2
+ADC_MAX    = ADC_COUNTS - 1
+TICK       = 0.005     # pacing interval (s)
+MAX_BLOCK  = 1 << 18   # samples per tick cap, so a stalled loop can't burst
+
+# argument grammar of the `afe …` commands the firmware accepts
+_AFE_ARGS = {
+    "gain":        ("ch", "num"),
+    "offset":      ("ch", "num"),
+    "atten":       ("ch", ("1", "100")),
+    "coupling":    ("ch", ("ac", "dc")),
+    "trigger":     (("ac", "dc"),),
+    "interleaved": (("0", "1"),),
+}
+
+
+def afe_reply(cmd: str) -> str:
+    """Firmware-style OK / ERR reply line for a command."""
+    parts = cmd.split()
+    if len(parts) < 2 or parts[0] != "afe" or parts[1] not in _AFE_ARGS:
+        return f"ERR unknown command: {cmd}"
+    spec = _AFE_ARGS[parts[1]]
+    args = parts[2:]
+    if len(args) != len(spec):
+        return f"ERR usage: afe {parts[1]} " + " ".join(
+            "<ch>" if s == "ch" else "<n>" if s == "num" else "|".join(s)
+            for s in spec)
+    for arg, kind in zip(args, spec):
+        if kind == "ch":
+            ok = arg in ("1", "2")
+        elif kind == "num":
+            try:
+                float(arg)
+                ok = True
+            except ValueError:
+                ok = False
+        else:
+            ok = arg in kind
+        if not ok:
+            return f"ERR bad argument: {arg}"
+    return "OK"
+
+
+def synth_waveform(waveform: str, start: int, n: int, rate: float,
+                   freq: float, amplitude: float = 0.8,
+                   noise: float = 0.01) -> tuple[np.ndarray, np.ndarray]:
+    """ADC codes for samples [start, start + n) of a test signal.
+
+    CH2 carries the same waveform 90° behind CH1.  amplitude and noise are
+    fractions of full scale.
+    """
+    phase = 2 * np.pi * freq * (start + np.arange(n)) / rate
+    out   = []
+    for shift in (0.0, np.pi / 2):
+        if waveform == "sine":
+            v = np.sin(phase - shift)
+        elif waveform == "square":
+            v = np.where(np.sin(phase - shift) >= 0, 1.0, -1.0)
+        elif waveform == "noise":
+            v = np.random.standard_normal(n) / 3
+        else:
+            raise ValueError(f"unknown waveform: {waveform}")
+        v = amplitude * v
+        if noise:
+            v += np.random.standard_normal(n) * noise
+        out.append(np.clip(np.rint(ADC_MID + v * ADC_MID),
+                           0, ADC_MAX).astype(np.uint16))
+    return out[0], out[1]
+
+
+class PacedSource(CommandClient):
+    """Base for sources that stand in for the TCP device.
+
+    Samples are produced in real time at `rate`, encoded into wire frames
+    and pushed through CommandClient's own parser, with command replies
+    interleaved as text lines, so everything downstream of the socket runs
+    exactly as it would against hardware.
+    """
+
+    def __init__(self, rate: float, sample_cb=None, text_cb=None,
+                 block_cb=None):
+        super().__init__("local", 0, sample_cb=sample_cb, text_cb=text_cb,
+                         block_cb=block_cb)
+        self.rate     = rate
+        self._replies = []
+
+    def _samples(self, start: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+    def _reply(self, cmd: str) -> str:
+        return afe_reply(cmd)
+
+    async def connect(self):
+        self._mark_open()
+        logger.info("%s started at %.0f S/s", type(self).__name__, self.rate)
+        self._recv_task = asyncio.create_task(self._produce())
+
+    def _write(self, data: bytes):
+        # stands in for the socket: the "device" answers each line
+        for cmd in data.decode(errors="replace").splitlines():
+            if cmd.strip():
+                self._replies.append(self._reply(cmd.strip()))
+
+    async def _produce(self):
+        loop = asyncio.get_running_loop()
+        buf  = bytearray()
+        t0   = loop.time()
+        sent = 0
+        try:
+            while True:
+                due = int((loop.time() - t0) * self.rate)
+                n   = min(due - sent, MAX_BLOCK)
+                if n > 0:
+                    buf.extend(encode_frames(*self._samples(sent, n)))
+                    sent += n
+                if self._replies:
+                    replies, self._replies = self._replies, []
+                    buf.extend("".join(r + "\n" for r in replies).encode())
+                if buf:
+                    buf = self._parse_frames(buf)
+                await asyncio.sleep(TICK)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error("Source error: %s", e)
+        finally:
+            self._mark_closed()
+
+
+class GeneratorSource(PacedSource):
+    """Synthetic sine / square / noise signal at a configurable rate."""
+
+    def __init__(self, waveform: str = "sine", rate: float = 1e6,
+                 freq: float = 1e3, amplitude: float = 0.8,
+                 noise: float = 0.01, **callbacks):
+        if waveform not in WAVEFORMS:
+            raise ValueError(f"unknown waveform: {waveform}")
+        super().__init__(rate, **callbacks)
+        self.waveform  = waveform
+        self.freq      = freq
+        self.amplitude = amplitude
+        self.noise     = noise
+
+    def _samples(self, start: int, n: int):
+        return synth_waveform(self.waveform, start, n, self.rate, self.freq,
+                              self.amplitude, self.noise)
+
+
+class ReplaySource(PacedSource):
+    """Loops a recorded capture at its recorded (or a given) rate."""
+
+    def __init__(self, path: str, rate: float | None = None, **callbacks):
+        self._capture = Capture(path)
+        if not len(self._capture):
+            raise ValueError(f"empty capture: {path}")
+        super().__init__(rate or self._capture.sample_rate or 1e6, **callbacks)
+
+    def _samples(self, start: int, n: int):
+        data  = self._capture.data
+        total = len(data)
+        i     = start % total
+        if i + n <= total:
+            block = data[i:i + n]
+        else:
+            block = data[(i + np.arange(n)) % total]
+        return block[:, 0], block[:, 1]
+
+    def _reply(self, cmd: str) -> str:
+        reply = afe_reply(cmd)
+        return "ERR replay source is read-only" if reply == "OK" else reply
@@ -0,0 +1,122 @@
+from functools import lru_cache
+
+import numpy as np
+
+from core.background import RingWorker
+from core.decimate import minmax_decimate
+
+WINDOWS    = ("Hann", "Blackman", "Flat-top")
+AVERAGING  = ("None", "Linear", "Exponential", "Peak hold")
+FFT_SIZES  = tuple(1 << k for k in range(10, 21))   # 1 k … 1 M points
+DB_FLOOR   = 1e-12   # V² floor, keeps log10 finite (-120 dBV)
+
+# cosine-sum coefficients
+_COSINE_TERMS = {
+    "Hann":     (0.5, 0.5),
+    "Blackman": (0.42, 0.5, 0.08),
+    "Flat-top": (0.21557895, 0.41663158, 0.277263158, 0.083578947,
+                 0.006947368),
+}
+
+
+@lru_cache(maxsize=8)
+def window(name: str, n: int) -> np.ndarray:
+    """Periodic window of length n, scaled for amplitude: a full-scale sine
+    at a bin centre reads its true RMS after the rFFT.  Cached per size."""
+    phase = 2 * np.pi * np.arange(n) / n
+    w     = np.zeros(n)
+    for k, a in enumerate(_COSINE_TERMS[name]):
+        w += (-1) ** k * a * np.cos(k * phase)
+    # |X| * 2 / sum(w) is the peak amplitude; / sqrt(2) makes it RMS
+    w *= np.sqrt(2) / w.sum()
+    w  = w.astype(np.float32)
+    w.flags.writeable = False
+    return w
+
+
+@lru_cache(maxsize=16)
+def frequencies(n: int, rate: float) -> np.ndarray:
+    return np.fft.rfftfreq(n, 1.0 / rate)
+
+
+class SpectrumAverager:
+    """Combines successive power spectra (V² RMS per bin).
+
+    Linear       equal weight for every spectrum since the last reset
+    Exponential  weight 1 / count for the newest, i.e. a time constant of
+                 `count` spectra
+    Peak hold    highest value seen per bin
+    """
+
+    def __init__(self):
+        self.mode  = "None"
+        self.count = 16
+        self.reset()
+
+    def reset(self):
+        self._power = None
+        self._n     = 0
+
+    def add(self, power: np.ndarray) -> np.ndarray:
+        if (self.mode == "None" or self._power is None or
+                self._power.shape != power.shape):
+            self._power = power
+            self._n     = 1
+            return power
+        self._n += 1
+        if self.mode == "Linear":
+            self._power += (power - self._power) / self._n
+        elif self.mode == "Exponential":
+            self._power += (power - self._power) / min(self._n, self.count)
+        else:
+            np.maximum(self._power, power, out=self._power)
+        return self._power
+
+
+class SpectrumWorker(RingWorker):
+    """rFFT of the newest samples of every channel, off the GUI thread.
+
+    submit(stop, size, window_name, averaging, count, luts, rate, bins):
+    transforms samples [stop - size, stop) converted through the
+    calibrated LUTs.  latest() is (freqs, dbv) with both reduced to
+    min/max pairs over `bins` columns, so a 1 M-point spectrum plots as
+    fast as a short one without hiding narrow spurs.
+    """
+
+    def __init__(self, sample_ring):
+        super().__init__(sample_ring, "spectrum")
+        self._averagers = [SpectrumAverager()
+                           for _ in range(sample_ring.channels)]
+        self._settings  = None
+        self._reset     = False
+
+    def reset(self):
+        self._reset = True
+
+    def _process(self, stop: int, size: int, window_name: str,
+                 averaging: str, count: int, luts: list, rate: float | None,
+                 bins: int):
+        settings = (size, window_name, averaging)
+        if self._reset or settings != self._settings:
+            self._reset, self._settings = False, settings
+            for avg in self._averagers:
+                avg.reset()
+
+        record = self._read(stop - size, stop)
+        if record is None:
+            return None
+
+        w     = window(window_name, size)
+        power = []
+        for ch, lut in enumerate(luts):
+            spectrum = np.fft.rfft(lut[record[ch]] * w)
+            p        = spectrum.real ** 2 + spectrum.imag ** 2
+            p[[0, -1]] *= 0.5   # only DC and Nyquist have no mirror bin
+            avg       = self._averagers[ch]
+            avg.mode, avg.count = averaging, count
+            power.append(avg.add(p))
+
+        dbv  = 10 * np.log10(np.maximum(np.stack(power), DB_FLOOR))
+        freq = frequencies(size, rate) if rate else np.arange(size // 2 + 1)
+        x, y = minmax_decimate(dbv, bins)
+        return freq[x], y.astype(np.float32)
@@ -0,0 +1,140 @@
+import time
+
+import numpy as np
+
+TRIGGER_MODES  = ("Auto", "Normal", "Single")
+TRIGGER_SLOPES = ("Rising", "Falling")
+
+_NO_TRIGGERS = np.empty(0, dtype=np.int64)
+
+
+class TriggerEngine:
+    """Edge trigger over a stream of sample blocks.
+
+    Blocks are scanned with whole-array NumPy operations, never per sample.
+    A rising edge fires when the source crosses `level` after having been
+    below `level - hysteresis` (mirrored for falling), so noise riding on a
+    slow edge produces one trigger instead of a burst.  Positions are
+    absolute sample indices, which lets the caller fetch the pre/post window
+    straight from the SampleRing once `post` samples have arrived.
+
+    Modes:
+        Normal  – show the newest complete trigger, otherwise keep waiting
+        Single  – capture the first trigger after arm(), then freeze
+        Auto    – like Normal, but free-run after `auto_timeout` seconds
+                  without a trigger
+    """
+
+    def __init__(self, pre: int = 512, post: int = 512,
+                 auto_timeout: float = 0.1):
+        self.mode         = "Auto"
+        self.slope        = "Rising"
+        self.level        = 0.0
+        self.hysteresis   = 0.0
+        self.holdoff      = 0       # min samples between accepted triggers
+        self.source       = 0       # channel column to trigger on
+        self.pre          = pre
+        self.post         = post
+        self.auto_timeout = auto_timeout
+        self.armed        = True
+        # every trigger that completed during the last feed()
+        self.last_triggers = _NO_TRIGGERS
+
+        self._state        = 0      # -1 armed side of band, +1 fired side
+        self._next_allowed = 0      # holdoff boundary (absolute index)
+        self._pending      = _NO_TRIGGERS
+        self._last_fire    = time.monotonic()
+
+    def arm(self):
+        self.armed         = True
+        self._pending      = _NO_TRIGGERS
+        self.last_triggers = _NO_TRIGGERS
+        self._last_fire    = time.monotonic()
+
+    def restart(self):
+        """Forget the stream, for when its sample numbering changes."""
+        self._state        = 0
+        self._next_allowed = 0
+        self.arm()
+
+    def scan(self, x: np.ndarray, start: int) -> np.ndarray:
+        """Return absolute indices of edges in x (x[0] is sample `start`)."""
+        n = len(x)
+        if n == 0:
+            return _NO_TRIGGERS
+
+        if self.slope == "Rising":
+            below = x < self.level - self.hysteresis
+            above = x >= self.level
+        else:
+            below = x > self.level + self.hysteresis
+            above = x <= self.level
+
+        # hysteresis state: last band the signal was in, carried forward
+        events = above.astype(np.int8) - below.astype(np.int8)
+        last   = np.where(events != 0, np.arange(n), -1)
+        np.maximum.accumulate(last, out=last)
+        state  = np.where(last >= 0, events[last], self._state)
+
+        fired        = np.empty(n, dtype=bool)
+        fired[0]     = state[0] == 1 and self._state == -1
+        fired[1:]    = (state[1:] == 1) & (state[:-1] == -1)
+        self._state  = int(state[-1])
+
+        hits = np.flatnonzero(fired).astype(np.int64) + start
+        return self._apply_holdoff(hits)
+
+    def _apply_holdoff(self, hits: np.ndarray) -> np.ndarray:
+        i = int(np.searchsorted(hits, self._next_allowed))
+        if i == len(hits):
+            return _NO_TRIGGERS
+        if self.holdoff <= 0:
+            hits = hits[i:]
+            self._next_allowed = int(hits[-1]) + 1
+            return hits
+
+        # one iteration per *accepted* trigger, not per sample
+        accepted = []
+        while i < len(hits):
+            t = int(hits[i])
+            accepted.append(t)
+            i = int(np.searchsorted(hits, t + self.holdoff))
+        self._next_allowed = accepted[-1] + self.holdoff
+        return np.array(accepted, dtype=np.int64)
+
+    def feed(self, block: np.ndarray, start: int,
+             now: float | None = None) -> int | None:
+        """Scan a new block and decide what to show.
+
+        Returns the absolute index of the trigger point of the frame to
+        display (the frame is [t - pre, t + post)), or None to keep the
+        current frame.
+        """
+        if now is None:
+            now = time.monotonic()
+        end  = start + len(block)
+        x    = block[:, self.source] if block.ndim == 2 else block
+        hits = self.scan(x, start)
+
+        if self.mode == "Single" and not self.armed:
+            self.last_triggers = _NO_TRIGGERS
+            return None
+
+        if self._pending.size:
+            hits = np.concatenate((self._pending, hits))
+        complete = hits + self.post <= end
+        ready               = hits[complete]
+        self._pending       = hits[~complete]
+        self.last_triggers  = ready
+
+        if ready.size:
+            self._last_fire = now
+            if self.mode == "Single":
+                self.armed    = False
+                self._pending = _NO_TRIGGERS
+                return int(ready[0])
+            return int(ready[-1])
+
+        if self.mode == "Auto" and now - self._last_fire >= self.auto_timeout:
+            return end - self.post
+        return None
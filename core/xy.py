@@ -0,0 +1,61 @@
+"""XY display: CH1 against CH2 as a decaying 2-D density image."""
+import math
+
+import numpy as np
+
+XY_BINS    = 256         # bins per axis
+XY_SAMPLES = 1 << 20     # sample pairs folded in per tick, at most
+XY_TRACE   = 4096        # records up to this long are also drawn as a line
+
+
+class XYMap:
+    """Accumulates (CH1, CH2) sample pairs into a bins × bins histogram.
+
+    Like PersistenceMap, each channel's display LUT is turned into an ADC
+    code → bin LUT once per geometry, CH1 pre-multiplied by the row
+    length.  Folding in a block is two gathers, an add and one bincount,
+    so only the samples that arrived since the last tick are ever touched.
+    Pairs outside the view land in a discarded overflow bin.
+    """
+
+    def __init__(self, luts, x_range: tuple, y_range: tuple,
+                 bins: int = XY_BINS):
+        self.bins    = bins
+        self.x_range = x_range
+        self.y_range = y_range
+        self._size   = bins * bins
+        self.hist    = np.zeros(self._size, dtype=np.float32)
+        self._xbin   = self._code_bins(luts[0], x_range) * bins
+        self._ybin   = self._code_bins(luts[1], y_range)
+        self._xbin[self._xbin >= self._size] = self._size   # keep overflow
+
+    def _code_bins(self, lut: np.ndarray, v_range: tuple) -> np.ndarray:
+        v0, v1 = v_range
+        b = np.floor((lut - v0) * (self.bins / (v1 - v0)))
+        b[(b < 0) | (b >= self.bins)] = self._size   # overflow
+        return b.astype(np.intp)
+
+    def add(self, block: np.ndarray):
+        """Fold in a (n, channels) block of codes."""
+        if not len(block):
+            return
+        idx = self._xbin[block[:, 0]]
+        idx += self._ybin[block[:, 1]]
+        counts = np.bincount(idx, minlength=2 * self._size + 1)
+        self.hist += counts[:self._size]
+
+    def decay(self, dt: float, tau: float):
+        if math.isfinite(tau):
+            self.hist *= math.exp(-dt / tau)
+
+    def clear(self):
+        self.hist[:] = 0
+
+    def image(self) -> np.ndarray:
+        """(bins, bins) intensities in 0..1, indexed [CH1 bin, CH2 bin],
+        log-scaled like the persistence image."""
+        img  = np.log1p(self.hist)
+        peak = img.max()
+        if peak > 0:
+            img /= peak
+        return img.reshape(self.bins, self.bins)
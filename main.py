@@ -1,13 +1,21 @@
+from utils.profiling import StartupProfile   # first: starts the clock
+
 import sys
 import argparse
 import asyncio
 import logging
+import os
 import threading
-import queue
+from functools import partial
 
-from PyQt6.QtWidgets import QApplication
-from ui.oscilloscope import Oscilloscope
 from core.connection_manager import ConnectionManager
+from core.ring_buffer import SampleRing
+from core.recorder import CaptureRecorder
+from core.calibration import Calibration
+from core.sources import GeneratorSource, ReplaySource, WAVEFORMS
+from core.broker import Broker, POLICIES
+from core import metrics
+from core.metrics import MetricsExporter
 
 logger = logging.getLogger()
 
@@ -18,21 +26,176 @@ def parse_arguments():
     parser.add_argument("--ip", default="192.168.0.19",
                         help="Device IP address")
     parser.add_argument("--port", type=int, default=8888)
-    return parser.parse_args()
+    parser.add_argument("--record-length", type=int, default=1 << 24,
+                        help="Samples kept per channel (longest timebase "
+                             "shows 3/4 of this)")
+    parser.add_argument("--source", choices=("tcp", "replay", "generator"),
+                        default="tcp",
+                        help="Where samples come from (default: the device)")
+    parser.add_argument("--replay", metavar="CAPTURE",
+                        help="Capture .json to loop with --source replay")
+    parser.add_argument("--rate", type=float,
+                        help="Samples/s for replay or generator sources")
+    parser.add_argument("--wave", choices=WAVEFORMS, default="sine",
+                        help="Generator waveform")
+    parser.add_argument("--freq", type=float, default=1e3,
+                        help="Generator signal frequency (Hz)")
+    parser.add_argument("--calibration", metavar="FILE",
+                        help="Per-channel calibration JSON; created if "
+                             "missing and updated on exit")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print how long each startup stage took")
+    parser.add_argument("--acquisition-process", action="store_true",
+                        help="Receive and decode in a separate process that "
+                             "shares the sample ring with the GUI")
 
+    broker = parser.add_argument_group(
+        "broker", "Share the device with other local clients, which connect "
+                  "to the broker as if it were the device")
+    broker.add_argument("--broker", metavar="ADDR",
+                        help="Unix socket path or HOST:PORT to serve on")
+    broker.add_argument("--broker-policy", choices=POLICIES,
+                        default="drop-oldest",
+                        help="What a slow subscriber loses by default")
+    broker.add_argument("--broker-buffer", type=int, default=32, metavar="MiB",
+                        help="Queue per subscriber before the policy applies")
 
-def main():
-    options = parse_arguments()
-    logging.basicConfig(level=logging.DEBUG if options.debug else logging.INFO)
-    logger.info("Starting oscilloscope application")
+    stats = parser.add_argument_group(
+        "metrics", "Counters and latency histograms; timing is only "
+                   "collected when one of these is given")
+    stats.add_argument("--metrics-overlay", action="store_true",
+                       help="Show rate, FPS, drops and latency on the plot")
+    stats.add_argument("--metrics-file", metavar="FILE",
+                       help="Append a JSON snapshot every interval")
+    stats.add_argument("--metrics-http", metavar="HOST:PORT",
+                       help="Serve Prometheus text on /metrics")
+    stats.add_argument("--metrics-interval", type=float, default=5.0,
+                       help="Seconds between --metrics-file snapshots")
+
+    headless = parser.add_argument_group(
+        "headless", "Acquire without a GUI (PyQt6 is never imported)")
+    headless.add_argument("--headless", action="store_true")
+    headless.add_argument("--output", metavar="CAPTURE",
+                          help="Record everything to this capture")
+    headless.add_argument("--stream", metavar="ADDR",
+                          help="Serve raw samples on a unix socket path or "
+                               "HOST:PORT")
+    headless.add_argument("--commands", metavar="FILE",
+                          help="Command script sent on every connect")
+    headless.add_argument("--command", action="append", default=[],
+                          metavar="CMD", help="Command sent on every connect "
+                                              "(repeatable, after --commands)")
+    headless.add_argument("--stats-interval", type=float, default=5.0,
+                          help="Seconds between throughput reports")
+    headless.add_argument("--duration", type=float,
+                          help="Stop after this many seconds")
+    options = parser.parse_args()
+    if options.source == "replay" and not options.replay:
+        parser.error("--source replay needs --replay CAPTURE")
+    if options.headless and not (options.output or options.stream or
+                                 options.broker):
+        parser.error("--headless needs --output, --stream or --broker")
+    return options
+
+
+def make_client_factory(options):
+    """Sample source for ConnectionManager, or None for the TCP device."""
+    if options.source == "replay":
+        return partial(ReplaySource, options.replay, rate=options.rate)
+    if options.source == "generator":
+        return partial(GeneratorSource, waveform=options.wave,
+                       rate=options.rate or 1e6, freq=options.freq)
+    return None
+
+
+def broker_args(options) -> dict | None:
+    if not options.broker:
+        return None
+    return {"address": options.broker, "policy": options.broker_policy,
+            "buffer": options.broker_buffer << 20}
+
+
+def run_headless(options) -> int:
+    from core.daemon import HeadlessDaemon, load_commands
+
+    commands = load_commands(options.commands) if options.commands else []
+    daemon   = HeadlessDaemon(output=options.output, stream=options.stream,
+                              commands=commands + options.command,
+                              stats_interval=options.stats_interval,
+                              broker=broker_args(options))
+    conn_mgr = ConnectionManager(block_cb=daemon.on_block,
+                                 client_factory=make_client_factory(options))
+    asyncio.run(daemon.run(conn_mgr, options.ip, options.port,
+                           duration=options.duration))
+    return 0
+
+
+def load_calibration(options) -> Calibration:
+    if options.calibration and os.path.exists(options.calibration):
+        logger.info("Loaded calibration from %s", options.calibration)
+        return Calibration.load(options.calibration)
+    return Calibration()
+
+
+def start_metrics(options) -> MetricsExporter | None:
+    if options.metrics_overlay or options.metrics_file or options.metrics_http:
+        metrics.enable()
+    if options.metrics_file or options.metrics_http:
+        return MetricsExporter(options.metrics_file, options.metrics_http,
+                               options.metrics_interval)
+    return None
+
+
+def show_window(options, profile: StartupProfile, conn_mgr, sample_ring,
+                recorder, calibration) -> int:
+    """Import Qt, build the window and run the event loop.  Called once
+    the connection is under way, so the two overlap."""
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QTimer
+    profile.mark("import PyQt6")
+    import pyqtgraph   # noqa: F401  (timed on its own)
+    profile.mark("import pyqtgraph")
+    from ui.oscilloscope import Oscilloscope
+    profile.mark("import ui")
+
+    app = QApplication(sys.argv)
+    profile.mark("QApplication")
+    osc = Oscilloscope(conn_mgr, sample_ring, recorder, calibration,
+                       metrics_overlay=options.metrics_overlay)
+    profile.mark("build window")
+    osc.show()
 
-    sample_queue: queue.Queue = queue.Queue(maxsize=4096)
+    def first_turn():
+        profile.mark("first event loop turn")
+        profile.report()
+    QTimer.singleShot(0, first_turn)
+    return app.exec()
 
-    def on_sample(ch1: int, ch2: int):
-        try:
-            sample_queue.put_nowait((ch1, ch2))
-        except queue.Full:
-            pass
+
+def mark_connected(profile: StartupProfile, conn_mgr):
+    def on_connected():
+        conn_mgr.connected.disconnect(on_connected)
+        profile.mark("device connected")
+    if profile.enabled:
+        conn_mgr.connected.connect(on_connected)
+
+
+def run_gui(options, profile: StartupProfile) -> int:
+    if options.acquisition_process:
+        return run_gui_split(options, profile)
+
+    sample_ring = SampleRing(options.record_length)
+    recorder    = CaptureRecorder()
+    calibration = load_calibration(options)
+    broker      = None
+    metrics.gauge("recorder_dropped_blocks", "Blocks the recorder dropped",
+                  lambda: recorder.dropped_blocks)
+
+    def on_block(ch1, ch2):
+        sample_ring.write(ch1, ch2)
+        recorder.write(ch1, ch2)
+        if broker:
+            broker.on_block(ch1, ch2)
 
     async_loop = asyncio.new_event_loop()
 
@@ -43,20 +206,82 @@ def main():
     loop_thread = threading.Thread(target=run_loop, daemon=True)
     loop_thread.start()
 
-    app = QApplication(sys.argv)
-
-    conn_mgr = ConnectionManager(sample_cb=on_sample)
-    osc = Oscilloscope(conn_mgr, sample_queue)
-    osc.show()
-
+    # connect first: the handshake runs while Qt loads and the UI is built
+    conn_mgr = ConnectionManager(block_cb=on_block,
+                                 client_factory=make_client_factory(options))
+    mark_connected(profile, conn_mgr)
+    if options.broker:
+        broker = Broker(conn_mgr, **broker_args(options))
+        asyncio.run_coroutine_threadsafe(broker.start(), async_loop).result(5)
     conn_mgr.start(async_loop, ip=options.ip, port=options.port)
+    profile.mark("connection started")
 
-    ret = app.exec()
+    ret = show_window(options, profile, conn_mgr, sample_ring, recorder,
+                      calibration)
 
+    recorder.stop()
+    if broker:
+        asyncio.run_coroutine_threadsafe(broker.close(),
+                                         async_loop).result(5)
+    if options.calibration:
+        calibration.save(options.calibration)
     conn_mgr.stop()
     async_loop.call_soon_threadsafe(async_loop.stop)
     loop_thread.join(timeout=2)
+    return ret
+
+
+def run_gui_split(options, profile: StartupProfile) -> int:
+    """GUI with acquisition in a child process: samples arrive through a
+    shared-memory ring, commands and events through a pipe."""
+    from core.acquisition_process import RemoteConnectionManager, RingTap
+    from core.shared_ring import SharedSampleRing
 
+    sample_ring = SharedSampleRing(options.record_length)
+    recorder    = CaptureRecorder()
+    calibration = load_calibration(options)
+    metrics.gauge("recorder_dropped_blocks", "Blocks the recorder dropped",
+                  lambda: recorder.dropped_blocks)
+
+    # the recorder reads the ring with its own cursor, only while recording
+    tap = RingTap(sample_ring.name, recorder.write,
+                  enabled=lambda: recorder.recording)
+
+    conn_mgr = RemoteConnectionManager(
+        sample_ring, client_factory=make_client_factory(options),
+        broker=broker_args(options))
+    mark_connected(profile, conn_mgr)
+    conn_mgr.start(None, ip=options.ip, port=options.port)
+    profile.mark("acquisition process started")
+
+    ret = show_window(options, profile, conn_mgr, sample_ring, recorder,
+                      calibration)
+
+    tap.stop()
+    recorder.stop()
+    if options.calibration:
+        calibration.save(options.calibration)
+    conn_mgr.stop()
+    sample_ring.close()
+    return ret
+
+
+def main():
+    options = parse_arguments()
+    logging.basicConfig(level=logging.DEBUG if options.debug else logging.INFO)
+    exporter = start_metrics(options)
+    try:
+        if options.headless:
+            logger.info("Starting headless acquisition")
+            ret = run_headless(options)
+        else:
+            profile = StartupProfile(options.profile_startup)
+            profile.mark("python + core imports")
+            logger.info("Starting oscilloscope application")
+            ret = run_gui(options, profile)
+    finally:
+        if exporter:
+            exporter.stop()
     sys.exit(ret)
 
 
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from core.command_client import MAX_IN_FLIGHT, CommandClient
+
+
+class _Transport:
+    def __init__(self):
+        self.sent    = []
+        self.aborted = False
+
+    def write(self, data: bytes):
+        self.sent.append(data)
+
+    def is_closing(self) -> bool:
+        return self.aborted
+
+    def abort(self):
+        self.aborted = True
+
+
+def _client() -> tuple[CommandClient, _Transport]:
+    client = CommandClient("localhost", 0, idle_timeout=0)
+    client._transport = _Transport()
+    client._mark_open()
+    return client, client._transport
+
+
+def _reply(client: CommandClient, *lines: str):
+    buf = bytearray("".join(f"{line}\n" for line in lines).encode())
+    client._consume(buf, 0, len(buf))
+
+
+def test_late_reply_does_not_shift_the_next_command():
+    async def run():
+        client, _ = _client()
+        slow = client.request("status", timeout=0.05)
+        await asyncio.sleep(0)   # let the first command go out alone
+        await asyncio.sleep(0.1)
+        with pytest.raises(TimeoutError):
+            slow.result()
+
+        fast = client.request("afe atten 1 100", timeout=1.0)
+        await asyncio.sleep(0)
+        _reply(client, "OK status", "OK atten")
+        assert await fast == "OK atten"
+
+    asyncio.run(run())
+
+
+def test_timeout_is_per_request():
+    async def run():
+        client, _ = _client()
+        short = client.request("a", timeout=0.02)
+        long  = client.request("b", timeout=1.0)
+        await asyncio.sleep(0.05)
+        assert isinstance(short.exception(), TimeoutError)
+        assert not long.done()
+        _reply(client, "OK a", "OK b")
+        assert await long == "OK b"
+
+    asyncio.run(run())
+
+
+def test_full_pipeline_of_overdue_commands_drops_the_link():
+    async def run():
+        client, transport = _client()
+        stuck = [client.request(f"cmd {i}", timeout=0.01)
+                 for i in range(MAX_IN_FLIGHT)]
+        await asyncio.sleep(0.05)
+        assert all(isinstance(f.exception(), TimeoutError) for f in stuck)
+        waiting = client.request("next")
+        await asyncio.sleep(0)
+        assert transport.aborted and not client.connected
+        with pytest.raises(ConnectionError):
+            await waiting
+
+    asyncio.run(run())
@@ -0,0 +1,100 @@
+import time
+
+import numpy as np
+
+from core.calibration import Calibration, InterleaveCorrection
+from core.interleave import InterleavedRing
+from core.measurements import MeasurementWorker
+from core.processing import FrameProcessor
+from core.ring_buffer import SampleRing
+from core.spectrum import SpectrumWorker
+
+ADC_RATE = 1e6     # per ADC; interleaved is twice this
+FREQ     = 12.5e3
+SAMPLES  = 1 << 16  # per ADC
+GAIN, OFFSET = 1.02, 37.0
+
+
+def _sine_ring() -> SampleRing:
+    """ADC A and B sampling one sine alternately, B with a mismatch."""
+    t     = np.arange(2 * SAMPLES) / (2 * ADC_RATE)
+    codes = 8192 + 5000 * np.sin(2 * np.pi * FREQ * t)
+    ring  = SampleRing(SAMPLES)
+    ring.write(np.rint(codes[0::2]).astype(np.uint16),
+               np.rint(codes[1::2] * GAIN + OFFSET).astype(np.uint16))
+    return ring
+
+
+def _result(worker, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while worker.latest() is None and time.monotonic() < deadline:
+        time.sleep(0.005)
+    worker.stop()
+    return worker.latest()
+
+
+def test_view_is_the_merged_stream():
+    ring = _sine_ring()
+    view = InterleavedRing(ring)
+    assert view.capacity == 2 * ring.capacity
+    assert view.write_pos == 2 * ring.write_pos
+    merged = view.read_range(100, 110)[:, 0]
+    raw    = ring.read_range(50, 55)
+    assert np.array_equal(merged, raw.reshape(-1))
+
+
+def test_correction_removes_mismatch_spur():
+    ring = _sine_ring()
+    view = InterleavedRing(ring)
+    est  = InterleaveCorrection.estimate(view.read_range(0, 2 * SAMPLES)[:, 0])
+    assert abs(est.gain - GAIN) < 1e-3 and abs(est.offset - OFFSET) < 1
+
+    def nyquist_spur(codes):
+        x = codes.astype(np.float64)
+        x = np.abs(np.fft.rfft((x - x.mean()) * np.hanning(len(x))))
+        return 20 * np.log10(x[-4:].max() / x.max())
+
+    before = nyquist_spur(view.read_range(0, 2 * SAMPLES)[:, 0])
+    view.correction = est.lut()
+    after  = nyquist_spur(view.read_range(0, 2 * SAMPLES)[:, 0])
+    assert before > -40 and after < -90
+
+
+def test_workers_follow_the_processor_source():
+    """Toggling interleave: the processor's records and the workers built
+    over its source agree on ranges and rate."""
+    ring  = _sine_ring()
+    lut   = Calibration().channels[0].lut()
+    view  = InterleavedRing(ring, InterleaveCorrection(GAIN, OFFSET).lut())
+    seen  = []
+    proc  = FrameProcessor(ring, on_record=lambda *a: seen.append(a))
+    proc.configure(luts=[lut, lut], span=4000, trigger_mode="Normal")
+    proc._apply_settings()
+    assert proc.source is ring
+    proc.configure(interleave=view, luts=[lut])
+    proc._apply_settings()
+    assert proc.source is view
+
+    # the processor only looks at samples written after the switch
+    t     = np.arange(2 * SAMPLES, 4 * SAMPLES) / (2 * ADC_RATE)
+    codes = 8192 + 5000 * np.sin(2 * np.pi * FREQ * t)
+    ring.write(np.rint(codes[0::2]).astype(np.uint16),
+               np.rint(codes[1::2] * GAIN + OFFSET).astype(np.uint16))
+    proc._tick()
+    assert seen
+    source, start, stop, _ = seen[-1]
+    assert source is view and stop <= view.write_pos
+
+    measure = MeasurementWorker(proc.source)
+    measure.submit(start, stop, [lut], 2 * ADC_RATE)
+    results, _ = _result(measure)
+    assert len(results) == 1
+    assert abs(results[0]["freq"] / FREQ - 1) < 1e-3
+
+    size     = 1 << 14
+    spectrum = SpectrumWorker(proc.source)
+    spectrum.submit(view.write_pos, size, "Hann", "None", 1, [lut],
+                    2 * ADC_RATE, size // 2 + 1)
+    freqs, dbv = _result(spectrum)
+    bin_width  = 2 * ADC_RATE / size
+    assert abs(freqs[np.argmax(dbv[0])] - FREQ) <= bin_width
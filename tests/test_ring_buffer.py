@@ -0,0 +1,78 @@
+import numpy as np
+
+from core.ring_buffer import SampleRing
+
+
+def _write(ring: SampleRing, start: int, n: int):
+    codes = np.arange(start, start + n, dtype=np.uint16)
+    ring.write(codes, codes)
+
+
+def test_read_new_returns_everything_unread():
+    ring = SampleRing(100)
+    _write(ring, 0, 30)
+    block, start = ring.read_new()
+    assert start == 0 and len(block) == 30
+    _write(ring, 30, 10)
+    block, start = ring.read_new()
+    assert start == 30 and np.array_equal(block[:, 0], np.arange(30, 40))
+    assert ring.overruns == 0
+
+
+def test_read_new_counts_lapped_samples():
+    ring = SampleRing(100)
+    _write(ring, 0, 150)
+    block, start = ring.read_new()
+    assert start == 50 and len(block) == 100
+    assert ring.overruns == 50
+
+
+def test_read_new_counts_samples_skipped_for_a_short_out():
+    ring = SampleRing(100)
+    _write(ring, 0, 60)
+    out = np.empty((25, 2), dtype=np.uint16)
+    block, start = ring.read_new(out=out)
+    assert start == 35 and np.array_equal(block[:, 0], np.arange(35, 60))
+    assert ring.overruns == 35
+    _write(ring, 60, 10)
+    block, start = ring.read_new(out=out)
+    assert start == 60 and len(block) == 10
+    assert ring.overruns == 35
+
+
+def test_read_new_short_out_after_a_lap_counts_each_sample_once():
+    ring = SampleRing(100)
+    _write(ring, 0, 150)
+    out = np.empty((20, 2), dtype=np.uint16)
+    block, start = ring.read_new(out=out)
+    assert start == 130 and len(block) == 20
+    assert ring.overruns == 130
+
+
+class _RacyRing(SampleRing):
+    """Lets the producer write `race` samples in the middle of a copy."""
+
+    race = 0
+
+    def _copy(self, start, end, out=None):
+        if self.race:
+            n, self.race = self.race, 0
+            _write(self, self._write_pos, n)
+        return super()._copy(start, end, out)
+
+
+def test_read_new_drops_samples_overwritten_while_copying():
+    ring = _RacyRing(100)
+    _write(ring, 0, 100)
+    ring.race = 30
+    block, start = ring.read_new()
+    assert start == 30 and np.array_equal(block[:, 0], np.arange(30, 100))
+    assert ring.overruns == 30
+
+
+def test_read_range_rejects_a_block_being_overwritten():
+    ring = SampleRing(100)
+    _write(ring, 0, 100)
+    ring._write_end = 110   # producer has published, not yet finished
+    assert ring.read_range(0, 50) is None
+    assert ring.read_range(10, 50) is not None
@@ -0,0 +1,405 @@
+"""Headless acquisition benchmarks: per-stage throughput and end-to-end latency.
+
+    python -m tools.benchmark --json bench.json
+    python -m tools.benchmark --stages e2e --rate 5e6 --duration 10
+    python -m tools.benchmark --compare baseline.json
+
+Stages:
+    parse     the client's receive protocol fed in-memory frame bytes
+    handoff   block_cb -> SampleRing -> consumer read
+    convert   calibrated display LUT gather + AC mean removal (and the
+              per-sample formula it replaced, for comparison)
+    decimate  min/max decimation of a record to screen width
+    setdata   pyqtgraph setData + repaint on an offscreen Qt platform
+    e2e       fw_emulator subprocess -> socket -> ring -> FrameProcessor ->
+              "screen" loop
+
+Throughput is reported as samples/s (one sample = one CH1/CH2 pair).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from core.adc import raw_to_volts
+from core.calibration import ChannelCalibration, display_lut
+from core.command_client import CommandClient, _FrameProtocol, encode_frames
+from core.decimate import minmax_decimate
+from core.processing import FrameProcessor
+from core.ring_buffer import SampleRing
+from core.sources import synth_waveform
+
+REPO_ROOT     = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES        = ("parse", "handoff", "convert", "decimate", "setdata", "e2e")
+SCREEN_BINS   = 1000       # ~ plot width in pixels
+FRAME_PERIOD  = 0.020      # the GUI's 50 FPS timer
+E2E_SPAN      = 1 << 16    # samples shown per frame in the e2e run
+
+
+def _signal(n: int) -> tuple[np.ndarray, np.ndarray]:
+    return synth_waveform("sine", 0, n, 1e6, 1e3)
+
+
+def _rate(samples: int, seconds: list[float]) -> float:
+    return samples / float(np.median(seconds))
+
+
+def _repeat(fn, repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+# ── stages ────────────────────────────────────────────────────────────────────
+
+def bench_parse(n: int, repeat: int, chunks=(256, 65536)) -> dict:
+    """Socket reads of `chunk` bytes, copied in where the kernel would."""
+    data   = encode_frames(*_signal(n)) + b"OK\n"
+    result = {}
+    for chunk in chunks:
+        got    = [0]
+        client = CommandClient("bench", 0,
+                               block_cb=lambda a, b: got.__setitem__(
+                                   0, got[0] + len(a)))
+        proto  = _FrameProtocol(client)
+
+        def run():
+            i = 0
+            while i < len(data):
+                view = proto.get_buffer(-1)
+                k    = min(chunk, len(view), len(data) - i)
+                view[:k] = data[i:i + k]
+                proto.buffer_updated(k)
+                i += k
+
+        times = _repeat(run, repeat)
+        assert got[0] == n * repeat, "parser lost samples"
+        result[f"chunk_{chunk}"] = {"samples_per_s": _rate(n, times)}
+    result["samples_per_s"] = min(v["samples_per_s"] for v in result.values())
+    return result
+
+
+def bench_handoff(n: int, repeat: int, block: int = 4096,
+                  reads_every: int = 8) -> dict:
+    ch1, ch2 = _signal(block)
+    blocks   = n // block
+    ring     = SampleRing(1 << 20)
+
+    def run():
+        for i in range(blocks):
+            ring.write(ch1, ch2)
+            if i % reads_every == 0:
+                ring.read_new()
+        ring.read_new()
+
+    times = _repeat(run, repeat)
+    return {"samples_per_s": _rate(blocks * block, times),
+            "us_per_block": float(np.median(times)) / blocks * 1e6,
+            "overruns": ring.overruns}
+
+
+def bench_convert(n: int, repeat: int) -> dict:
+    codes = _signal(n)[0]
+    gain, offset, vpos = 1.5, 0.1, -0.2
+    cal = ChannelCalibration(offset=0.003, gain_error=0.002,
+                             inl=[[0, 0.0], [8192, 0.001], [16383, 0.0]])
+    lut = display_lut(cal, gain, offset + vpos)
+
+    def run_formula():
+        v = raw_to_volts(codes).astype(np.float32)
+        v = v * gain + offset + vpos
+        v -= np.mean(v)
+
+    def run_lut():
+        v = lut[codes]
+        v -= np.mean(v)
+
+    rebuild = _repeat(lambda: display_lut(cal, gain, offset + vpos), repeat)
+    return {"samples_per_s": _rate(n, _repeat(run_lut, repeat)),
+            "formula_samples_per_s": _rate(n, _repeat(run_formula, repeat)),
+            "lut_rebuild_ms": float(np.median(rebuild)) * 1e3}
+
+
+def bench_decimate(n: int, repeat: int) -> dict:
+    record = np.ascontiguousarray(np.stack(_signal(n)))
+    times  = _repeat(lambda: minmax_decimate(record, SCREEN_BINS), repeat)
+    return {"samples_per_s": _rate(n, times), "bins": SCREEN_BINS}
+
+
+def _offscreen_plot():
+    """(app, widget, curve) on Qt's offscreen platform, or None."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        import pyqtgraph as pg
+        from PyQt6.QtWidgets import QApplication
+    except ImportError:
+        return None
+    app    = QApplication.instance() or QApplication([])
+    widget = pg.PlotWidget()
+    widget.resize(SCREEN_BINS, 600)
+    widget.show()
+    return app, widget, widget.plot(pen='y')
+
+
+def bench_setdata(repeat: int, points=(2 * SCREEN_BINS, 20000)) -> dict:
+    plot = _offscreen_plot()
+    if plot is None:
+        return {"skipped": "PyQt6/pyqtgraph not installed"}
+    app, _, curve = plot
+    result = {}
+    for n in points:
+        x = np.arange(n)
+        y = raw_to_volts(_signal(n)[0]).astype(np.float32)
+
+        def run():
+            curve.setData(x, y)
+            app.processEvents()
+
+        times = _repeat(run, repeat)
+        result[f"points_{n}"] = {"ms_per_frame": float(np.median(times)) * 1e3,
+                                 "points_per_s": _rate(n, times)}
+    return result
+
+
+# ── end to end ────────────────────────────────────────────────────────────────
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"emulator did not open port {port}")
+
+
+def _cpu_snapshot() -> dict:
+    snap = {"wall": time.perf_counter(), "proc": sum(os.times()[:2]),
+            "cores": None}
+    try:
+        with open("/proc/stat") as f:
+            cores = []
+            for line in f:
+                if line.startswith("cpu") and line[3].isdigit():
+                    fields = [int(v) for v in line.split()[1:]]
+                    idle   = fields[3] + (fields[4] if len(fields) > 4 else 0)
+                    cores.append((sum(fields), idle))
+            snap["cores"] = cores
+    except OSError:
+        pass
+    return snap
+
+
+def _cpu_usage(before: dict, after: dict) -> dict:
+    wall  = after["wall"] - before["wall"]
+    usage = {"process_pct": 100.0 * (after["proc"] - before["proc"]) / wall}
+    if before["cores"] and after["cores"]:
+        usage["per_core_pct"] = [
+            round(100.0 * (1 - (i1 - i0) / max(t1 - t0, 1)), 1)
+            for (t0, i0), (t1, i1) in zip(before["cores"], after["cores"])]
+    return usage
+
+
+def bench_end_to_end(rate: float, duration: float,
+                     record: int = 1 << 22) -> dict:
+    """Socket -> screen against a local fw_emulator subprocess.
+
+    Latency is measured per received block, from the moment the block's
+    bytes were parsed (right after the socket read) until the first
+    rendered frame that includes it.
+    """
+    port = _free_port()
+    emu  = subprocess.Popen(
+        [sys.executable, "-m", "tools.fw_emulator", "--port", str(port),
+         "--rate", str(rate)],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    loop = asyncio.new_event_loop()
+    loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    try:
+        _wait_for_port(port)
+        ring     = SampleRing(record)
+        arrivals = deque()   # (ring position after block, arrival time)
+
+        def on_block(ch1, ch2):
+            ring.write(ch1, ch2)
+            arrivals.append((ring.write_pos, time.perf_counter()))
+
+        loop_thread.start()
+        client = CommandClient("127.0.0.1", port, block_cb=on_block)
+        asyncio.run_coroutine_threadsafe(client.connect(), loop).result(5)
+
+        # the GUI's pipeline: FrameProcessor thread, "screen" loop here
+        processor = FrameProcessor(ring)
+        processor.configure(luts=[display_lut(ChannelCalibration())] * 2,
+                            span=E2E_SPAN, bins=SCREEN_BINS,
+                            trigger_level=10.0)   # never fires: free-run
+        plot      = _offscreen_plot()
+        latencies = []
+        frames    = 0
+        cpu0      = _cpu_snapshot()
+        t_start   = time.perf_counter()
+        next_tick = t_start
+        processor.start()
+
+        while time.perf_counter() - t_start < duration and client.connected:
+            next_tick += FRAME_PERIOD
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            frame = processor.take()
+            if frame is None:
+                continue
+            if plot:
+                plot[2].setData(frame.x, frame.y[0])
+                plot[0].processEvents()
+            shown = time.perf_counter()
+            end   = frame.trigger + E2E_SPAN - E2E_SPAN // 2
+            while arrivals and arrivals[0][0] <= end:
+                latencies.append(shown - arrivals.popleft()[1])
+            frames += 1
+
+        elapsed = time.perf_counter() - t_start
+        cpu     = _cpu_usage(cpu0, _cpu_snapshot())
+        processor.stop()
+        asyncio.run_coroutine_threadsafe(client.disconnect(), loop).result(5)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        emu.terminate()
+        emu.wait()
+
+    received = ring.write_pos
+    expected = int(rate * elapsed)
+    lat_ms   = np.array(latencies) * 1e3 if latencies else np.zeros(1)
+    return {
+        "samples_per_s":    received / elapsed,
+        "target_rate":      rate,
+        "samples_received": received,
+        "samples_dropped":  max(0, expected - received),
+        "ring_overruns":    ring.overruns,
+        "frames":           frames,
+        "dropped_frames":   processor.dropped,
+        "late_frames":      processor.late,
+        "fps":              frames / elapsed,
+        "latency_p50_ms":   float(np.percentile(lat_ms, 50)),
+        "latency_p99_ms":   float(np.percentile(lat_ms, 99)),
+        "rendered":         plot is not None,
+        "cpu":              cpu,
+    }
+
+
+# ── reporting ─────────────────────────────────────────────────────────────────
+
+def _meta() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit,
+            "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count()}
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Stages whose throughput dropped (or p99 latency grew) by > tolerance."""
+    regressions = []
+    for name, new in report["stages"].items():
+        old = baseline.get("stages", {}).get(name)
+        if not old:
+            continue
+        if "samples_per_s" in new and "samples_per_s" in old:
+            ratio = new["samples_per_s"] / old["samples_per_s"]
+            print(f"{name:10s} {ratio:6.2f}x samples/s")
+            if ratio < 1 - tolerance:
+                regressions.append(name)
+        if "latency_p99_ms" in new and "latency_p99_ms" in old:
+            ratio = new["latency_p99_ms"] / max(old["latency_p99_ms"], 1e-9)
+            print(f"{name:10s} {ratio:6.2f}x p99 latency")
+            if ratio > 1 + tolerance:
+                regressions.append(f"{name} latency")
+    return regressions
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stages", nargs="+", choices=STAGES,
+                        default=list(STAGES))
+    parser.add_argument("--samples", type=int, default=1 << 20,
+                        help="Samples per stage run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rate", type=float, default=1e6,
+                        help="Emulator rate for the e2e stage (S/s)")
+    parser.add_argument("--duration", type=float, default=5.0,
+                        help="Length of the e2e run (s)")
+    parser.add_argument("--json", metavar="PATH",
+                        help="Write the report here ('-' for stdout)")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="Fail if slower than this earlier report")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    options = parse_arguments(argv)
+    n, r    = options.samples, options.repeat
+    runners = {
+        "parse":    lambda: bench_parse(n, r),
+        "handoff":  lambda: bench_handoff(n, r),
+        "convert":  lambda: bench_convert(n, r),
+        "decimate": lambda: bench_decimate(n, r),
+        "setdata":  lambda: bench_setdata(r),
+        "e2e":      lambda: bench_end_to_end(options.rate, options.duration),
+    }
+
+    report = {"meta": _meta(), "stages": {}}
+    for name in options.stages:
+        result = runners[name]()
+        report["stages"][name] = result
+        if "samples_per_s" in result:
+            print(f"{name:10s} {result['samples_per_s'] / 1e6:10.2f} MS/s")
+        else:
+            print(f"{name:10s} {json.dumps(result)}")
+    if "e2e" in report["stages"]:
+        e2e = report["stages"]["e2e"]
+        print(f"{'':10s} p50 {e2e['latency_p50_ms']:.1f} ms, "
+              f"p99 {e2e['latency_p99_ms']:.1f} ms, "
+              f"{e2e['samples_dropped']} dropped, {e2e['fps']:.0f} FPS")
+
+    if options.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif options.json:
+        with open(options.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if options.compare:
+        with open(options.compare) as f:
+            regressions = compare(report, json.load(f), options.tolerance)
+        if regressions:
+            print("Regressions: " + ", ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""Loopback stand-in for the STM32 firmware, for load-testing the TCP path.
+
+    python -m tools.fw_emulator --port 8888 --rate 5e6 --burst 8192 \\
+        --garbage 0.01 --partial --disconnect-after 30
+
+then point the scope at it with `main.py --ip 127.0.0.1`.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+
+from core.command_client import FRAME_LEN, encode_frames
+from core.sources import WAVEFORMS, afe_reply, synth_waveform
+
+logger = logging.getLogger("fw_emulator")
+
+PATTERN_SAMPLES = 1 << 20   # precomputed signal, cycled while streaming
+STATS_INTERVAL  = 5.0
+
+
+class FaultConfig:
+    def __init__(self, garbage: float = 0.0, partial: bool = False,
+                 disconnect_after: float | None = None,
+                 stall_after: float | None = None, stall_for: float = 5.0,
+                 slow_reader: float = 0.0):
+        self.garbage          = garbage            # P(junk bytes) per burst
+        self.partial          = partial            # split bursts mid-frame
+        self.disconnect_after = disconnect_after   # s, then abort the socket
+        self.stall_after      = stall_after        # s, then go silent …
+        self.stall_for        = stall_for          # … for this long
+        self.slow_reader      = slow_reader        # s delay per command read
+
+
+class FirmwareEmulator:
+    """Serves one ADC frame stream per client, plus `afe` command replies.
+
+    Frames go out in bursts of `burst` samples on a real-time schedule.  If
+    the client (or the socket) can't keep up the schedule slips; once it is
+    more than a second behind, the backlog is dropped and counted, like a
+    device with a bounded FIFO.
+    """
+
+    def __init__(self, rate: float, burst: int, waveform: str = "sine",
+                 freq: float = 1e3, faults: FaultConfig | None = None):
+        self.rate   = rate
+        self.burst  = burst
+        self.faults = faults or FaultConfig()
+
+        period  = rate / freq
+        periods = max(1, round(PATTERN_SAMPLES / period))
+        n       = max(burst, int(round(periods * period)))
+        self._pattern   = encode_frames(*synth_waveform(waveform, 0, n,
+                                                        rate, freq))
+        self._pattern_n = n
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter):
+        peer    = writer.get_extra_info("peername")
+        replies = []
+        logger.info("Client %s connected", peer)
+        cmd_task = asyncio.create_task(self._read_commands(reader, replies))
+        try:
+            await self._stream(writer, replies, peer)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            cmd_task.cancel()
+            writer.close()
+            logger.info("Client %s gone", peer)
+
+    async def _read_commands(self, reader: asyncio.StreamReader,
+                             replies: list):
+        while True:
+            if self.faults.slow_reader:
+                await asyncio.sleep(self.faults.slow_reader)
+            line = await reader.readline()
+            if not line:
+                return
+            cmd = line.decode(errors="replace").strip()
+            if cmd:
+                reply = afe_reply(cmd)
+                logger.debug("%s -> %s", cmd, reply)
+                replies.append(reply)
+
+    async def _stream(self, writer: asyncio.StreamWriter, replies: list, peer):
+        loop     = asyncio.get_running_loop()
+        faults   = self.faults
+        t0       = loop.time()
+        t_stats  = t0
+        sent     = 0     # samples on the schedule so far
+        written  = 0     # samples actually handed to the socket
+        dropped  = 0
+        junk     = 0
+        stalled  = False
+        pos      = 0     # sample offset into the pattern
+
+        while True:
+            now = loop.time() - t0
+            if faults.disconnect_after and now >= faults.disconnect_after:
+                logger.info("Fault: dropping %s mid-stream", peer)
+                writer.transport.abort()
+                return
+            if faults.stall_after and not stalled and now >= faults.stall_after:
+                logger.info("Fault: stalling %s for %.1fs", peer,
+                            faults.stall_for)
+                stalled = True
+                await asyncio.sleep(faults.stall_for)
+                t0 += faults.stall_for
+                continue
+
+            due = int(now * self.rate)
+            if due - sent > self.rate:
+                dropped += due - sent - self.burst
+                sent     = due - self.burst
+            if due - sent < self.burst:
+                await asyncio.sleep(self.burst / self.rate)
+                continue
+
+            data = self._take(pos, self.burst)
+            pos  = (pos + self.burst) % self._pattern_n
+            sent    += self.burst
+            written += self.burst
+
+            if faults.garbage and random.random() < faults.garbage:
+                # junk lands on a frame boundary, the parser has to resync
+                cut   = random.randrange(self.burst) * FRAME_LEN
+                extra = os.urandom(random.randint(1, 16))
+                data  = data[:cut] + extra + data[cut:]
+                junk += 1
+            if replies:
+                data += "".join(r + "\n" for r in replies).encode()
+                replies.clear()
+
+            if faults.partial and len(data) > FRAME_LEN:
+                cut = random.randrange(1, len(data))
+                writer.write(data[:cut])
+                await writer.drain()
+                await asyncio.sleep(0)
+                writer.write(data[cut:])
+            else:
+                writer.write(data)
+            await writer.drain()
+
+            if loop.time() - t_stats >= STATS_INTERVAL:
+                elapsed = loop.time() - t0
+                logger.info("%s: %d samples (%.2f MS/s), %d dropped, "
+                            "%d garbage bursts", peer, written,
+                            written / elapsed / 1e6, dropped, junk)
+                t_stats = loop.time()
+
+    def _take(self, pos: int, n: int) -> bytes:
+        start = pos * FRAME_LEN
+        stop  = (pos + n) * FRAME_LEN
+        if stop <= len(self._pattern):
+            return self._pattern[start:stop]
+        return (self._pattern[start:] +
+                self._pattern[:stop - len(self._pattern)])
+
+
+async def serve(host: str, port: int, emulator: FirmwareEmulator):
+    server = await asyncio.start_server(emulator.handle, host, port)
+    logger.info("Emulating firmware on %s:%d at %.0f S/s", host, port,
+                emulator.rate)
+    async with server:
+        await server.serve_forever()
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-d", "--debug", action="store_true")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--rate", type=float, default=1e6,
+                        help="Samples/s per client")
+    parser.add_argument("--burst", type=int, default=4096,
+                        help="Samples per socket write")
+    parser.add_argument("--wave", choices=WAVEFORMS, default="sine")
+    parser.add_argument("--freq", type=float, default=1e3)
+    parser.add_argument("--garbage", type=float, default=0.0,
+                        help="Probability of junk bytes per burst")
+    parser.add_argument("--partial", action="store_true",
+                        help="Split every burst mid-frame")
+    parser.add_argument("--disconnect-after", type=float,
+                        help="Abort each connection after this many seconds")
+    parser.add_argument("--stall-after", type=float,
+                        help="Stop sending (socket stays open) after this "
+                             "many seconds")
+    parser.add_argument("--stall-for", type=float, default=5.0)
+    parser.add_argument("--slow-reader", type=float, default=0.0,
+                        help="Delay before reading each command (s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_arguments(argv)
+    logging.basicConfig(level=logging.DEBUG if options.debug else logging.INFO)
+    faults = FaultConfig(garbage=options.garbage, partial=options.partial,
+                         disconnect_after=options.disconnect_after,
+                         stall_after=options.stall_after,
+                         stall_for=options.stall_for,
+                         slow_reader=options.slow_reader)
+    emulator = FirmwareEmulator(options.rate, options.burst, options.wave,
+                                options.freq, faults)
+    try:
+        asyncio.run(serve(options.host, options.port, emulator))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
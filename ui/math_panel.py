@@ -0,0 +1,99 @@
+from PyQt6.QtWidgets import (
+    QComboBox, QDoubleSpinBox, QFormLayout, QFrame, QLabel, QSpinBox,
+    QVBoxLayout,
+)
+from PyQt6.QtCore import pyqtSignal as Signal
+
+from core.math_channels import (
+    FILTERS, FILTER_KINDS, FIR_TAPS, OPERATIONS,
+)
+
+
+def _hz_spin(value: float) -> QDoubleSpinBox:
+    spin = QDoubleSpinBox()
+    spin.setRange(1.0, 1e9)
+    spin.setDecimals(0)
+    spin.setSuffix(" Hz")
+    spin.setValue(value)
+    return spin
+
+
+class MathPanel(QFrame):
+    """Settings of the math channel, drawn as the magenta MATH curve."""
+
+    changed = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFrameShape(QFrame.Shape.StyledPanel)
+        self._build_ui()
+
+    def _build_ui(self):
+        outer = QVBoxLayout(self)
+        header = QLabel("Math")
+        header.setStyleSheet("font-weight: bold; color: #ff00ff;")
+        outer.addWidget(header)
+
+        form = QFormLayout()
+        self._op_combo = QComboBox()
+        self._op_combo.addItems(OPERATIONS)
+        self._op_combo.setCurrentText("CH1-CH2")
+        form.addRow("Source", self._op_combo)
+
+        self._filter_combo = QComboBox()
+        self._filter_combo.addItems(FILTERS)
+        form.addRow("Filter", self._filter_combo)
+        self._kind_combo = QComboBox()
+        self._kind_combo.addItems(FILTER_KINDS)
+        form.addRow("Type", self._kind_combo)
+        if "IIR" not in FILTER_KINDS:
+            # FIR is all there is without SciPy, so there's nothing to pick
+            form.setRowVisible(self._kind_combo, False)
+            note = QLabel("IIR filters need SciPy")
+            note.setStyleSheet("color: gray;")
+            form.addRow(note)
+
+        self._f1_spin = _hz_spin(1e3)
+        form.addRow("Cutoff", self._f1_spin)
+        self._f2_spin = _hz_spin(10e3)
+        form.addRow("Upper", self._f2_spin)
+        self._taps_spin = QSpinBox()
+        self._taps_spin.setRange(3, 4095)
+        self._taps_spin.setValue(FIR_TAPS)
+        form.addRow("Taps / width", self._taps_spin)
+
+        self._avg_spin = QSpinBox()
+        self._avg_spin.setRange(1, 1024)
+        form.addRow("Average", self._avg_spin)
+        outer.addLayout(form)
+
+        for combo in (self._op_combo, self._filter_combo, self._kind_combo):
+            combo.currentTextChanged.connect(self._on_change)
+        for spin in (self._f1_spin, self._f2_spin, self._taps_spin,
+                     self._avg_spin):
+            spin.editingFinished.connect(self._on_change)
+        self._update_enabled()
+
+    def settings(self) -> dict:
+        """core.math_channels.MathChannel settings."""
+        return {"op":      self._op_combo.currentText(),
+                "filter":  self._filter_combo.currentText(),
+                "kind":    self._kind_combo.currentText(),
+                "f1":      self._f1_spin.value(),
+                "f2":      self._f2_spin.value(),
+                "taps":    self._taps_spin.value(),
+                "average": self._avg_spin.value()}
+
+    def _on_change(self, *_):
+        self._update_enabled()
+        self.changed.emit()
+
+    def _update_enabled(self):
+        band = self._filter_combo.currentText()
+        designed = band not in ("None", "Moving average")
+        self._kind_combo.setEnabled(designed)
+        self._f1_spin.setEnabled(designed)
+        self._f2_spin.setEnabled(band == "Band-pass")
+        self._taps_spin.setEnabled(
+            band == "Moving average" or
+            (designed and self._kind_combo.currentText() == "FIR"))
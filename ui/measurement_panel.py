@@ -0,0 +1,103 @@
+import pyqtgraph as pg
+from PyQt6.QtWidgets import (
+    QFrame, QGridLayout, QLabel, QPushButton, QHBoxLayout, QVBoxLayout,
+)
+from PyQt6.QtCore import pyqtSignal as Signal
+
+# (key in core.measurements results, row label, unit)
+_ROWS = [
+    ("vpp",    "Vpp",    "V"),
+    ("vmin",   "Min",    "V"),
+    ("vmax",   "Max",    "V"),
+    ("mean",   "Mean",   "V"),
+    ("rms",    "RMS",    "V"),
+    ("freq",   "Freq",   "Hz"),
+    ("period", "Period", "s"),
+    ("duty",   "Duty",   "%"),
+    ("rise",   "Rise",   "s"),
+    ("fall",   "Fall",   "s"),
+]
+
+
+def _format(value, unit: str) -> str:
+    if value is None:
+        return "—"
+    if unit == "%":
+        return f"{value * 100:.1f} %"
+    return pg.siFormat(value, precision=4, suffix=unit)
+
+
+class MeasurementPanel(QFrame):
+    """Table of automatic measurements for CH1 / CH2.
+
+    Shows either the latest record's values or, with Statistics on, the
+    mean ± standard deviation over every record since the last reset.
+    """
+
+    reset_requested = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFrameShape(QFrame.Shape.StyledPanel)
+        self._show_stats = False
+        self._cells      = {}
+        self._build_ui()
+
+    def _build_ui(self):
+        outer = QVBoxLayout(self)
+        header = QLabel("Measurements")
+        header.setStyleSheet("font-weight: bold; color: #00ffff;")
+        outer.addWidget(header)
+
+        grid = QGridLayout()
+        grid.addWidget(QLabel("CH1"), 0, 1)
+        grid.addWidget(QLabel("CH2"), 0, 2)
+        for row, (key, label, _) in enumerate(_ROWS, start=1):
+            grid.addWidget(QLabel(label), row, 0)
+            for ch in range(2):
+                cell = QLabel("—")
+                cell.setMinimumWidth(90)
+                grid.addWidget(cell, row, ch + 1)
+                self._cells[key, ch] = cell
+        outer.addLayout(grid)
+
+        self._rate_label = QLabel("Rate: —")
+        outer.addWidget(self._rate_label)
+
+        row = QHBoxLayout()
+        self._stats_btn = QPushButton("Statistics: OFF")
+        self._stats_btn.setCheckable(True)
+        self._stats_btn.toggled.connect(self._on_stats_toggle)
+        row.addWidget(self._stats_btn)
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset_requested)
+        row.addWidget(reset_btn)
+        outer.addLayout(row)
+        outer.addStretch()
+
+    def _on_stats_toggle(self, checked: bool):
+        self._show_stats = checked
+        self._stats_btn.setText(f"Statistics: {'ON' if checked else 'OFF'}")
+
+    def show_results(self, results: list, stats: list, rate: float | None):
+        for key, _, unit in _ROWS:
+            for ch in range(2):
+                cell = self._cells[key, ch]
+                if ch >= len(results):   # interleaved: CH1 only
+                    cell.setText("—")
+                    cell.setToolTip("")
+                    continue
+                s    = stats[ch][key]
+                if not self._show_stats:
+                    cell.setText(_format(results[ch][key], unit))
+                elif s is None:
+                    cell.setText("—")
+                else:
+                    cell.setText(f"{_format(s['mean'], unit)} "
+                                 f"± {_format(s['std'], unit)}")
+                    cell.setToolTip(f"min {_format(s['min'], unit)}, "
+                                    f"max {_format(s['max'], unit)}, "
+                                    f"n = {s['count']}")
+        self._rate_label.setText(
+            "Rate: —" if rate is None else
+            f"Rate: {pg.siFormat(rate, precision=3, suffix='S/s')}")
@@ -1,41 +1,98 @@
 import os
-import queue
+import time
 from collections import deque
+from datetime import datetime
 
 import numpy as np
 import pyqtgraph as pg
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QFrame,
     QLabel, QComboBox, QRadioButton, QButtonGroup, QPushButton, QSplitter,
+    QFileDialog,
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, QRectF
 
 from utils.controls import create_dial_widget
-from ui.command_panel import CommandPanel
-
-ADC_COUNTS  = 16384
-ADC_VREF    = 5.0  
-
-
-def _raw_to_volts(raw: int) -> float:
-    """Convert 14-bit offset-binary ADC code to volts."""
-    return (raw - ADC_COUNTS / 2) / (ADC_COUNTS / 2) * ADC_VREF
+from ui.qt_bridge import ConnectionSignals
+from core import metrics
+from core.ring_buffer import SampleRing
+from core.trigger import TRIGGER_MODES, TRIGGER_SLOPES
+from core.processing import FrameProcessor
+from core.recorder import Capture, CaptureRecorder
+from core.calibration import Calibration, InterleaveCorrection, display_lut
+from core.interleave import InterleavedRing
+from core.segments import SegmentStore
+from core.persistence import DECAYS
+
+TRIGGER_HYSTERESIS = 32   # ADC codes (~20 mV)
+TIMEBASE_MIN = 1
+TIMEBASE_MAX = 50
+MIN_SPAN     = 100        # samples on screen at the fastest timebase
+CAPTURE_DIR  = "captures"
+OVERLAY_POINTS = 2_000_000   # per channel when overlaying segments
+LOG_BACKLOG    = 500         # console lines kept until it's first shown
+OVERLAY_PERIOD = 0.5         # s between metrics overlay refreshes
+ESTIMATE_SAMPLES = 1 << 20   # interleaved samples the mismatch is fit over
+CH_COLORS    = np.array([[1.0, 1.0, 0.0],    # CH1 yellow, CH2 cyan, as the
+                         [0.0, 1.0, 1.0]],   # curves; mixed additively
+                        dtype=np.float32)
+XY_COLOR     = np.array([0.2, 1.0, 0.2], dtype=np.float32)   # green phosphor
+
+
+_FRAMES_DRAWN  = metrics.counter("frames_drawn_total", "Frames drawn")
+_RENDER_TIME   = metrics.histogram("render_seconds",
+                                   "GUI time to hand a frame to the plot")
+_FRAME_LATENCY = metrics.histogram("frame_latency_seconds",
+                                   "Frame published until drawn")
 
 
 class Oscilloscope(QMainWindow):
-    DISPLAY_SAMPLES = 1024
-
-    def __init__(self, conn_mgr, sample_queue: queue.Queue):
+    def __init__(self, conn_mgr, sample_ring: SampleRing,
+                 recorder: CaptureRecorder | None = None,
+                 calibration: Calibration | None = None,
+                 metrics_overlay: bool = False):
         super().__init__()
-        self._conn_mgr     = conn_mgr
-        self._sample_queue = sample_queue
-
-        self._ch1_buf = deque([0.0] * self.DISPLAY_SAMPLES,
-                              maxlen=self.DISPLAY_SAMPLES)
-        self._ch2_buf = deque([0.0] * self.DISPLAY_SAMPLES,
-                              maxlen=self.DISPLAY_SAMPLES)
+        self._conn_mgr    = conn_mgr
+        # connection events arrive on the asyncio thread; hop to the GUI
+        self._conn_signals = (ConnectionSignals(conn_mgr, self)
+                              if conn_mgr else None)
+        self._sample_ring = sample_ring
+        self._recorder    = recorder
+        self._capture     = None   # Capture being played back, if any
+        self._calibration = calibration or Calibration()
+        self._luts        = None   # per-channel code → display volts
+        self._cal_luts    = None   # per-channel code → calibrated volts
+        self._interleaved_ring = None   # CH1 at twice the rate, when on
+
+        # longest span the timebase can select; the rest of the ring is
+        # headroom so a trigger's pre-samples aren't overwritten before use
+        self._max_span = max(MIN_SPAN, sample_ring.capacity * 3 // 4)
+        # rarely used panels and their workers are built on first show
+        self._cmd_panel      = None
+        self._log_backlog    = deque(maxlen=LOG_BACKLOG)
+        self._meas_panel     = None
+        self._measure        = None
+        self._shown_results  = None
+        self._spectrum_view  = None
+        self._spectrum       = None
+        self._shown_spectrum = None
+        self._segment_panel  = None
+        self._math_panel     = None
+        # triggering, decimation and scaling all happen on this thread;
+        # the timer below only draws the frames it publishes
+        self._processor = FrameProcessor(
+            sample_ring, on_record=self._on_record,
+            hysteresis=TRIGGER_HYSTERESIS)
+        self._frame_stats = None
+        self._bins        = None
+        self._overlay_state    = None   # (time, frames, latency counts)
+        self._segments         = None   # SegmentStore of the last acquisition
+        self._segment_progress = None
+        self._acquiring        = False
 
         self._build_ui()
+        self._register_metrics()
+        self._overlay.setVisible(metrics_overlay)
 
         self.gain           = 1.0
         self.offset         = 0.0
@@ -48,6 +105,27 @@ class Oscilloscope(QMainWindow):
         self.ac_coupling_ch2 = False  # CH2
         self.ch1_enabled    = True
         self.ch2_enabled    = True
+        self.fft_enabled    = False
+        self.persistence    = False
+        self.math_enabled   = False
+        self.xy_mode        = False
+        self.interleaved    = False
+
+        # the calibration file remembers each channel's probe setting
+        self._atten_100_radio.setChecked(
+            self._calibration.channels[0].attenuation == 100)
+        self._ch2_atten_100_radio.setChecked(
+            self._calibration.channels[1].attenuation == 100)
+        self._rebuild_luts()
+        self._set_span(self._timebase_to_span(self.timebase))
+        # the connection is started before the window is built, so it may
+        # be up already; announce it now the restored settings are in place
+        if self._conn_signals and self._conn_mgr.is_connected:
+            self._conn_signals.connected.emit()
+        self.plotWidget.sigYRangeChanged.connect(self._configure_persistence)
+        self.plotWidget.sigXRangeChanged.connect(self._configure_xy)
+        self.plotWidget.sigYRangeChanged.connect(self._configure_xy)
+        self._processor.start()
 
         self._timer = QTimer()
         self._timer.timeout.connect(self._update_plot)
@@ -83,10 +161,35 @@ class Oscilloscope(QMainWindow):
         self.plotWidget.setLabel("bottom","Samples")
         self._curve_ch1   = self.plotWidget.plot(pen='y',  name="CH1")
         self._curve_ch2   = self.plotWidget.plot(pen='c',  name="CH2")
+        self._curve_math  = self.plotWidget.plot(pen='m',  name="MATH")
+        self._curve_math.hide()
         self._trigger_line = pg.InfiniteLine(
             angle=0, pen=pg.mkPen('r', width=1.5))
         self.plotWidget.addItem(self._trigger_line)
+        self._persist_image = pg.ImageItem()
+        self._persist_image.setZValue(-10)
+        self._persist_image.hide()
+        self.plotWidget.addItem(self._persist_image)
+        self._xy_image = pg.ImageItem()
+        self._xy_image.setZValue(-10)
+        self._xy_image.hide()
+        self.plotWidget.addItem(self._xy_image)
+        self._curve_xy = self.plotWidget.plot(pen='w', name="XY")
+        self._curve_xy.hide()
+        # pinned to the plot's corner in pixels, not to the data
+        self._overlay = pg.TextItem(color="w", fill=(0, 0, 0, 160))
+        self._overlay.setParentItem(self.plotWidget.getPlotItem())
+        self._overlay.setPos(70, 10)
+        self.plotWidget.sigXRangeChanged.connect(self._render_playback)
         main_layout.addWidget(self.plotWidget, stretch=4)
+        self._main_layout = main_layout   # the spectrum view joins later
+
+        self._side = QWidget()
+        self._side_layout = QVBoxLayout(self._side)
+        self._side_layout.setContentsMargins(0, 0, 0, 0)
+        self._side.setMaximumWidth(260)
+        self._side.hide()
+        main_layout.addWidget(self._side, stretch=1)
 
         ctrl_frame  = QFrame()
         ctrl_frame.setFrameShape(QFrame.Shape.StyledPanel)
@@ -102,17 +205,24 @@ class Oscilloscope(QMainWindow):
             "Trigger Level (mV)", -2000, 2000, 0, ctrl_layout,
             self._on_trigger_change)
         self._timebase_dial, _ = create_dial_widget(
-            "Timebase", 1, 50, 10, ctrl_layout, self._on_timebase_change)
+            "Timebase", TIMEBASE_MIN, TIMEBASE_MAX, 10, ctrl_layout,
+            self._on_timebase_change)
         self._vpos_dial, _ = create_dial_widget(
             "Vert Pos (mV)", -500, 500, 0, ctrl_layout, self._on_vpos_change)
 
         ctrl_layout.addWidget(QLabel("Trigger Mode"))
         self._trig_mode_combo = QComboBox()
-        self._trig_mode_combo.addItems(["Auto", "Normal", "Single"])
+        self._trig_mode_combo.addItems(TRIGGER_MODES)
         self._trig_mode_combo.currentTextChanged.connect(
             self._on_trigger_mode_change)
         ctrl_layout.addWidget(self._trig_mode_combo)
 
+        self._trig_slope_combo = QComboBox()
+        self._trig_slope_combo.addItems(TRIGGER_SLOPES)
+        self._trig_slope_combo.currentTextChanged.connect(
+            self._on_trigger_slope_change)
+        ctrl_layout.addWidget(self._trig_slope_combo)
+
         ctrl_layout.addWidget(QLabel("CH1 Coupling"))
         self._dc_radio = QRadioButton("DC")
         self._ac_radio = QRadioButton("AC")
@@ -169,22 +279,59 @@ class Oscilloscope(QMainWindow):
         ctrl_layout.addWidget(self._trig_dc_radio)
         ctrl_layout.addWidget(self._trig_ac_radio)
 
+        interleave_row = QHBoxLayout()
         self._interleaved_btn = QPushButton("Interleaved: OFF")
         self._interleaved_btn.setCheckable(True)
         self._interleaved_btn.toggled.connect(self._on_interleaved_change)
-        ctrl_layout.addWidget(self._interleaved_btn)
+        interleave_row.addWidget(self._interleaved_btn)
+        self._estimate_btn = QPushButton("Estimate")
+        self._estimate_btn.setToolTip(
+            "Fit the ADC mismatch to a sine on CH1 and save it with the "
+            "calibration")
+        self._estimate_btn.setEnabled(False)
+        self._estimate_btn.clicked.connect(self._on_interleave_estimate)
+        interleave_row.addWidget(self._estimate_btn)
+        ctrl_layout.addLayout(interleave_row)
+
+        self._fft_btn = QPushButton("FFT: OFF")
+        self._fft_btn.setCheckable(True)
+        self._fft_btn.toggled.connect(self._on_fft_toggle)
+        ctrl_layout.addWidget(self._fft_btn)
+
+        self._xy_btn = QPushButton("XY: OFF")
+        self._xy_btn.setCheckable(True)
+        self._xy_btn.toggled.connect(self._on_xy_toggle)
+        ctrl_layout.addWidget(self._xy_btn)
+
+        persist_row = QHBoxLayout()
+        self._persist_btn = QPushButton("Persist: OFF")
+        self._persist_btn.setCheckable(True)
+        self._persist_btn.toggled.connect(self._on_persistence_toggle)
+        persist_row.addWidget(self._persist_btn)
+        self._decay_combo = QComboBox()
+        for decay in DECAYS:
+            self._decay_combo.addItem(
+                "∞" if decay == float("inf") else f"{decay:g} s", decay)
+        self._decay_combo.setCurrentIndex(DECAYS.index(1.0))
+        self._decay_combo.currentIndexChanged.connect(
+            self._configure_persistence)
+        self._decay_combo.currentIndexChanged.connect(self._configure_xy)
+        persist_row.addWidget(self._decay_combo)
+        ctrl_layout.addLayout(persist_row)
 
         self._status_label = QLabel("Connecting…")
         ctrl_layout.addWidget(self._status_label)
+        self._frames_label = QLabel("")
+        ctrl_layout.addWidget(self._frames_label)
 
-        if self._conn_mgr:
-            self._conn_mgr.connected.connect(
+        if self._conn_signals:
+            self._conn_signals.connected.connect(
                 lambda: self._status_label.setText("Connected"))
-            self._conn_mgr.disconnected.connect(
+            self._conn_signals.disconnected.connect(
                 lambda: self._status_label.setText("Disconnected"))
-            self._conn_mgr.connecting.connect(
+            self._conn_signals.connecting.connect(
                 lambda: self._status_label.setText("Connecting…"))
-            self._conn_mgr.device_found.connect(
+            self._conn_signals.device_found.connect(
                 lambda addr: self._status_label.setText(f"Found: {addr}"))
 
         self._run_btn = QPushButton("Stop")
@@ -192,6 +339,17 @@ class Oscilloscope(QMainWindow):
         self._run_btn.toggled.connect(self._toggle_run)
         ctrl_layout.addWidget(self._run_btn)
 
+        rec_row = QHBoxLayout()
+        self._rec_btn = QPushButton("Record")
+        self._rec_btn.setCheckable(True)
+        self._rec_btn.setEnabled(self._recorder is not None)
+        self._rec_btn.toggled.connect(self._toggle_record)
+        rec_row.addWidget(self._rec_btn)
+        self._open_btn = QPushButton("Open…")
+        self._open_btn.clicked.connect(self._on_open_capture)
+        rec_row.addWidget(self._open_btn)
+        ctrl_layout.addLayout(rec_row)
+
         ch_row = QHBoxLayout()
         self._ch1_btn = QPushButton("CH1: ON")
         self._ch1_btn.setCheckable(True)
@@ -205,31 +363,115 @@ class Oscilloscope(QMainWindow):
         ch_row.addWidget(self._ch2_btn)
         ctrl_layout.addLayout(ch_row)
 
-        ctrl_layout.addStretch()
+        panel_row = QHBoxLayout()
+        self._panel_btns = {}
+        for text, handler in (("Measure",  self._on_measure_toggle),
+                              ("Math",     self._on_math_toggle),
+                              ("Segments", self._on_segments_toggle),
+                              ("Console",  self._on_console_toggle)):
+            btn = QPushButton(text)
+            btn.setCheckable(True)
+            btn.toggled.connect(handler)
+            panel_row.addWidget(btn)
+            self._panel_btns[text] = btn
+        ctrl_layout.addLayout(panel_row)
 
-        # ── bottom: command console ───────────────────────────────────────────
-        self._cmd_panel = CommandPanel()
-        self._cmd_panel.command_submitted.connect(self._send)
+        ctrl_layout.addStretch()
 
-        splitter = QSplitter(Qt.Orientation.Vertical)
-        splitter.addWidget(top_widget)
-        splitter.addWidget(self._cmd_panel)
-        splitter.setStretchFactor(0, 3)
-        splitter.setStretchFactor(1, 1)
-        splitter.setSizes([600, 220])
-        outer_layout.addWidget(splitter)
+        # ── bottom: command console, built on first show ──────────────────────
+        self._splitter = QSplitter(Qt.Orientation.Vertical)
+        self._splitter.addWidget(top_widget)
+        outer_layout.addWidget(self._splitter)
 
         # wire connection state + firmware replies → console log
-        if self._conn_mgr:
-            self._conn_mgr.connected.connect(
-                lambda: self._cmd_panel.log_ok("Connected"))
-            self._conn_mgr.disconnected.connect(
-                lambda: self._cmd_panel.log_error("Disconnected"))
-            self._conn_mgr.connecting.connect(
-                lambda: self._cmd_panel.log_info("Connecting…"))
-            self._conn_mgr.device_found.connect(
-                lambda addr: self._cmd_panel.log_ok(f"Device found: {addr}"))
-            self._conn_mgr.response_received.connect(self._on_firmware_response)
+        if self._conn_signals:
+            self._conn_signals.connected.connect(
+                lambda: self._log("ok", "Connected"))
+            self._conn_signals.disconnected.connect(
+                lambda: self._log("error", "Disconnected"))
+            self._conn_signals.connecting.connect(
+                lambda: self._log("info", "Connecting…"))
+            self._conn_signals.device_found.connect(
+                lambda addr: self._log("ok", f"Device found: {addr}"))
+            self._conn_signals.response_received.connect(self._on_firmware_response)
+            self._conn_signals.reconnected.connect(
+                lambda t, gap: self._log(
+                    "info", f"Reconnected in {t * 1e3:.0f} ms, "
+                            f"{gap * 1e3:.0f} ms without data"))
+            # the device keeps no AFE state across reconnects, and the
+            # attenuation restored below was never sent to it
+            self._conn_signals.connected.connect(self._send_afe_state)
+
+    # ── lazily built panels ───────────────────────────────────────────────────
+
+    def _log(self, level: str, msg: str):
+        """Console log, kept in a backlog while the console isn't built."""
+        if self._cmd_panel is None:
+            self._log_backlog.append((level, msg))
+        else:
+            getattr(self._cmd_panel, f"log_{level}")(msg)
+
+    def _on_console_toggle(self, checked: bool):
+        if checked and self._cmd_panel is None:
+            from ui.command_panel import CommandPanel
+            self._cmd_panel = CommandPanel()
+            self._cmd_panel.command_submitted.connect(self._send)
+            self._splitter.addWidget(self._cmd_panel)
+            self._splitter.setStretchFactor(0, 3)
+            self._splitter.setStretchFactor(1, 1)
+            self._splitter.setSizes([600, 220])
+            while self._log_backlog:
+                self._log(*self._log_backlog.popleft())
+        if self._cmd_panel is not None:
+            self._cmd_panel.setVisible(checked)
+
+    def _on_measure_toggle(self, checked: bool):
+        if checked and self._meas_panel is None:
+            from ui.measurement_panel import MeasurementPanel
+            from core.measurements import MeasurementWorker
+            self._measure    = MeasurementWorker(self._source)
+            self._meas_panel = MeasurementPanel()
+            self._meas_panel.reset_requested.connect(
+                lambda: self._measure.reset_stats())
+            self._side_layout.insertWidget(0, self._meas_panel, stretch=1)
+        if self._meas_panel is not None:
+            self._meas_panel.setVisible(checked)
+        self._update_side()
+
+    def _on_math_toggle(self, checked: bool):
+        if checked and self._math_panel is None:
+            from ui.math_panel import MathPanel
+            self._math_panel = MathPanel()
+            self._math_panel.changed.connect(self._configure_math)
+            self._side_layout.addWidget(self._math_panel)
+        self.math_enabled = checked
+        self._math_panel.setVisible(checked)
+        self._update_curves()
+        self._configure_math()
+        self._update_side()
+
+    def _on_segments_toggle(self, checked: bool):
+        if checked and self._segment_panel is None:
+            from ui.segment_panel import SegmentPanel
+            self._segment_panel = SegmentPanel()
+            self._segment_panel.acquire_requested.connect(
+                self._on_segment_acquire)
+            self._segment_panel.stop_requested.connect(self._on_segment_stop)
+            self._segment_panel.view_changed.connect(self._draw_segments)
+            self._side_layout.addWidget(self._segment_panel)
+        if self._segment_panel is not None:
+            self._segment_panel.setVisible(checked)
+        self._update_side()
+
+    def _update_side(self):
+        self._side.setVisible(any(
+            panel is not None and not panel.isHidden()
+            for panel in (self._meas_panel, self._math_panel,
+                          self._segment_panel)))
+
+    @property
+    def _viewing_segments(self) -> bool:
+        return self._segment_panel is not None and self._segment_panel.viewing
 
     def _send(self, cmd: str):
         if self._conn_mgr:
@@ -237,45 +479,112 @@ class Oscilloscope(QMainWindow):
 
     def _on_firmware_response(self, line: str):
         if line.startswith("ERR"):
-            self._cmd_panel.log_error(line)
+            self._log("error", line)
         else:
-            self._cmd_panel.log_ok(line)
+            self._log("ok", line)
 
     def _on_gain_change(self):
         self.gain = self._gain_dial.value() / 10.0
+        self._rebuild_luts()
 
     def _on_offset_change(self):
         self.offset = self._offset_dial.value() / 1000.0
+        self._rebuild_luts()
 
     def _on_trigger_change(self):
         self.trigger_level = self._trigger_dial.value() / 1000.0
         self._trigger_line.setValue(self.trigger_level)
+        self._processor.configure(trigger_level=self.trigger_level)
 
     def _on_timebase_change(self):
         self.timebase = self._timebase_dial.value()
+        self._set_span(self._timebase_to_span(self.timebase))
+
+    def _timebase_to_span(self, timebase: int) -> int:
+        """Log-spaced record span from MIN_SPAN up to the longest record."""
+        frac = (timebase - TIMEBASE_MIN) / (TIMEBASE_MAX - TIMEBASE_MIN)
+        return int(round(MIN_SPAN * (self._max_span / MIN_SPAN) ** frac))
+
+    def _set_span(self, span: int):
+        self.span = span
+        self._processor.configure(span=span)
+        if self._acquiring:
+            # segments are one record long; a new record length can't mix
+            self._segment_panel.acquisition_done()
+            self._log("info", "Timebase changed, segments stopped")
 
     def _on_vpos_change(self):
         self.vpos = self._vpos_dial.value() / 1000.0
+        self._rebuild_luts()
+
+    def _rebuild_luts(self):
+        """Fold calibration and display gain/offset/position into one LUT
+        per channel; only settings changes pay for this, not frames."""
+        channels       = self._calibration.channels
+        self._cal_luts = [cal.lut() for cal in channels]
+        self._luts     = [display_lut(cal, self.gain, self.offset + self.vpos)
+                          for cal in channels]
+        self._processor.configure(
+            luts=self._source_luts,
+            math_scale=(self.gain, self.offset + self.vpos))
+        if self._capture is not None:
+            self._render_playback()
+        self._draw_segments()
+
+    @property
+    def _source(self) -> SampleRing:
+        """The ring live records come from: CH1/CH2, or interleaved CH1."""
+        return self._interleaved_ring or self._sample_ring
+
+    @property
+    def _source_luts(self) -> list:
+        # interleaved samples are all on ADC A's (CH1's) scale
+        return self._luts[:self._source.channels]
+
+    def _configure_math(self):
+        """(Re)start the math channel; its filter and average start over."""
+        if not self.math_enabled:
+            self._processor.configure(math=None)
+            return
+        self._processor.configure(
+            math=(self._math_panel.settings(), self._cal_luts))
 
     def _on_trigger_mode_change(self, mode: str):
         self.trigger_mode = mode
+        self._processor.configure(trigger_mode=mode)
+
+    def _on_trigger_slope_change(self, slope: str):
+        self._processor.configure(trigger_slope=slope)
 
     def _on_coupling_change(self, button):
         coupling = "ac" if button.text() == "AC" else "dc"
         self.ac_coupling = (coupling == "ac")
+        self._configure_ac()
         self._send(f"afe coupling 1 {coupling}")
 
     def _on_attenuation_change(self, button):
         atten = "100" if button.text() == "1:100" else "1"
+        self._calibration.channels[0].attenuation = int(atten)
+        self._rebuild_luts()
+        self._configure_math()
         self._send(f"afe atten 1 {atten}")
 
     def _on_ch2_coupling_change(self, button):
         coupling = "ac" if button.text() == "AC" else "dc"
         self.ac_coupling_ch2 = (coupling == "ac")
+        self._configure_ac()
         self._send(f"afe coupling 2 {coupling}")
 
+    def _configure_ac(self):
+        self._processor.configure(ac=(self.ac_coupling, self.ac_coupling_ch2))
+        if self._capture is not None:
+            self._render_playback()
+
     def _on_ch2_attenuation_change(self, button):
         atten = "100" if button.text() == "1:100" else "1"
+        self._calibration.channels[1].attenuation = int(atten)
+        self._rebuild_luts()
+        self._configure_math()
         self._send(f"afe atten 2 {atten}")
 
     def _on_trigger_coupling_change(self, button):
@@ -285,54 +594,430 @@ class Oscilloscope(QMainWindow):
     def _on_ch1_toggle(self, checked: bool):
         self.ch1_enabled = checked
         self._ch1_btn.setText(f"CH1: {'ON' if checked else 'OFF'}")
-        self._curve_ch1.setVisible(checked)
+        self._update_curves()
 
     def _on_ch2_toggle(self, checked: bool):
         self.ch2_enabled = checked
         self._ch2_btn.setText(f"CH2: {'ON' if checked else 'OFF'}")
-        self._curve_ch2.setVisible(checked)
+        self._update_curves()
 
     def _on_interleaved_change(self, checked: bool):
+        self.interleaved = checked
         self._interleaved_btn.setText(
             f"Interleaved: {'ON' if checked else 'OFF'}")
         self._send(f"afe interleaved {1 if checked else 0}")
+        correction = self._calibration.interleave
+        self._interleaved_ring = InterleavedRing(
+            self._sample_ring,
+            correction.lut() if correction else None) if checked else None
+        # XY and math need CH2, which is now the second half of CH1
+        if checked:
+            self._xy_btn.setChecked(False)
+            self._panel_btns["Math"].setChecked(False)
+        for btn in (self._xy_btn, self._panel_btns["Math"], self._ch2_btn):
+            btn.setEnabled(not checked)
+        self._estimate_btn.setEnabled(checked)
+        self._retarget_workers()
+        if self._acquiring:
+            # segments hold one layout; the new one can't be mixed in
+            self._segment_panel.acquisition_done()
+            self._log("info", "Interleaving changed, segments stopped")
+        self._update_curves()
+        self._processor.configure(interleave=self._interleaved_ring,
+                                  luts=self._source_luts)
+
+    def _retarget_workers(self):
+        """Rebuild the measurement and FFT workers over the ring the
+        processor now reads, so their ranges and rates match it."""
+        if self._measure is not None:
+            from core.measurements import MeasurementWorker
+            self._measure.stop()
+            self._measure       = MeasurementWorker(self._source)
+            self._shown_results = None
+        if self._spectrum is not None:
+            from core.spectrum import SpectrumWorker
+            self._spectrum.stop()
+            self._spectrum       = SpectrumWorker(self._source)
+            self._shown_spectrum = None
+
+    def _on_interleave_estimate(self):
+        # fit on raw codes: a fresh view, without the current correction
+        codes = InterleavedRing(self._sample_ring).latest(ESTIMATE_SAMPLES)
+        try:
+            correction = InterleaveCorrection.estimate(codes[:, 0])
+        except ValueError as e:
+            self._log("error", f"Interleave estimate failed: {e}")
+            return
+        self._calibration.interleave      = correction
+        self._interleaved_ring.correction = correction.lut()
+        self._log("ok", f"ADC B gain {correction.gain:.5f}, "
+                        f"offset {correction.offset:+.1f} codes")
+
+    def _on_fft_toggle(self, checked: bool):
+        if checked and self._spectrum_view is None:
+            from ui.spectrum_view import SpectrumView
+            from core.spectrum import SpectrumWorker
+            self._spectrum      = SpectrumWorker(self._source)
+            self._spectrum_view = SpectrumView()
+            self._spectrum_view.reset_requested.connect(
+                lambda: self._spectrum.reset())
+            self._main_layout.insertWidget(1, self._spectrum_view, stretch=4)
+        self.fft_enabled = checked
+        self._fft_btn.setText(f"FFT: {'ON' if checked else 'OFF'}")
+        self._spectrum_view.setVisible(checked)
+        self._spectrum.reset()
+
+    def _on_persistence_toggle(self, checked: bool):
+        self.persistence = checked
+        self._persist_btn.setText(f"Persist: {'ON' if checked else 'OFF'}")
+        # the histogram's voltage bins follow the view, so hold it still
+        self.plotWidget.enableAutoRange(y=not checked)
+        self._persist_image.setVisible(checked)
+        self._update_curves()
+        self._configure_persistence()
+
+    def _configure_persistence(self, *_):
+        if not self.persistence:
+            self._processor.configure(persistence=None)
+            return
+        y_range = tuple(self.plotWidget.getViewBox().viewRange()[1])
+        self._processor.configure(
+            persistence=(y_range, self._decay_combo.currentData()))
+
+    def _update_curves(self):
+        yt = not self.persistence and not self.xy_mode
+        self._curve_ch1.setVisible(self.ch1_enabled and yt)
+        self._curve_ch2.setVisible(self.ch2_enabled and yt and
+                                   not self.interleaved)
+        self._curve_math.setVisible(self.math_enabled and not self.xy_mode)
+
+    def _draw_persistence(self, image: np.ndarray):
+        enabled = np.array([self.ch1_enabled, self.ch2_enabled])[:len(image)]
+        rgb = np.tensordot(image[enabled], CH_COLORS[enabled], axes=(0, 0))
+        np.minimum(rgb, 1.0, out=rgb)
+        self._persist_image.setImage(rgb, autoLevels=False, levels=(0, 1))
+        y0, y1 = self.plotWidget.getViewBox().viewRange()[1]
+        pre    = self.span // 2
+        self._persist_image.setRect(QRectF(-pre, y0, self.span, y1 - y0))
+
+    # ── XY mode ───────────────────────────────────────────────────────────────
+
+    def _on_xy_toggle(self, checked: bool):
+        self.xy_mode = checked
+        self._xy_btn.setText(f"XY: {'ON' if checked else 'OFF'}")
+        if checked:
+            self._persist_btn.setChecked(False)
+        self._persist_btn.setEnabled(not checked)
+        self._xy_image.setVisible(checked)
+        self._curve_xy.setVisible(checked)
+        self._trigger_line.setVisible(not checked and self._capture is None)
+        self._update_curves()
+        plot = self.plotWidget
+        if checked:
+            # the density bins follow the view, so hold it still; start
+            # square on the voltage range that was on screen
+            plot.enableAutoRange(x=False, y=False)
+            y0, y1 = plot.getViewBox().viewRange()[1]
+            plot.setXRange(y0, y1, padding=0)
+            plot.setLabel("left",   "CH2", units="V")
+            plot.setLabel("bottom", "CH1", units="V")
+        else:
+            plot.enableAutoRange(x=self._capture is None, y=True)
+            plot.setLabel("left",   "Voltage", units="V")
+            plot.setLabel("bottom", "Samples")
+        self._configure_xy()
+
+    def _configure_xy(self, *_):
+        if not self.xy_mode:
+            self._processor.configure(xy=None)
+            return
+        x_range, y_range = self.plotWidget.getViewBox().viewRange()
+        self._processor.configure(xy=(tuple(x_range), tuple(y_range),
+                                      self._decay_combo.currentData()))
+
+    def _draw_xy(self, image: np.ndarray, trace: np.ndarray | None):
+        self._xy_image.setImage(image[..., None] * XY_COLOR,
+                                autoLevels=False, levels=(0, 1))
+        (x0, x1), (y0, y1) = self.plotWidget.getViewBox().viewRange()
+        self._xy_image.setRect(QRectF(x0, y0, x1 - x0, y1 - y0))
+        if trace is None:
+            self._curve_xy.setData([], [])
+        else:
+            self._curve_xy.setData(trace[0], trace[1])
 
     def _toggle_run(self, checked: bool):
         self.running = not checked
+        self._sync_processor()
         if checked:
             self._timer.stop()
             self._run_btn.setText("Run")
         else:
+            self._processor.arm()   # Run re-arms Single
             self._timer.start(20)
             self._run_btn.setText("Stop")
 
-    def _update_plot(self):
-        if not self.running:
-            return
-
-        drained = 0
-        while drained < 512:
+    def _sync_processor(self):
+        # live processing pauses while stopped or playing back a capture
+        self._processor.configure(
+            running=self.running and self._capture is None)
+
+    def _afe_settings(self) -> dict:
+        def coupling(radio):
+            return "ac" if radio.isChecked() else "dc"
+        return {
+            "ch1": {"coupling": coupling(self._ac_radio),
+                    "atten": 100 if self._atten_100_radio.isChecked() else 1},
+            "ch2": {"coupling": coupling(self._ch2_ac_radio),
+                    "atten": 100 if self._ch2_atten_100_radio.isChecked() else 1},
+            "trigger_coupling": coupling(self._trig_ac_radio),
+            "interleaved": self._interleaved_btn.isChecked(),
+        }
+
+    def _send_afe_state(self):
+        """Send every AFE setting the controls show, as their handlers
+        would, so the device matches the UI after (re)connecting."""
+        afe = self._afe_settings()
+        for ch in (1, 2):
+            self._send(f"afe coupling {ch} {afe[f'ch{ch}']['coupling']}")
+            self._send(f"afe atten {ch} {afe[f'ch{ch}']['atten']}")
+        self._send(f"afe trigger {afe['trigger_coupling']}")
+        self._send(f"afe interleaved {1 if afe['interleaved'] else 0}")
+
+    def _toggle_record(self, checked: bool):
+        if checked:
+            name = datetime.now().strftime("capture_%Y%m%d_%H%M%S")
             try:
-                ch1_raw, ch2_raw = self._sample_queue.get_nowait()
-                self._ch1_buf.append(_raw_to_volts(ch1_raw))
-                self._ch2_buf.append(_raw_to_volts(ch2_raw))
-                drained += 1
-            except queue.Empty:
-                break
-
-        ch1 = np.array(self._ch1_buf, dtype=np.float32)
-        ch2 = np.array(self._ch2_buf, dtype=np.float32)
-
-        ch1 = ch1 * self.gain + self.offset + self.vpos
-        ch2 = ch2 * self.gain + self.offset + self.vpos
+                path = self._recorder.start(os.path.join(CAPTURE_DIR, name),
+                                            {"afe": self._afe_settings()})
+            except OSError as e:
+                self._log("error", f"Record failed: {e}")
+                self._rec_btn.setChecked(False)
+                return
+            self._rec_btn.setText("Recording…")
+            self._log("info", f"Recording to {path}")
+        else:
+            header = self._recorder.stop()
+            self._rec_btn.setText("Record")
+            if header:
+                self._log("ok", f"Saved {header['samples']} samples"
+                                f" ({header['dropped_blocks']} blocks dropped)")
+
+    def _on_open_capture(self):
+        if self._capture is not None:
+            self._close_capture()
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Open Capture", CAPTURE_DIR, "Captures (*.json)")
+        if not path:
+            return
+        try:
+            capture = Capture(path)
+        except (OSError, ValueError, KeyError) as e:
+            self._log("error", f"Open failed: {e}")
+            return
 
+        self._capture = capture
+        self._sync_processor()
+        self._open_btn.setText("Live")
+        self._trigger_line.hide()
+        self.plotWidget.enableAutoRange(x=False)
+        self.plotWidget.setXRange(0, max(len(capture), 1), padding=0)
+        self._render_playback()
+        self._log("info", f"Playing back {os.path.basename(path)}: "
+                          f"{len(capture)} samples")
+
+    def _close_capture(self):
+        self._capture = None
+        self._sync_processor()
+        self._open_btn.setText("Open…")
+        self._trigger_line.setVisible(not self.xy_mode)
+        self.plotWidget.enableAutoRange(x=not self.xy_mode)
+
+    def _render_playback(self, *_):
+        """Re-decimate the visible part of the capture after zoom/scroll."""
+        if self._capture is None:
+            return
+        x0, x1 = self.plotWidget.getViewBox().viewRange()[0]
+        bins = max(self.plotWidget.width(), MIN_SPAN)
+        x, codes = self._capture.minmax(np.floor(x0), np.ceil(x1) + 1, bins)
+        y = np.empty(codes.shape, dtype=np.float32)
+        for ch, lut in enumerate(self._luts):
+            np.take(lut, codes[ch], out=y[ch])
         if self.ac_coupling:
-            ch1 -= np.mean(ch1)
+            y[0] -= y[0].mean()
         if self.ac_coupling_ch2:
-            ch2 -= np.mean(ch2)
+            y[1] -= y[1].mean()
+        self._draw_frame(x, y)
 
+    def _update_plot(self):
+        if not self.running:
+            return
+        bins = max(self.plotWidget.width(), MIN_SPAN)
+        if bins != self._bins:
+            self._bins = bins
+            self._processor.configure(bins=bins)
+        frame = self._processor.take()
+        if frame is not None and not self._viewing_segments:
+            t0 = time.perf_counter()
+            if frame.xy is not None:
+                self._draw_xy(frame.xy, frame.xy_trace)
+            else:
+                self._draw_frame(frame.x, frame.y)
+            if frame.image is not None:
+                self._draw_persistence(frame.image)
+            if frame.math is not None:
+                self._curve_math.setData(frame.x, frame.math,
+                                         connect="finite")
+            _FRAMES_DRAWN.inc()
+            if metrics.enabled:
+                _RENDER_TIME.observe(time.perf_counter() - t0)
+                _FRAME_LATENCY.observe(time.monotonic() - frame.made)
+        self._show_frame_stats()
+        if self._overlay.isVisible():
+            self._update_overlay()
+        self._show_segment_progress()
+        self._show_measurements()
+        if self.fft_enabled:
+            self._update_spectrum()
+
+    def closeEvent(self, event):
+        if self._conn_signals:
+            self._conn_signals.detach()
+        self._processor.stop()
+        for worker in (self._measure, self._spectrum):
+            if worker is not None:
+                worker.stop()
+        super().closeEvent(event)
+
+    def _on_record(self, ring: SampleRing, start: int, stop: int,
+                   rate: float | None):
+        # called on the processing thread for every new triggered record;
+        # one from before an interleave switch doesn't fit the new worker
+        measure = self._measure
+        if measure is not None and measure.ring is ring:
+            measure.submit(start, stop, self._cal_luts[:ring.channels], rate)
+
+    def _draw_frame(self, x: np.ndarray, y: np.ndarray,
+                    connect: str = "all"):
         if self.ch1_enabled:
-            self._curve_ch1.setData(ch1)
-        if self.ch2_enabled:
-            self._curve_ch2.setData(ch2)
+            self._curve_ch1.setData(x, y[0], connect=connect)
+        if self.ch2_enabled and len(y) > 1:
+            self._curve_ch2.setData(x, y[1], connect=connect)
         self._trigger_line.setValue(self.trigger_level)
+
+    # ── segmented memory ──────────────────────────────────────────────────────
+
+    def _on_segment_acquire(self, count: int):
+        ring  = self._source
+        store = SegmentStore.fit(count, self.span, self.span // 2,
+                                 ring.channels, ring.dtype)
+        if store.segments < count:
+            self._log("info", f"Segment memory holds {store.segments} "
+                              "segments at this timebase")
+        self._segments         = store
+        self._segment_progress = None
+        self._acquiring        = True
+        self._processor.configure(segments=store)
+
+    def _on_segment_stop(self):
+        self._acquiring = False
+        self._processor.configure(segments=None)
+
+    def _show_segment_progress(self):
+        store = self._segments
+        if store is None:
+            return
+        progress = (store.count, store.missed)
+        if progress != self._segment_progress:
+            self._segment_progress = progress
+            self._segment_panel.show_progress(store.count, store.segments,
+                                              store.missed)
+            self._draw_segments()
+        if self._acquiring and store.full:
+            self._segment_panel.acquisition_done()
+
+    def _draw_segments(self):
+        store = self._segments
+        if store is None or store.count == 0 or not self._viewing_segments:
+            return
+        index = self._segment_panel.selection()
+        bins  = max(self.plotWidget.width(), MIN_SPAN)
+        if index is None:
+            bins = max(16, min(bins, OVERLAY_POINTS // (2 * store.count)))
+        else:
+            index = min(index, store.count - 1)
+            self._segment_panel.show_time(
+                store.offsets(self._processor.rate)[index],
+                store.times[index])
+        x, y = store.render(self._luts[:store.data.shape[1]], bins, index)
+        self._draw_frame(x, y, connect="finite")
+
+    # ── metrics ───────────────────────────────────────────────────────────────
+
+    def _register_metrics(self):
+        proc, ring = self._processor, self._sample_ring
+        metrics.gauge("input_rate", "Measured input sample rate (S/s)",
+                      lambda: proc.rate or 0)
+        metrics.gauge("frames_dropped", "Frames replaced before drawn",
+                      lambda: proc.dropped)
+        metrics.gauge("ticks_late", "Processing ticks over their period",
+                      lambda: proc.late)
+        metrics.gauge("ring_overruns", "Samples overwritten before read",
+                      lambda: ring.overruns)
+
+    def _update_overlay(self):
+        now   = time.monotonic()
+        state = self._overlay_state
+        if state is not None and now - state[0] < OVERLAY_PERIOD:
+            return
+        self._overlay_state = (now, _FRAMES_DRAWN.value,
+                               list(_FRAME_LATENCY.counts))
+        if state is None:
+            return
+        fps     = (_FRAMES_DRAWN.value - state[1]) / (now - state[0])
+        latency = _FRAME_LATENCY.quantile(0.5, since=state[2])
+        rate    = self._processor.rate
+        drops   = self._sample_ring.overruns + self._processor.dropped
+        lines   = [f"{pg.siFormat(rate or 0, suffix='S/s')}   {fps:.0f} FPS",
+                   f"drops {drops}   late ticks {self._processor.late}"]
+        if latency is not None:
+            lines.append(f"latency p50 ≤ "
+                         f"{pg.siFormat(latency, suffix='s')}")
+        self._overlay.setText("\n".join(lines))
+
+    def _show_frame_stats(self):
+        stats = (self._processor.dropped, self._processor.late)
+        if stats != self._frame_stats:
+            self._frame_stats = stats
+            self._frames_label.setText(
+                f"Frames dropped: {stats[0]}, late: {stats[1]}")
+
+    def _update_spectrum(self):
+        if self._capture is None:
+            size, window, averaging, count = self._spectrum_view.settings()
+            source = self._spectrum.ring
+            stop   = source.write_pos
+            # the processor's rate is for its ring, which trails an
+            # interleave switch by a tick
+            rate   = (self._processor.rate
+                      if self._processor.source is source else None)
+            if stop >= size:
+                bins = max(self._spectrum_view.plotWidget.width(), MIN_SPAN)
+                self._spectrum.submit(stop, size, window, averaging, count,
+                                      self._cal_luts[:source.channels], rate,
+                                      bins)
+        latest = self._spectrum.latest()
+        if latest is not None and latest is not self._shown_spectrum:
+            self._shown_spectrum = latest
+            self._spectrum_view.show_spectrum(
+                *latest, self.ch1_enabled,
+                self.ch2_enabled and not self.interleaved)
+
+    def _show_measurements(self):
+        if self._meas_panel is None or self._meas_panel.isHidden():
+            return
+        latest = self._measure.latest()
+        if latest is None or latest is self._shown_results:
+            return
+        self._shown_results = latest
+        self._meas_panel.show_results(*latest, self._processor.rate)
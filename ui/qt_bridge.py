@@ -0,0 +1,36 @@
+from PyQt6.QtCore import QObject, pyqtSignal as Signal
+
+
+class ConnectionSignals(QObject):
+    """Qt-side mirror of a ConnectionManager's plain signals.
+
+    The manager emits on the asyncio thread; re-emitting through these
+    Qt signals queues each call onto the GUI thread, where widgets can be
+    touched safely.
+    """
+
+    connected         = Signal()
+    disconnected      = Signal()
+    connecting        = Signal()
+    device_found      = Signal(str)
+    response_received = Signal(str)
+    reconnected       = Signal(float, float)
+
+    def __init__(self, conn_mgr, parent=None):
+        super().__init__(parent)
+        self._links = [(conn_mgr.connected,         self.connected.emit),
+                       (conn_mgr.disconnected,      self.disconnected.emit),
+                       (conn_mgr.connecting,        self.connecting.emit),
+                       (conn_mgr.device_found,      self.device_found.emit),
+                       (conn_mgr.response_received,
+                        self.response_received.emit),
+                       (conn_mgr.reconnected,       self.reconnected.emit)]
+        for signal, slot in self._links:
+            signal.connect(slot)
+
+    def detach(self):
+        """Disconnect from the manager, which may outlive this QObject
+        (it's stopped only after the event loop returns)."""
+        for signal, slot in self._links:
+            signal.disconnect(slot)
+        self._links = []
@@ -0,0 +1,117 @@
+from datetime import datetime
+
+import pyqtgraph as pg
+from PyQt6.QtWidgets import (
+    QFrame, QHBoxLayout, QLabel, QPushButton, QSpinBox, QVBoxLayout,
+)
+from PyQt6.QtCore import pyqtSignal as Signal
+
+from core.segments import MAX_SEGMENTS
+
+DEFAULT_SEGMENTS = 100
+
+
+class SegmentPanel(QFrame):
+    """Segmented memory controls: acquire N segments, then step through
+    them one at a time or overlay them all on the main plot."""
+
+    acquire_requested = Signal(int)   # number of segments
+    stop_requested    = Signal()
+    view_changed      = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFrameShape(QFrame.Shape.StyledPanel)
+        self._build_ui()
+
+    def _build_ui(self):
+        outer = QVBoxLayout(self)
+        header = QLabel("Segments")
+        header.setStyleSheet("font-weight: bold; color: #00ffff;")
+        outer.addWidget(header)
+
+        row = QHBoxLayout()
+        self._count_spin = QSpinBox()
+        self._count_spin.setRange(2, MAX_SEGMENTS)
+        self._count_spin.setValue(DEFAULT_SEGMENTS)
+        row.addWidget(self._count_spin)
+        self._acquire_btn = QPushButton("Acquire")
+        self._acquire_btn.setCheckable(True)
+        self._acquire_btn.toggled.connect(self._on_acquire_toggle)
+        row.addWidget(self._acquire_btn)
+        outer.addLayout(row)
+
+        self._progress_label = QLabel("No segments")
+        outer.addWidget(self._progress_label)
+
+        row = QHBoxLayout()
+        self._view_btn = QPushButton("View: Live")
+        self._view_btn.setCheckable(True)
+        self._view_btn.toggled.connect(self._on_view_toggle)
+        row.addWidget(self._view_btn)
+        self._overlay_btn = QPushButton("Overlay: OFF")
+        self._overlay_btn.setCheckable(True)
+        self._overlay_btn.toggled.connect(self._on_overlay_toggle)
+        row.addWidget(self._overlay_btn)
+        outer.addLayout(row)
+
+        row = QHBoxLayout()
+        prev_btn = QPushButton("◀")
+        prev_btn.clicked.connect(lambda: self._index_spin.stepBy(-1))
+        row.addWidget(prev_btn)
+        self._index_spin = QSpinBox()
+        self._index_spin.setRange(1, 1)
+        self._index_spin.valueChanged.connect(self.view_changed)
+        row.addWidget(self._index_spin, stretch=1)
+        next_btn = QPushButton("▶")
+        next_btn.clicked.connect(lambda: self._index_spin.stepBy(1))
+        row.addWidget(next_btn)
+        outer.addLayout(row)
+
+        self._time_label = QLabel("")
+        outer.addWidget(self._time_label)
+
+    # ── state for the oscilloscope ────────────────────────────────────────────
+
+    @property
+    def viewing(self) -> bool:
+        return self._view_btn.isChecked()
+
+    def selection(self) -> int | None:
+        """Index of the segment to show, or None to overlay them all."""
+        if self._overlay_btn.isChecked():
+            return None
+        return self._index_spin.value() - 1
+
+    def show_progress(self, count: int, segments: int, missed: int):
+        text = f"{count} / {segments} segments"
+        if missed:
+            text += f", {missed} missed"
+        self._progress_label.setText(text)
+        if count != self._index_spin.maximum():
+            self._index_spin.setRange(1, max(count, 1))
+
+    def show_time(self, offset: float, wall: float):
+        self._time_label.setText(
+            f"{pg.siFormat(offset, precision=6, suffix='s')}  "
+            f"({datetime.fromtimestamp(wall):%H:%M:%S.%f})")
+
+    def acquisition_done(self):
+        self._acquire_btn.setChecked(False)
+
+    # ── handlers ──────────────────────────────────────────────────────────────
+
+    def _on_acquire_toggle(self, checked: bool):
+        self._acquire_btn.setText("Stop" if checked else "Acquire")
+        if checked:
+            self.acquire_requested.emit(self._count_spin.value())
+        else:
+            self.stop_requested.emit()
+
+    def _on_view_toggle(self, checked: bool):
+        self._view_btn.setText(f"View: {'Segments' if checked else 'Live'}")
+        self.view_changed.emit()
+
+    def _on_overlay_toggle(self, checked: bool):
+        self._overlay_btn.setText(f"Overlay: {'ON' if checked else 'OFF'}")
+        self.view_changed.emit()
@@ -0,0 +1,81 @@
+import pyqtgraph as pg
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QPushButton,
+    QSpinBox,
+)
+from PyQt6.QtCore import pyqtSignal as Signal
+
+from core.spectrum import WINDOWS, AVERAGING, FFT_SIZES
+
+DEFAULT_SIZE = 1 << 16
+
+
+def _size_label(n: int) -> str:
+    return f"{n >> 20} M" if n >= 1 << 20 else f"{n >> 10} k"
+
+
+class SpectrumView(QWidget):
+    """Frequency-domain plot of CH1 / CH2 in dBV, plus its settings row."""
+
+    reset_requested = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._build_ui()
+
+    def _build_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.plotWidget = pg.PlotWidget()
+        self.plotWidget.showGrid(x=True, y=True, alpha=0.5)
+        self.plotWidget.setLabel("left",   "Level", units="dBV")
+        self.plotWidget.setLabel("bottom", "Frequency", units="Hz")
+        self.plotWidget.setYRange(-120, 20)
+        self._curve_ch1 = self.plotWidget.plot(pen='y', name="CH1")
+        self._curve_ch2 = self.plotWidget.plot(pen='c', name="CH2")
+        layout.addWidget(self.plotWidget)
+
+        row = QHBoxLayout()
+        row.addWidget(QLabel("Window"))
+        self._window_combo = QComboBox()
+        self._window_combo.addItems(WINDOWS)
+        row.addWidget(self._window_combo)
+
+        row.addWidget(QLabel("Points"))
+        self._size_combo = QComboBox()
+        for n in FFT_SIZES:
+            self._size_combo.addItem(_size_label(n), n)
+        self._size_combo.setCurrentIndex(FFT_SIZES.index(DEFAULT_SIZE))
+        row.addWidget(self._size_combo)
+
+        row.addWidget(QLabel("Average"))
+        self._avg_combo = QComboBox()
+        self._avg_combo.addItems(AVERAGING)
+        row.addWidget(self._avg_combo)
+        self._avg_count = QSpinBox()
+        self._avg_count.setRange(2, 1024)
+        self._avg_count.setValue(16)
+        row.addWidget(self._avg_count)
+
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset_requested)
+        row.addWidget(reset_btn)
+        row.addStretch()
+        layout.addLayout(row)
+
+    def settings(self) -> tuple[int, str, str, int]:
+        """(size, window, averaging, count) as picked in the settings row."""
+        return (self._size_combo.currentData(),
+                self._window_combo.currentText(),
+                self._avg_combo.currentText(),
+                self._avg_count.value())
+
+    def show_spectrum(self, freqs, dbv, ch1: bool = True, ch2: bool = True):
+        ch2 = ch2 and len(dbv) > 1
+        self._curve_ch1.setVisible(ch1)
+        self._curve_ch2.setVisible(ch2)
+        if ch1:
+            self._curve_ch1.setData(freqs, dbv[0])
+        if ch2:
+            self._curve_ch2.setData(freqs, dbv[1])
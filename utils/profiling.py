@@ -0,0 +1,42 @@
+import sys
+import time
+
+_T0 = time.perf_counter()   # as early as main.py imports this module
+
+
+class StartupProfile:
+    """Named startup milestones, printed as a timing breakdown.
+
+    mark() records the time since the previous mark and since this module
+    was imported; when disabled it does nothing.  Marks made after
+    report() (e.g. the device connecting late) are printed as they come.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled   = enabled
+        self._marks    = []
+        self._last     = _T0
+        self._reported = False
+
+    def mark(self, name: str):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._marks.append((name, now - self._last, now - _T0))
+        self._last = now
+        if self._reported:
+            self._print(*self._marks[-1])
+
+    def report(self):
+        if not self.enabled or self._reported:
+            return
+        print(f"{'startup stage':<28} {'step ms':>9} {'total ms':>9}",
+              file=sys.stderr)
+        for mark in self._marks:
+            self._print(*mark)
+        self._reported = True
+
+    @staticmethod
+    def _print(name: str, step: float, total: float):
+        print(f"{name:<28} {step * 1e3:9.1f} {total * 1e3:9.1f}",
+              file=sys.stderr)